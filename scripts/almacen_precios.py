@@ -0,0 +1,222 @@
+import os
+import re
+import sys
+import glob
+import json
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.dataset as ds
+from tqdm import tqdm
+from archivos_datos import archivos_de_carpeta, leer_columnas, leer_por_bloques
+from lectura_precios import IDS_ENTEROS, tipar_ids
+
+# Almacén de precios en parquet particionado por anio/mes/id_comercio.
+# Cada fila es una observación (sucursal, producto, fecha, precio), ordenada por
+# id_producto dentro de cada archivo para que el filtro por producto pueda saltear
+# row groups enteros usando las estadísticas min/max.
+
+COLUMNAS_BASE = ['id_comercio', 'id_bandera', 'id_sucursal', 'sucursales_provincia', 'id_producto']
+PATRON_PRECIO = re.compile(r'^precio_(\d{8})$')
+FILAS_POR_BLOQUE = 1_000_000  # Filas del CSV ancho que se leen por vez
+FILAS_POR_ROW_GROUP = 128 * 1024
+REGISTRO_INGESTA = '_ingestados.json'
+PATRON_PARTE = re.compile(r'.+__.+-\d{5}-\d+\.parquet')  # {carpeta}__{nombre}-<bloque>-<n>.parquet
+
+ESQUEMA_ALMACEN = pa.schema([
+    ('id_bandera', pa.int16()),
+    ('id_sucursal', pa.int32()),
+    ('provincia', pa.dictionary(pa.int16(), pa.string())),
+    ('id_producto', pa.string()),
+    ('fecha', pa.int32()),
+    ('precio', pa.float64()),
+    ('anio', pa.int16()),
+    ('mes', pa.int8()),
+    ('id_comercio', pa.int32()),
+])
+PARTICIONES = ds.partitioning(
+    pa.schema([('anio', pa.int16()), ('mes', pa.int8()), ('id_comercio', pa.int32())]),
+    flavor='hive'
+)
+
+def ruta_almacen_por_defecto(carpeta_base):
+    return str(Path(carpeta_base) / 'almacen_precios')
+
+def columnas_de_precio(columnas):
+    """Devuelve {columna: fecha YYYYMMDD} para las columnas precio_YYYYMMDD"""
+    return {col: PATRON_PRECIO.match(col).group(1) for col in columnas if PATRON_PRECIO.match(col)}
+
+def bloque_a_largo(df, columnas_precio):
+    """Pasa un bloque del CSV ancho a filas (sucursal, producto, fecha, precio) sin precios vacíos"""
+    if 'sucursales_provincia' not in df.columns:
+        df['sucursales_provincia'] = 'Desconocida'
+    largo = df.melt(
+        id_vars=COLUMNAS_BASE, value_vars=list(columnas_precio),
+        var_name='fecha', value_name='precio'
+    ).dropna(subset=['precio'])
+    largo['fecha'] = largo['fecha'].map(columnas_precio).astype('int32')
+    largo['anio'] = (largo['fecha'] // 10000).astype('int16')
+    largo['mes'] = (largo['fecha'] // 100 % 100).astype('int8')
+    largo = largo.rename(columns={'sucursales_provincia': 'provincia'})
+    largo = largo.sort_values(['id_producto', 'fecha'], kind='stable')
+    return pa.Table.from_pandas(largo[ESQUEMA_ALMACEN.names], schema=ESQUEMA_ALMACEN, preserve_index=False)
+
+def nombre_partes(archivo):
+    """
+    Prefijo de las partes que escribe un archivo: la carpeta (el año) y el nombre, así
+    2024/sepa_jueves.csv y 2025/sepa_jueves.csv no comparten partes aunque escriban en
+    las mismas particiones (un archivo anual puede traer fechas del año anterior)
+    """
+    return f'{Path(archivo).parent.name}__{Path(archivo).stem}'
+
+def partes_de_formato_anterior(almacen):
+    """Partes escritas cuando los nombres no llevaban la carpeta (solo el nombre del archivo)"""
+    partes = glob.glob(os.path.join(glob.escape(almacen), '**', '*.parquet'), recursive=True)
+    return [parte for parte in partes if not PATRON_PARTE.fullmatch(os.path.basename(parte))]
+
+def borrar_ingesta_previa(almacen, nombre):
+    """Borra las partes que había escrito una ingesta anterior del mismo archivo (nombre de nombre_partes)"""
+    # Las partes se llaman {nombre}-<bloque>-<n>.parquet; el glob solo no alcanza porque
+    # 'sepa_jueves-*' también agarraría las de sepa_jueves-2
+    patron = re.compile(re.escape(nombre) + r'-\d{5}-\d+\.parquet')
+    for parte in glob.glob(os.path.join(glob.escape(almacen), '**', f'{glob.escape(nombre)}-*.parquet'), recursive=True):
+        if patron.fullmatch(os.path.basename(parte)):
+            os.remove(parte)
+
+def ingestar_archivo(archivo, almacen, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Convierte un CSV anual de precios (o su parquet) al almacén. Devuelve la cantidad de precios escritos."""
+    columnas = leer_columnas(archivo)
+    columnas_precio = columnas_de_precio(columnas)
+    if 'id_producto' not in columnas or not columnas_precio:
+        print(f"Archivo {archivo} no tiene id_producto o columnas precio_YYYYMMDD, saltando...")
+        return 0
+
+    nombre = nombre_partes(archivo)
+    borrar_ingesta_previa(almacen, nombre)
+    usecols = [col for col in COLUMNAS_BASE if col in columnas] + list(columnas_precio)
+    dtypes = {'id_producto': str, 'sucursales_provincia': 'category'}
+    dtypes.update({col: str for col in IDS_ENTEROS})
+    dtypes.update({col: 'float64' for col in columnas_precio})
+
+    escritos = 0
+    for i, bloque in enumerate(leer_por_bloques(archivo, usecols, dtypes, filas_por_bloque)):
+        tabla = bloque_a_largo(tipar_ids(bloque), columnas_precio)
+        ds.write_dataset(
+            tabla, almacen, format='parquet', partitioning=PARTICIONES,
+            basename_template=f'{nombre}-{i:05d}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+            max_rows_per_group=FILAS_POR_ROW_GROUP, min_rows_per_group=min(FILAS_POR_ROW_GROUP, len(tabla)),
+            file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'),
+        )
+        escritos += len(tabla)
+    return escritos
+
+def archivos_de_precios(carpeta_base, año='2025'):
+    """Los CSV (o parquet) anuales de precios del año, sin los mayoristas"""
+    archivos = archivos_de_carpeta(str(Path(carpeta_base) / año))
+    return [archivo for archivo in archivos if 'mayorista' not in archivo.lower()]
+
+def firma_archivo(archivo):
+    stat = os.stat(archivo)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def leer_registro(almacen):
+    """{archivo: [tamaño, mtime_ns]} de los archivos ingestados en el almacén"""
+    ruta_registro = os.path.join(almacen, REGISTRO_INGESTA)
+    if not os.path.exists(ruta_registro):
+        return {}
+    with open(ruta_registro) as f:
+        return json.load(f)
+
+def registrados_del_año(registro, carpeta_base, año='2025'):
+    carpeta = str(Path(carpeta_base) / año)
+    return [archivo for archivo in registro if os.path.dirname(archivo) == carpeta]
+
+def archivos_desactualizados(carpeta_base, almacen, año='2025'):
+    """
+    Archivos del año cuyo contenido no coincide con lo que tiene el almacén: los nuevos o
+    modificados desde la última ingesta (tamaño o mtime distintos) y los ingestados que ya
+    no están. Si la lista no está vacía, leer del almacén daría precios viejos.
+    """
+    registro = leer_registro(almacen)
+    archivos = archivos_de_precios(carpeta_base, año)
+    cambiados = [archivo for archivo in archivos if registro.get(archivo) != firma_archivo(archivo)]
+    borrados = [archivo for archivo in registrados_del_año(registro, carpeta_base, año) if archivo not in archivos]
+    return cambiados + borrados
+
+def almacen_al_dia(carpeta_base, almacen, año='2025'):
+    """True si hay almacén y refleja los archivos actuales del año; si no, avisa por qué no se usa"""
+    if not os.path.isdir(almacen):
+        return False
+    desactualizados = archivos_desactualizados(carpeta_base, almacen, año)
+    if desactualizados:
+        print(f"El almacén {almacen} no está al día ({len(desactualizados)} archivo(s) cambiaron desde la "
+              f"última ingesta, por ejemplo {desactualizados[0]}); se leen los archivos. "
+              f"Para actualizarlo: python almacen_precios.py {carpeta_base} {año} {almacen}")
+        return False
+    return True
+
+def ingestar_precios(carpeta_base, almacen=None, año='2025'):
+    """
+    Convierte los CSV anuales de precios (excluyendo mayoristas) al almacén parquet.
+    Los archivos que no cambiaron desde la última ingesta (tamaño y mtime) se saltean,
+    y se borran las partes de los archivos ingestados que ya no están.
+    """
+    almacen = almacen or ruta_almacen_por_defecto(carpeta_base)
+    os.makedirs(almacen, exist_ok=True)
+    ruta_registro = os.path.join(almacen, REGISTRO_INGESTA)
+    registro = leer_registro(almacen)
+    anteriores = partes_de_formato_anterior(almacen)
+    if anteriores:
+        # No se sabe de qué año es cada una: se borran todas y se vuelve a ingestar todo
+        print(f"El almacén tiene {len(anteriores)} partes con nombres del formato anterior; se arma de nuevo")
+        for parte in anteriores:
+            os.remove(parte)
+        registro = {}
+
+    archivos = archivos_de_precios(carpeta_base, año)
+    print(f"Encontrados {len(archivos)} archivos de precios (excluyendo mayoristas)")
+
+    for archivo in registrados_del_año(registro, carpeta_base, año):
+        if archivo not in archivos:
+            borrar_ingesta_previa(almacen, nombre_partes(archivo))
+            del registro[archivo]
+    with open(ruta_registro, 'w') as f:
+        json.dump(registro, f, indent=1)
+
+    for archivo in tqdm(archivos, desc="Ingestando archivos"):
+        firma = firma_archivo(archivo)
+        if registro.get(archivo) == firma:
+            continue
+        try:
+            ingestar_archivo(archivo, almacen)
+        except Exception as e:
+            print(f"Error al ingestar {archivo}: {str(e)}")
+            continue
+        registro[archivo] = firma
+        with open(ruta_registro, 'w') as f:
+            json.dump(registro, f, indent=1)
+    print(f"Almacén actualizado en {almacen}")
+    return almacen
+
+def leer_precios(almacen, ids_productos, año='2025', columnas=None):
+    """
+    Lee del almacén solo las filas de los productos pedidos.
+    El filtro por anio poda particiones y el de id_producto se empuja a los row groups.
+    Devuelve un DataFrame largo con las columnas pedidas (por defecto, todas).
+    """
+    dataset = ds.dataset(almacen, format='parquet', partitioning=PARTICIONES,
+                         exclude_invalid_files=True, ignore_prefixes=['_', '.'])
+    ids = pa.array([str(i) for i in ids_productos], type=pa.string())
+    filtro = (ds.field('anio') == int(año)) & ds.field('id_producto').isin(ids)
+    tabla = dataset.to_table(columns=columnas, filter=filtro)
+    return tabla.to_pandas()
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3, 4):
+        print("Uso: python almacen_precios.py <carpeta_data> [año] [carpeta_almacen]")
+        sys.exit(1)
+
+    carpeta_base = sys.argv[1]
+    año = sys.argv[2] if len(sys.argv) > 2 else '2025'
+    almacen = sys.argv[3] if len(sys.argv) > 3 else None
+    ingestar_precios(carpeta_base, almacen, año)
@@ -0,0 +1,80 @@
+import os
+import csv
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Lectura de los archivos de data/, que según cómo se descomprimieron (ver
+# descomprimir_todo.py) quedaron como CSV o como parquet con todas las columnas en
+# texto. Los scripts buscan y leen los archivos con estas funciones, así funcionan
+# igual con cualquiera de los dos. Si un archivo está en los dos formatos se usa
+# el parquet.
+# El separador de los CSV (los diarios usan '|' y los anuales ',') se decide
+# mirando solo el encabezado.
+
+EXTENSIONES = ['.parquet', '.csv']  # En orden de preferencia
+SALIDAS_DERIVADAS = {'catalogo_productos.parquet'}  # Parquet que arman otros scripts dentro de data/
+
+def es_parquet(archivo):
+    return str(archivo).lower().endswith('.parquet')
+
+def detectar_separador(linea):
+    """'|' o ',' según cuál aparece más en la línea (el encabezado), en bytes o en texto"""
+    if isinstance(linea, bytes):
+        linea = linea.decode('utf-8', errors='replace')
+    return '|' if linea.count('|') > linea.count(',') else ','
+
+def separador_de_archivo(archivo):
+    with open(archivo, 'rb') as f:
+        return detectar_separador(f.readline())
+
+def elegir_archivo(nombres, base):
+    """De los nombres de una carpeta, el de base ('productos') en el formato preferido, o None"""
+    for extension in EXTENSIONES:
+        if base + extension in nombres:
+            return base + extension
+    return None
+
+def archivos_de_carpeta(carpeta):
+    """CSV y parquet de la carpeta (uno por nombre, prefiriendo el parquet), ordenados"""
+    if not os.path.isdir(carpeta):
+        return []
+    nombres = set(os.listdir(carpeta))
+    bases = {os.path.splitext(nombre)[0] for nombre in nombres
+             if os.path.splitext(nombre)[1].lower() in EXTENSIONES and not nombre.startswith('._')
+             and nombre not in SALIDAS_DERIVADAS}
+    return sorted(os.path.join(carpeta, elegir_archivo(nombres, base)) for base in bases)
+
+def leer_encabezado(archivo):
+    """Columnas del archivo sin leer los datos. Devuelve (separador, columnas); en parquet el separador es ''."""
+    if es_parquet(archivo):
+        return '', pq.read_schema(archivo).names
+    with open(archivo, 'rb') as f:
+        linea = f.readline()
+    separador = detectar_separador(linea)
+    texto = linea.decode('utf-8-sig', errors='replace').rstrip('\r\n')
+    if not texto:
+        return separador, []
+    return separador, next(csv.reader([texto], delimiter=separador))
+
+def leer_columnas(archivo):
+    return leer_encabezado(archivo)[1]
+
+def leer_tabla(archivo, columnas=None, dtype=None):
+    """El archivo entero (solo las columnas pedidas), con los tipos de dtype"""
+    if es_parquet(archivo):
+        df = pd.read_parquet(archivo, columns=columnas)
+        return df.astype(dtype) if dtype is not None else df
+    return pd.read_csv(archivo, sep=separador_de_archivo(archivo), usecols=columnas, dtype=dtype, low_memory=False)
+
+def leer_por_bloques(archivo, columnas, dtype, filas_por_bloque, flujo=None):
+    """
+    Recorre el archivo de a filas_por_bloque filas. Con flujo (el archivo ya abierto en
+    binario) se lee desde ahí, por ejemplo para medir la lectura.
+    """
+    origen = flujo if flujo is not None else archivo
+    if es_parquet(archivo):
+        for lote in pq.ParquetFile(origen).iter_batches(batch_size=filas_por_bloque, columns=columnas):
+            yield lote.to_pandas().astype(dtype)
+        return
+    yield from pd.read_csv(origen, sep=separador_de_archivo(archivo), usecols=columnas, dtype=dtype,
+                           chunksize=filas_por_bloque)
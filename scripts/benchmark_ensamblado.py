@@ -0,0 +1,69 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from buscar_precios_cervezas import armar_filas
+
+# Compara el armado de filas con iterrows (como estaba antes) contra el armado
+# en bloque de armar_filas, sobre un archivo sintético con muchas filas encontradas.
+
+def generar_archivo_sintetico(filas, dias=30, comercios=60, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        'id_comercio': rng.integers(1, comercios + 1, filas),
+        'id_bandera': rng.integers(1, 4, filas),
+        'id_sucursal': rng.integers(1, 500, filas),
+        'sucursales_provincia': rng.choice(['AR-B', 'AR-C', 'AR-X', 'AR-S'], filas),
+        'id_producto': rng.integers(7790000000000, 7799999999999, filas).astype(str),
+    })
+    for dia in range(1, dias + 1):
+        df[f'precio_202501{dia:02d}'] = rng.choice([899.0, 949.0, 1299.99, np.nan], filas)
+    df_comercios = pd.DataFrame({
+        'id_comercio': np.arange(1, comercios),  # Falta el último para probar 'Desconocido'
+        'comercio_bandera_nombre': [f'Comercio {i}' for i in range(1, comercios)],
+    })
+    return df, df_comercios
+
+def armar_filas_iterrows(df_filtrado, df_comercios):
+    """Versión original, fila por fila, para comparar"""
+    resultados = []
+    for _, row in df_filtrado.iterrows():
+        id_comercio = row['id_comercio']
+        nombre_comercio = 'Desconocido'
+        try:
+            nombre_comercio = df_comercios[df_comercios['id_comercio'] == id_comercio]['comercio_bandera_nombre'].iloc[0]
+        except:
+            pass
+        fila = {
+            'id_comercio': id_comercio,
+            'id_bandera': row['id_bandera'],
+            'id_sucursal': row['id_sucursal'],
+            'nombre_comercio': nombre_comercio,
+            'provincia': row['sucursales_provincia'] if 'sucursales_provincia' in df_filtrado.columns else 'Desconocida',
+            'id_producto': row['id_producto'],
+        }
+        columnas_precios = [col for col in df_filtrado.columns if col.startswith('precio_')]
+        for col in columnas_precios:
+            fecha = col.replace('precio_', '')
+            fila[fecha] = row[col]
+        resultados.append(fila)
+    return pd.DataFrame(resultados)
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df, df_comercios = generar_archivo_sintetico(filas)
+    print(f"Archivo sintético: {df.shape[0]} filas x {df.shape[1]} columnas")
+
+    inicio = time.perf_counter()
+    nombres = df_comercios.drop_duplicates('id_comercio').set_index('id_comercio')['comercio_bandera_nombre']
+    nuevo = armar_filas(df, nombres)
+    t_nuevo = time.perf_counter() - inicio
+    print(f"armar_filas (en bloque): {t_nuevo:.3f} s")
+
+    inicio = time.perf_counter()
+    viejo = armar_filas_iterrows(df, df_comercios)
+    t_viejo = time.perf_counter() - inicio
+    print(f"iterrows (original):     {t_viejo:.3f} s")
+
+    pd.testing.assert_frame_equal(viejo, nuevo.reset_index(drop=True))
+    print(f"Resultados idénticos. Aceleración: {t_viejo / t_nuevo:.0f}x")
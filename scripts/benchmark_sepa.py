@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import traceback
+import multiprocessing as mp
+import pandas as pd
+from sepa_sintetico import ESCALAS, generar_sepa
+
+# Mide los scripts principales sobre datos sintéticos (ver sepa_sintetico.py) en
+# varios tamaños: tiempo, filas por segundo y pico de memoria (RSS) de cada etapa.
+# Cada etapa corre en su propio proceso, con la salida en <etapa>.log, así el pico de
+# memoria es solo suyo (incluidos sus workers). Los resultados se comparan contra una
+# línea base en JSON y se marcan las regresiones.
+#
+# Las etapas van en orden y usan lo que dejaron las anteriores: primero se descomprime
+# crudo/ a data/, después se arman comercios y cervezas y al final se buscan precios.
+
+BASE_POR_DEFECTO = 'benchmark_sepa.json'
+TOLERANCIA = 0.2      # Más de un 20% peor que la línea base es regresión
+SEGUNDOS_MINIMOS = 0.5  # Diferencias de tiempo menores no cuentan (ruido en lo muy rápido)
+
+def etapa_descomprimir(carpeta, resumen, workers):
+    from descomprimir_todo import recorrer_y_procesar
+    crudo, data = os.path.join(carpeta, 'crudo'), os.path.join(carpeta, 'data')
+    errores = recorrer_y_procesar(crudo, crudo, data, workers=workers, margen=0)
+    if errores:
+        raise RuntimeError(f"{len(errores)} archivos no se pudieron descomprimir")
+    return resumen['filas_precios'] + resumen['filas_productos'] + resumen['filas_comercio']
+
+def etapa_columnas(carpeta, resumen, workers):
+    from comparar_columnas import analizar_columnas_unicas
+    from catalogo_columnas import encontrar_csv
+    analizar_columnas_unicas(os.path.join(carpeta, 'data'))
+    return len(encontrar_csv(os.path.join(carpeta, 'data')))  # Solo lee encabezados: se cuentan archivos
+
+def etapa_comercios(carpeta, resumen, workers):
+    from ids_comercios import procesar_comercios
+    procesar_comercios(os.path.join(carpeta, 'data', 'sepa'))
+    return resumen['filas_comercio']
+
+def etapa_cervezas(carpeta, resumen, workers):
+    from ids_cervezas import procesar_cervezas
+    procesar_cervezas(os.path.join(carpeta, 'data', 'sepa'), workers=workers)
+    return resumen['filas_productos']
+
+def etapa_precios_cervezas(carpeta, resumen, workers):
+    from buscar_precios_cervezas import buscar_precios_cervezas
+    from dimension_comercios import cargar_comercios
+    ids_cervezas = pd.DataFrame({'id_producto': resumen['ids_cervezas']})
+    buscar_precios_cervezas(os.path.join(carpeta, 'data'), ids_cervezas, cargar_comercios(),
+                            resumen['año'], workers=workers)
+    return resumen['filas_precios']
+
+def etapa_producto_anual(carpeta, resumen, workers):
+    from buscar_producto_anual import procesar_archivos_2025
+    procesar_archivos_2025(os.path.join(carpeta, 'data'), resumen['ids_cervezas'][:5], workers=workers)
+    return resumen['filas_precios']
+
+# Nombre: (función, qué cuenta lo que devuelve)
+ETAPAS = {
+    'recorrer_y_procesar': (etapa_descomprimir, 'filas'),
+    'analizar_columnas_unicas': (etapa_columnas, 'archivos'),
+    'procesar_comercios': (etapa_comercios, 'filas'),
+    'procesar_cervezas': (etapa_cervezas, 'filas'),
+    'buscar_precios_cervezas': (etapa_precios_cervezas, 'filas'),
+    'procesar_archivos_2025': (etapa_producto_anual, 'filas'),
+}
+
+def rss_pico_mb():
+    """Pico de RSS del proceso y de sus hijos ya terminados (ru_maxrss es KB en Linux y bytes en Mac)"""
+    pico = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return pico / (1024**2 if sys.platform == 'darwin' else 1024)
+
+def correr_en_proceso(nombre, carpeta, resumen, workers, cola):
+    os.chdir(carpeta)
+    with open(f'{nombre}.log', 'w') as log:
+        sys.stdout = sys.stderr = log
+        try:
+            inicio = time.perf_counter()
+            funcion, unidad = ETAPAS[nombre]
+            filas = funcion(carpeta, resumen, workers)
+            cola.put({'segundos': time.perf_counter() - inicio, 'filas': filas, 'unidad': unidad,
+                      'rss_mb': rss_pico_mb()})
+        except Exception:
+            traceback.print_exc()
+            cola.put({'error': traceback.format_exc().strip().splitlines()[-1]})
+
+def medir_etapa(nombre, carpeta, resumen, workers=1):
+    contexto = mp.get_context('fork')
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=correr_en_proceso, args=(nombre, carpeta, resumen, workers, cola))
+    proceso.start()
+    resultado = cola.get()
+    proceso.join()
+    if 'error' not in resultado:
+        resultado['filas_por_s'] = resultado['filas'] / resultado['segundos'] if resultado['segundos'] else 0
+    return resultado
+
+def comparar(actual, base, tolerancia=TOLERANCIA):
+    """Lista de regresiones (texto) de una etapa respecto de la línea base"""
+    if not base or 'error' in actual or 'error' in base:
+        return []
+    regresiones = []
+    if (actual['segundos'] > base['segundos'] * (1 + tolerancia)
+            and actual['segundos'] - base['segundos'] > SEGUNDOS_MINIMOS):
+        regresiones.append(f"tiempo {base['segundos']:.2f} s -> {actual['segundos']:.2f} s")
+    if actual['rss_mb'] > base['rss_mb'] * (1 + tolerancia):
+        regresiones.append(f"memoria {base['rss_mb']:.0f} MB -> {actual['rss_mb']:.0f} MB")
+    return regresiones
+
+def correr_benchmark(escalas, ruta_base=BASE_POR_DEFECTO, etapas=None, workers=1, guardar=False,
+                     tolerancia=TOLERANCIA, carpeta=None, conservar=False):
+    """
+    Genera los datos de cada escala, mide las etapas y las compara contra la línea base.
+    Si la línea base no existe, o con guardar=True, se guardan los resultados como
+    nueva línea base. Devuelve la lista de regresiones encontradas (las etapas que
+    fallan también cuentan; ojo que cada etapa necesita lo que dejan las anteriores).
+    """
+    etapas = etapas or list(ETAPAS)
+    base = {}
+    if os.path.exists(ruta_base):
+        with open(ruta_base) as f:
+            base = json.load(f)
+
+    raiz = carpeta or tempfile.mkdtemp(prefix='benchmark_sepa_')
+    resultados = {}
+    regresiones = []
+    for escala in escalas:
+        destino = os.path.join(raiz, escala)
+        if os.path.exists(destino):
+            shutil.rmtree(destino)
+        inicio = time.perf_counter()
+        resumen = generar_sepa(destino, escala)
+        print(f"\n== {escala}: {resumen['filas_precios']} filas de precios, {resumen['filas_productos']} de productos "
+              f"(generado en {time.perf_counter() - inicio:.1f} s)")
+        print(f"{'etapa':<26}{'segundos':>10}{'por segundo':>24}{'RSS MB':>9}")
+
+        resultados[escala] = {}
+        for nombre in etapas:
+            resultado = medir_etapa(nombre, os.path.abspath(destino), resumen, workers)
+            resultados[escala][nombre] = resultado
+            if 'error' in resultado:
+                print(f"{nombre:<26}  ERROR: {resultado['error']} (ver {destino}/{nombre}.log)")
+                regresiones.append(f"{escala}/{nombre}: {resultado['error']}")
+                continue
+            problemas = comparar(resultado, base.get('resultados', {}).get(escala, {}).get(nombre), tolerancia)
+            marca = '  << REGRESIÓN: ' + ', '.join(problemas) if problemas else ''
+            velocidad = f"{resultado['filas_por_s']:,.0f} {resultado['unidad']}"
+            print(f"{nombre:<26}{resultado['segundos']:>10.2f}{velocidad:>24}"
+                  f"{resultado['rss_mb']:>9.0f}{marca}")
+            regresiones.extend(f"{escala}/{nombre}: {problema}" for problema in problemas)
+
+    if not conservar and carpeta is None:
+        shutil.rmtree(raiz)
+
+    if guardar or not base:
+        base.setdefault('resultados', {}).update(resultados)
+        base['maquina'] = {'sistema': platform.platform(), 'python': platform.python_version(),
+                           'cpus': os.cpu_count(), 'workers': workers}
+        with open(ruta_base, 'w') as f:
+            json.dump(base, f, indent=1)
+        print(f"\nLínea base guardada en {ruta_base}")
+    return regresiones
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de los scripts sobre datos SEPA sintéticos")
+    parser.add_argument('escalas', nargs='*', default=['chico', 'mediano'],
+                        help=f"Tamaños a medir ({', '.join(ESCALAS)})")
+    parser.add_argument('--base', default=BASE_POR_DEFECTO, help="JSON con la línea base")
+    parser.add_argument('--guardar', action='store_true', help="Guardar los resultados como nueva línea base")
+    parser.add_argument('--etapas', default=None, help=f"Etapas separadas por comas ({', '.join(ETAPAS)})")
+    parser.add_argument('--workers', type=int, default=1, help="Workers de las etapas que los aceptan")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA, help="Empeoramiento tolerado (0.2 = 20%%)")
+    parser.add_argument('--carpeta', default=None, help="Dónde generar los datos (por defecto un temporal que se borra)")
+    parser.add_argument('--conservar', action='store_true', help="No borrar los datos generados")
+    args = parser.parse_args()
+
+    etapas = args.etapas.split(',') if args.etapas else None
+    desconocidas = set(etapas or []) - set(ETAPAS) | set(args.escalas) - set(ESCALAS)
+    if desconocidas:
+        print(f"Etapas o escalas desconocidas: {', '.join(sorted(desconocidas))}")
+        sys.exit(1)
+
+    regresiones = correr_benchmark(args.escalas, args.base, etapas, args.workers, args.guardar,
+                                   args.tolerancia, args.carpeta, args.conservar)
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones o errores:")
+        for regresion in regresiones:
+            print(f"  {regresion}")
+        sys.exit(1)
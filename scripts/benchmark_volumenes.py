@@ -0,0 +1,67 @@
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+from volumenes import parsear_volumenes
+
+# Compara el parseo de volúmenes del notebook de ETL (str.extract + apply de
+# convertir_a_ml fila por fila) contra parsear_volumenes, sobre un catálogo sintético.
+# Los casos con resultado conocido están en tests/test_volumenes.py.
+
+def convertir_a_ml(valor):
+    """Versión del notebook, fila por fila, para comparar"""
+    if pd.isna(valor):
+        return None
+    valor = valor.replace(',', '.').replace(' ', '')
+    try:
+        if valor.endswith(('ml', 'c', 'cm3', 'cmq', 'cc')):
+            return float(re.sub(r'[^\d\.]', '', valor))
+        elif valor.endswith(('cl',)):
+            return float(valor.replace('cl', '')) * 10
+        elif valor.endswith(('lt', 'l')):
+            return float(re.sub(r'[^\d\.]', '', valor)) * 1000
+        else:
+            return None
+    except:
+        return None
+
+def parsear_notebook(nombres):
+    name_clean = nombres.str.lower().str.replace(r'[^\w\s]', ' ', regex=True)
+    patron_mejorado = r'(\d+(\.\d+)?\s?(ml|l|lt|cc|cl|cm3|cmq|c)\b)'
+    volume_raw = name_clean.str.extract(patron_mejorado, expand=False)[0].str.strip()
+    return volume_raw.apply(convertir_a_ml)
+
+def generar_catalogo(filas, distintos=50_000, semilla=0):
+    """Descripciones sintéticas; como en los datos reales, muchas se repiten"""
+    rng = np.random.default_rng(semilla)
+    marcas = np.array(['QUILMES', 'Patagonia', 'Stella Artois', 'Heineken', 'Brahma', 'Andes', 'Salta', 'Corona'])
+    estilos = np.array(['Rubia', 'Negra', 'IPA', 'Roja', 'Lager', 'Stout', 'Golden'])
+    envases = np.array(['lata', 'botella', 'porron', 'BOT', 'Pack X6', 'x 12 un'])
+    volumenes = np.array(['473 cc', '473ml', '1 lt', '1l', '355 cc', '6x355', '710 CC', '0,33 lt', '50 cl',
+                          '2838 cm3', '975cc', '473 cmq', ''])
+    n = distintos
+    distintas = pd.Series(['CERVEZA'] * n) + ' ' + rng.choice(marcas, n) + ' ' + rng.choice(estilos, n) + ' ' \
+        + rng.choice(envases, n) + ' ' + rng.choice(volumenes, n) + ' #' + pd.Series(np.arange(n).astype(str))
+    return distintas.iloc[rng.integers(0, n, filas)].reset_index(drop=True)
+
+if __name__ == "__main__":
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    nombres = generar_catalogo(filas)
+    print(f"Catálogo sintético: {filas} descripciones, {nombres.nunique()} distintas")
+
+    inicio = time.perf_counter()
+    nuevo = parsear_volumenes(nombres)
+    t_nuevo = time.perf_counter() - inicio
+    print(f"parsear_volumenes (por columnas, una vez por nombre): {t_nuevo:.2f} s")
+
+    inicio = time.perf_counter()
+    viejo = parsear_notebook(nombres)
+    t_viejo = time.perf_counter() - inicio
+    print(f"extract + apply (notebook):                            {t_viejo:.2f} s")
+
+    distintos = ~np.isclose(nuevo['volume_ml'], viejo.astype(float), equal_nan=True)
+    print(f"Aceleración: {t_viejo / t_nuevo:.0f}x. "
+          f"{distintos.sum()} descripciones con volumen distinto al del notebook, por ejemplo:")
+    ejemplos = pd.DataFrame({'name': nombres, 'notebook': viejo, 'nuevo': nuevo['volume_ml']})[distintos]
+    print(ejemplos.drop_duplicates('nuevo').head(5).to_string(index=False))
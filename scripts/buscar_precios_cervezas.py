@@ -1,121 +1,219 @@
 import pandas as pd
-import glob
+import argparse
 from pathlib import Path
+from almacen_precios import leer_precios, ruta_almacen_por_defecto, almacen_al_dia
+from reconciliar_precios import POLITICAS_POR_DEFECTO, reconciliar_largo, reconciliar_ancho, a_ancho
+from functools import partial
+from dimension_comercios import cargar_comercios
+from archivos_datos import archivos_de_carpeta
+from instrumentacion import activar, etapa, imprimir_resumen, perfilar
+from tqdm import tqdm
+from formato_largo import ancho_a_largo, reconciliar_a_largo, escribir_largo, EscritorLargo
+from lectura_precios import (FILAS_POR_BLOQUE, WORKERS_POR_DEFECTO, BYTES_PRECARGA, ARCHIVOS_PRECARGA,
+                             escanear_archivo, procesar_en_paralelo)
+
+def armar_filas(df_filtrado, nombres_comercio):
+    """
+    Arma las filas de resultado de un archivo en bloque: el nombre del comercio sale
+    de un map contra la tabla de comercios y los precios se renombran todos juntos
+    (precio_YYYYMMDD -> YYYYMMDD).
+    """
+    filas = pd.DataFrame({
+        'id_comercio': df_filtrado['id_comercio'],
+        'id_bandera': df_filtrado['id_bandera'],
+        'id_sucursal': df_filtrado['id_sucursal'],
+        'nombre_comercio': df_filtrado['id_comercio'].map(nombres_comercio).fillna('Desconocido'),
+        'provincia': df_filtrado['sucursales_provincia'] if 'sucursales_provincia' in df_filtrado.columns else 'Desconocida',
+        'id_producto': df_filtrado['id_producto'],
+    })
+    columnas_precios = [col for col in df_filtrado.columns if col.startswith('precio_')]
+    precios = df_filtrado[columnas_precios].rename(columns=lambda col: col.replace('precio_', ''))
+    return pd.concat([filas, precios], axis=1)
+
+def destino_largo(año):
+    return f'precios_cervezas_{año}_largo.parquet'
+
+def guardar_largo(df_largo, año, politicas):
+    """Reconcilia y guarda el resultado en formato largo (ver formato_largo.py)"""
+    with etapa('agregar', filas_entrada=len(df_largo)) as e:
+        df_final = reconciliar_a_largo(df_largo, politicas)
+        e.filas_salida = len(df_final)
+    destino = destino_largo(año)
+    with etapa('escribir', destino=destino, filas_entrada=len(df_final)):
+        escribir_largo(df_final, destino)
+    print(f"\nSe guardaron los resultados en {destino}")
+    print(f"Dimensiones del archivo final: {df_final.shape}")
+
+def buscar_precios_cervezas_almacen(almacen, ids_cervezas, df_comercios, año='2025',
+                                    politicas=POLITICAS_POR_DEFECTO, largo=False):
+    """
+    Igual que buscar_precios_cervezas pero leyendo del almacén parquet:
+    solo se leen las columnas necesarias y los row groups de los productos pedidos.
+    """
+    columnas_agrupacion = ['id_comercio', 'id_bandera', 'id_sucursal', 'nombre_comercio', 'provincia', 'id_producto']
+    df = leer_precios(almacen, ids_cervezas['id_producto'].astype(str).unique(), año,
+                      columnas=['id_comercio', 'id_bandera', 'id_sucursal', 'provincia', 'id_producto', 'fecha', 'precio'])
+    print(f"Precios encontrados para cervezas en el almacén: {len(df)}")
+    if df.empty:
+        print("\nNo se encontraron resultados para guardar.")
+        return
+
+    nombres = df_comercios.drop_duplicates('id_comercio').set_index('id_comercio')['comercio_bandera_nombre']
+    df['nombre_comercio'] = df['id_comercio'].map(nombres).fillna('Desconocido')
+    df['provincia'] = df['provincia'].astype(str)
+    if largo:
+        return guardar_largo(df, año, politicas)
+    df['fecha'] = df['fecha'].astype(str)
+
+    # Reconciliar precios del mismo día y pasar las fechas a columnas
+    df_agrupado = a_ancho(reconciliar_largo(df, columnas_agrupacion, politicas), columnas_agrupacion, politicas)
+
+    df_agrupado.to_csv(f'precios_cervezas_{año}.csv', index=False)
+    print(f"\nSe guardaron los resultados en precios_cervezas_{año}.csv")
+    print(f"Dimensiones del archivo final: {df_agrupado.shape}")
+
+def buscar_precios_cervezas(carpeta_base, ids_cervezas, df_comercios, año = '2025', almacen=None,
+                            politicas=POLITICAS_POR_DEFECTO, filas_por_bloque=FILAS_POR_BLOQUE,
+                            workers=1, memoria_max=None, precarga_bytes=BYTES_PRECARGA,
+                            precarga_archivos=ARCHIVOS_PRECARGA, largo=False):
+    """
+    Busca los precios de las cervezas en los CSV del año y guarda una fila por sucursal
+    y producto con una columna numérica por fecha. Los precios distintos del mismo día
+    se reconcilian según las políticas (ver reconciliar_precios.py).
+    Cada CSV se lee de a filas_por_bloque filas, así que la memoria no depende del tamaño del archivo.
+    Con workers > 1 los archivos se leen en un pool de procesos (con memoria_max bytes
+    como tope por worker) y los resultados se juntan en el orden de los archivos.
+    Con un solo worker, mientras se parsea un archivo se leen por adelantado los siguientes
+    (hasta precarga_archivos archivos y precarga_bytes bytes).
+    Con largo=True guarda una fila por sucursal, producto y fecha en un parquet: cada
+    archivo se pasa a largo apenas se procesa y se le entrega a EscritorLargo, sin armar
+    la tabla del año.
+    """
+    # Si hay un almacén parquet armado y al día con los archivos, lo usamos en lugar de releer los CSV
+    almacen = almacen or ruta_almacen_por_defecto(carpeta_base)
+    if almacen_al_dia(carpeta_base, almacen, año):
+        return buscar_precios_cervezas_almacen(almacen, ids_cervezas, df_comercios, año, politicas, largo)
 
-def combinar_precios(precios):
-    """Combina precios diferentes para el mismo día usando guión"""
-    precios = [p for p in precios if pd.notna(p)]  # Eliminar NaN
-    if not precios:
-        return None
-    precios = list(set(precios))  # Eliminar duplicados
-    if len(precios) == 1:
-        return precios[0]
-    return '-'.join(sorted(map(str, precios)))
-
-def buscar_precios_cervezas(carpeta_base, ids_cervezas, df_comercios, año = '2025'):
     resultados = []
 
-    # Recorrer todos los archivos CSV en la carpeta 2025
-    patron_busqueda = str(Path(carpeta_base) / año / '*.csv')
-    archivos = glob.glob(patron_busqueda)
+    # Recorrer todos los archivos de la carpeta del año (CSV, o parquet si se descomprimieron así)
+    archivos = archivos_de_carpeta(str(Path(carpeta_base) / año))
 
     # Filtrar archivos mayoristas
     archivos = [archivo for archivo in archivos if 'mayorista' not in archivo.lower()]
     
-    print(f"Encontrados {len(archivos)} archivos CSV de precios para procesar (excluyendo mayoristas)")
+    print(f"Encontrados {len(archivos)} archivos de precios para procesar (excluyendo mayoristas)")
     if len(archivos) == 0:
         print("No se encontraron archivos para procesar")
         return
 
-    # Procesar todos los archivos
-    for i, archivo in enumerate(archivos, 1):
-        print(f"\nProcesando archivo {i}/{len(archivos)}: {archivo}")
+    # Una sola vez: ids como strings y el nombre de cada comercio (el primero que aparece)
+    ids_buscados = set(ids_cervezas['id_producto'].astype(str))
+    nombres_comercio = df_comercios.drop_duplicates('id_comercio').set_index('id_comercio')['comercio_bandera_nombre']
+
+    # Procesar todos los archivos: cada uno se lee por bloques y vuelve solo con las filas de las cervezas
+    escanear = partial(escanear_archivo, ids_productos=ids_buscados, filas_por_bloque=filas_por_bloque)
+    # Las filas leídas y encontradas de cada archivo quedan en las mediciones (ver instrumentacion.py)
+    escaneos = procesar_en_paralelo(escanear, archivos, workers, memoria_max, precarga_bytes, precarga_archivos)
+    escritor = EscritorLargo(destino_largo(año), politicas) if largo else None
+    for archivo, escaneo, error in tqdm(escaneos, total=len(archivos), desc="Procesando archivos"):
+        if error:
+            print(f"\nError al procesar {archivo}: {error}")
+            continue
         
         try:
-            # Leer el archivo CSV
-            df = pd.read_csv(archivo, dtype={'id_producto': str}, low_memory=False)
-            print(f"Total de filas en el archivo: {len(df)}")
-
-            # Asegurarnos que ambos sean strings
-            df['id_producto'] = df['id_producto'].astype(str)
-            ids_cervezas['id_producto'] = ids_cervezas['id_producto'].astype(str)
-
-            # Filtrar solo los productos que están en ids_cervezas
-            df_filtrado = df[df['id_producto'].isin(ids_cervezas['id_producto'])]
-            print(f"Filas encontradas con cervezas: {len(df_filtrado)}")
+            df_filtrado, total_filas = escaneo
+            if df_filtrado is None:
+                print(f"\nArchivo {archivo} no tiene la columna id_producto, saltando...")
+                continue
 
             if not df_filtrado.empty:
-                # Agregar información de comercio y provincia
-                for _, row in df_filtrado.iterrows():
-                    id_comercio = row['id_comercio']
-                    
-                    # Buscar nombre del comercio en df_comercios
-                    nombre_comercio = 'Desconocido'
-                    try:
-                        nombre_comercio = df_comercios[df_comercios['id_comercio'] == id_comercio]['comercio_bandera_nombre'].iloc[0]
-                    except:
-                        pass
-
-                    # Crear un diccionario con los datos
-                    fila = {
-                        'id_comercio': id_comercio,
-                        'id_bandera': row['id_bandera'],
-                        'id_sucursal': row['id_sucursal'],
-                        'nombre_comercio': nombre_comercio,
-                        'provincia': row['sucursales_provincia'] if 'sucursales_provincia' in df.columns else 'Desconocida',
-                        'id_producto': row['id_producto'],
-                    }
-
-                    # Agregar precios
-                    columnas_precios = [col for col in df.columns if col.startswith('precio_')]
-                    for col in columnas_precios:
-                        fecha = col.replace('precio_', '')
-                        fila[fecha] = row[col]
-
-                    resultados.append(fila)
-
-                    print(f"\nArchivo {archivo} procesado correctamente")
+                with etapa('unir', archivo, filas_entrada=len(df_filtrado)) as e:
+                    filas = armar_filas(df_filtrado, nombres_comercio)
+                    if largo:
+                        filas = ancho_a_largo(filas)
+                        escritor.agregar(filas)
+                    else:
+                        resultados.append(filas)
+                    e.filas_salida = len(filas)
 
         except Exception as e:
-            print(f"Error al procesar {archivo}: {str(e)}")
+            print(f"\nError al procesar {archivo}: {str(e)}")
             continue
 
+    if largo:
+        if escritor.filas_entrada == 0:
+            escritor.descartar()
+            print("\nNo se encontraron resultados para guardar.")
+            return
+        print(f"\nResultados totales obtenidos: {escritor.filas_entrada} precios")
+        with etapa('agregar', destino=escritor.destino, filas_entrada=escritor.filas_entrada) as e:
+            e.filas_salida = escritor.cerrar()
+        print(f"\nSe guardaron los resultados en {escritor.destino}")
+        print(f"Filas del archivo final: {escritor.filas_salida}")
+        return
+
     # Crear un DataFrame con los resultados
     if resultados:
-        df_resultados = pd.DataFrame(resultados)
+        df_resultados = pd.concat(resultados, ignore_index=True)
         print(f"\nResultados totales obtenidos: {len(df_resultados)} filas")
 
-        # Agrupar precios combinando duplicados
+        # Reconciliar precios duplicados (quedan ordenadas las columnas de fecha)
         columnas_agrupacion = ['id_comercio', 'id_bandera', 'id_sucursal', 'nombre_comercio', 'provincia', 'id_producto']
-        columnas_precio = [col for col in df_resultados.columns if col not in columnas_agrupacion]
-
-        df_agrupado = df_resultados.groupby(columnas_agrupacion).agg(
-            {col: combinar_precios for col in columnas_precio}
-        ).reset_index()
-
-        # Ordenar columnas de fecha
-        columnas_fecha = sorted([col for col in df_agrupado.columns if col not in columnas_agrupacion])
-        df_agrupado = df_agrupado[columnas_agrupacion + columnas_fecha]
+        with etapa('agregar', filas_entrada=len(df_resultados)) as e:
+            df_agrupado = reconciliar_ancho(df_resultados, columnas_agrupacion, politicas)
+            e.filas_salida = len(df_agrupado)
 
         # Guardar el resultado en un nuevo archivo CSV
-        df_agrupado.to_csv(f'precios_cervezas_{año}.csv', index=False)
+        with etapa('escribir', destino=f'precios_cervezas_{año}.csv', filas_entrada=len(df_agrupado)):
+            df_agrupado.to_csv(f'precios_cervezas_{año}.csv', index=False)
         print(f"\nSe guardaron los resultados en precios_cervezas_{año}.csv")
         print(f"Dimensiones del archivo final: {df_agrupado.shape}")
     else:
         print("\nNo se encontraron resultados para guardar.")
 
 if __name__ == "__main__":
-    carpeta_base = "/Users/anoguera/Documents/GitHub/precios_claros/data"
-    año = '2025'
+    parser = argparse.ArgumentParser(description="Busca los precios de las cervezas en los CSV de precios del año")
+    parser.add_argument('--carpeta-base', default="/Users/anoguera/Documents/GitHub/precios_claros/data",
+                        help="Carpeta data con los CSV anuales")
+    parser.add_argument('--año', default='2025', help="Año a procesar")
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE,
+                        help="Filas que se leen por vez de cada CSV (define el pico de memoria)")
+    parser.add_argument('--workers', type=int, default=WORKERS_POR_DEFECTO,
+                        help=f"Procesos que leen archivos en paralelo (por defecto {WORKERS_POR_DEFECTO})")
+    parser.add_argument('--memoria-por-worker', type=float, default=None,
+                        help="Tope de memoria virtual (RLIMIT_AS) de cada worker en GB, no de memoria residente; "
+                             "en macOS y Windows no se aplica (sin tope si no se indica)")
+    parser.add_argument('--precarga-mb', type=int, default=BYTES_PRECARGA // 1024**2,
+                        help="Con un solo worker, MB que se leen por adelantado de los archivos siguientes (0 = sin precarga)")
+    parser.add_argument('--precarga-archivos', type=int, default=ARCHIVOS_PRECARGA,
+                        help="Con un solo worker, cuántos archivos pueden quedar leídos por adelantado")
+    parser.add_argument('--largo', action='store_true',
+                        help="Guardar una fila por sucursal, producto y fecha (parquet) en lugar de una columna por fecha")
+    parser.add_argument('--metricas', default=None,
+                        help="Guardar tiempos, filas, bytes y memoria por etapa y archivo en este JSONL y mostrar un resumen")
+    parser.add_argument('--perfil', default=None,
+                        help="Guardar un perfil de cProfile en este archivo (solo ve el proceso principal)")
+    args = parser.parse_args()
+    if args.metricas:
+        activar(args.metricas)
+    carpeta_base = args.carpeta_base
+    año = args.año
     
     # Leer ids_cervezas_unicos.csv
     print("Leyendo archivo ids_cervezas_unicos.csv...")
     ids_cervezas = pd.read_csv('ids_cervezas_unicos.csv', sep='|')
     print(f"Cervezas únicas encontradas: {len(ids_cervezas)}")
 
-    # Leer ids_comercios.csv
-    print("\nLeyendo archivo ids_comercios.csv...")
-    df_comercios = pd.read_csv('ids_comercios.csv', sep='|')
+    # Leer la tabla de comercios
+    print("\nLeyendo la dimensión de comercios...")
+    df_comercios = cargar_comercios()
     print(f"Comercios encontrados: {len(df_comercios)}\n")
 
-    buscar_precios_cervezas(carpeta_base, ids_cervezas, df_comercios, año)
\ No newline at end of file
+    memoria_max = int(args.memoria_por_worker * 1024**3) if args.memoria_por_worker else None
+    with perfilar(args.perfil):
+        buscar_precios_cervezas(carpeta_base, ids_cervezas, df_comercios, año, filas_por_bloque=args.filas_por_bloque,
+                                workers=args.workers, memoria_max=memoria_max,
+                                precarga_bytes=args.precarga_mb * 1024**2, precarga_archivos=args.precarga_archivos,
+                                largo=args.largo)
+    imprimir_resumen(args.metricas)
\ No newline at end of file
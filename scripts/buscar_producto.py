@@ -1,6 +1,7 @@
 import pandas as pd
 import sys
 from pathlib import Path
+from dimension_comercios import cargar_comercios
 
 def buscar_producto(archivo_csv, id_producto, df_comercios):
     try:
@@ -11,33 +12,22 @@ def buscar_producto(archivo_csv, id_producto, df_comercios):
         resultado = df[df['id_producto'] == int(id_producto)]
         
         if len(resultado) > 0:
-            # Obtenemos todas las columnas que son precios
+            # Nombre de cada comercio con un map contra la tabla de comercios
+            if df_comercios.empty:
+                nombre_comercio = 'Desconocido'
+            else:
+                nombres = df_comercios.drop_duplicates('id_comercio').set_index('id_comercio')['comercio_bandera_nombre']
+                nombre_comercio = resultado['id_comercio'].map(nombres).fillna('Desconocido')
+
+            # Armamos las columnas base y los precios en bloque (precio_YYYYMMDD -> YYYYMMDD)
+            filas = pd.DataFrame({
+                'id_comercio': resultado['id_comercio'],
+                'nombre_comercio': nombre_comercio,
+                'provincia': resultado['sucursales_provincia']
+            })
             columnas_precios = [col for col in df.columns if col.startswith('precio_')]
-            
-            # Creamos un nuevo dataframe para el resultado
-            filas = []
-            
-            # Para cada fila encontrada
-            for _, row in resultado.iterrows():
-                id_comercio = row['id_comercio']
-                # Buscamos el nombre del comercio
-                nombre_comercio = df_comercios[df_comercios['id_comercio'] == id_comercio]['comercio_bandera_nombre'].iloc[0] if not df_comercios.empty else 'Desconocido'
-                
-                # Creamos un diccionario con los datos base
-                fila = {
-                    'id_comercio': id_comercio,
-                    'nombre_comercio': nombre_comercio,
-                    'provincia': row['sucursales_provincia']
-                }
-                
-                # Agregamos los precios
-                for col in columnas_precios:
-                    fecha = col.replace('precio_', '')
-                    fila[fecha] = row[col]
-                
-                filas.append(fila)
-            
-            return pd.DataFrame(filas)
+            precios = resultado[columnas_precios].rename(columns=lambda col: col.replace('precio_', ''))
+            return pd.concat([filas, precios], axis=1).reset_index(drop=True)
         return pd.DataFrame()
     except Exception as e:
         print(f"Error al procesar {archivo_csv}: {str(e)}")
@@ -53,9 +43,9 @@ if __name__ == "__main__":
     
     # Leemos el archivo de comercios
     try:
-        df_comercios = pd.read_csv('ids_comercios.csv', sep='|')
+        df_comercios = cargar_comercios()
     except Exception as e:
-        print(f"Error al leer ids_comercios.csv: {str(e)}")
+        print(f"Error al leer la tabla de comercios: {str(e)}")
         df_comercios = pd.DataFrame()
     
     # Buscamos el producto
@@ -1,138 +1,265 @@
 import pandas as pd
 import sys
+import argparse
 from pathlib import Path
-import glob
-
-def combinar_precios(precios):
-    """Combina precios diferentes para el mismo día usando guión"""
-    precios = [p for p in precios if pd.notna(p)]  # Eliminar NaN
-    if not precios:
-        return None
-    precios = list(set(precios))  # Eliminar duplicados
-    if len(precios) == 1:
-        return precios[0]
-    return '-'.join(sorted(map(str, precios)))
-
-def buscar_producto_en_archivo(archivo_csv, id_producto, df_comercios):
+import os
+from almacen_precios import leer_precios, ruta_almacen_por_defecto, almacen_al_dia
+from indice_productos import abrir_indice, leer_filas_indexadas, ruta_indice_por_defecto
+from reconciliar_precios import POLITICAS, POLITICAS_POR_DEFECTO, reconciliar_largo, reconciliar_ancho, a_ancho
+from functools import partial
+from dimension_comercios import cargar_comercios
+from archivos_datos import archivos_de_carpeta, separador_de_archivo
+from instrumentacion import activar, etapa, imprimir_resumen, perfilar
+from tqdm import tqdm
+from formato_largo import ancho_a_largo, reconciliar_a_largo, escribir_largo, EscritorLargo
+from lectura_precios import (FILAS_POR_BLOQUE, WORKERS_POR_DEFECTO, BYTES_PRECARGA, ARCHIVOS_PRECARGA,
+                             escanear_archivo, procesar_en_paralelo)
+
+def normalizar_ids(ids_productos):
+    """Acepta un id suelto o una lista de ids y devuelve un set de strings"""
+    if isinstance(ids_productos, (str, int)):
+        ids_productos = [ids_productos]
+    return {str(i) for i in ids_productos}
+
+def buscar_producto_en_archivo(archivo_csv, ids_productos, df_comercios, indice=None,
+                               filas_por_bloque=FILAS_POR_BLOQUE):
+    ids_productos = normalizar_ids(ids_productos)
     try:
-        print(f"Procesando {archivo_csv}...")
-        # Leemos el CSV con el tipo correcto para id_producto
-        df = pd.read_csv(archivo_csv, dtype={'id_producto': str}, low_memory=False)
+        # Con el índice leemos solo las filas de los productos; si el archivo no está
+        # indexado o cambió, lo recorremos por bloques filtrando cada uno
+        df = None
+        if indice is not None:
+            with etapa('leer_indice', archivo_csv) as e:
+                df = leer_filas_indexadas(indice, archivo_csv, ids_productos)
+                e.filas_salida = 0 if df is None else len(df)
+        if df is None:
+            df, _ = escanear_archivo(archivo_csv, ids_productos, filas_por_bloque)
         
         # Si no tiene la columna id_producto, saltamos el archivo
-        if 'id_producto' not in df.columns:
+        if df is None or 'id_producto' not in df.columns:
             print(f"Archivo {archivo_csv} no tiene la columna id_producto, saltando...")
             return pd.DataFrame()
         
-        # Filtramos por el ID específico del producto
-        resultado = df[df['id_producto'] == str(id_producto)]
+        # Filtramos todos los productos pedidos de una sola pasada
+        resultado = df[df['id_producto'].isin(ids_productos)]
         
         if len(resultado) > 0:
-            # Obtenemos todas las columnas que son precios
-            columnas_precios = [col for col in df.columns if col.startswith('precio_')]
-            
-            # Creamos un nuevo dataframe para el resultado
-            filas = []
-            
-            # Para cada fila encontrada
-            for _, row in resultado.iterrows():
-                id_comercio = row['id_comercio']
-                try:
-                    # Buscamos el nombre del comercio
-                    comercio_info = df_comercios[df_comercios['id_comercio'] == id_comercio].iloc[0]
-                    nombre_comercio = comercio_info['comercio_bandera_nombre']
-                except:
-                    nombre_comercio = f'Comercio_{id_comercio}'
-                
-                # Creamos un diccionario con los datos base
-                fila = {
-                    'id_comercio': id_comercio,
-                    'id_bandera': row['id_bandera'],
-                    'id_sucursal': row['id_sucursal'],
+            with etapa('unir', archivo_csv, filas_entrada=len(resultado), filas_salida=len(resultado)):
+                # Nombre de cada comercio con un map contra la tabla de comercios
+                if 'id_comercio' in df_comercios.columns:
+                    nombres = df_comercios.drop_duplicates('id_comercio').set_index('id_comercio')['comercio_bandera_nombre']
+                    nombre_comercio = resultado['id_comercio'].map(nombres)
+                else:
+                    nombre_comercio = pd.Series(None, index=resultado.index, dtype=object)
+                nombre_comercio = nombre_comercio.fillna('Comercio_' + resultado['id_comercio'].astype(str))
+
+                # Armamos las columnas base y los precios en bloque (precio_YYYYMMDD -> YYYYMMDD)
+                filas = pd.DataFrame({
+                    'id_comercio': resultado['id_comercio'],
+                    'id_bandera': resultado['id_bandera'],
+                    'id_sucursal': resultado['id_sucursal'],
                     'nombre_comercio': nombre_comercio,
-                    'provincia': row['sucursales_provincia']
-                }
-                
-                # Agregamos los precios
-                for col in columnas_precios:
-                    fecha = col.replace('precio_', '')
-                    fila[fecha] = row[col]
-                
-                filas.append(fila)
-            
-            return pd.DataFrame(filas)
+                    'provincia': resultado['sucursales_provincia'],
+                    'id_producto': resultado['id_producto'],
+                })
+                columnas_precios = [col for col in df.columns if col.startswith('precio_')]
+                precios = resultado[columnas_precios].rename(columns=lambda col: col.replace('precio_', ''))
+                return pd.concat([filas, precios], axis=1).reset_index(drop=True)
         return pd.DataFrame()
     except Exception as e:
         print(f"Error al procesar {archivo_csv}: {str(e)}")
         return pd.DataFrame()
 
-def ordenar_columnas_fecha(df):
-    """Ordena las columnas de fecha en formato YYYYMMDD"""
-    # Obtenemos columnas que no son fechas
-    columnas_base = ['id_comercio', 'id_bandera', 'id_sucursal', 'nombre_comercio', 'provincia']
-    columnas_fecha = [col for col in df.columns if col not in columnas_base]
-    
-    # Ordenamos las columnas de fecha
-    columnas_fecha_ordenadas = sorted(columnas_fecha)
-    
-    # Retornamos el dataframe con las columnas ordenadas
-    return df[columnas_base + columnas_fecha_ordenadas]
+def buscar_producto_con_indice(archivo_csv, ids_productos, df_comercios, ruta_indice=None,
+                               filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Igual que buscar_producto_en_archivo pero abriendo el índice por su ruta, para poder
+    correr en otro proceso (la conexión de SQLite no se puede pasar entre procesos)
+    """
+    if not ruta_indice or not os.path.exists(ruta_indice):
+        return buscar_producto_en_archivo(archivo_csv, ids_productos, df_comercios, None, filas_por_bloque)
+    indice = abrir_indice(ruta_indice)
+    try:
+        return buscar_producto_en_archivo(archivo_csv, ids_productos, df_comercios, indice, filas_por_bloque)
+    finally:
+        indice.close()
 
-def procesar_archivos_2025(carpeta_base, id_producto):
+def buscar_producto_en_almacen(almacen, ids_productos, df_comercios, año='2025', politicas=POLITICAS_POR_DEFECTO,
+                               largo=False):
+    """
+    Devuelve los precios de los productos ya agrupados, leyendo solo sus row groups del almacén.
+    Con largo=True queda una fila por sucursal, producto y fecha.
+    """
+    df = leer_precios(almacen, normalizar_ids(ids_productos), año,
+                      columnas=['id_comercio', 'id_bandera', 'id_sucursal', 'provincia', 'id_producto', 'fecha', 'precio'])
+    if df.empty:
+        return pd.DataFrame()
+
+    if df_comercios.empty:
+        df['nombre_comercio'] = 'Comercio_' + df['id_comercio'].astype(str)
+    else:
+        nombres = df_comercios.drop_duplicates('id_comercio').set_index('id_comercio')['comercio_bandera_nombre']
+        df['nombre_comercio'] = df['id_comercio'].map(nombres).fillna('Comercio_' + df['id_comercio'].astype(str))
+    df['provincia'] = df['provincia'].astype(str)
+    if largo:
+        return reconciliar_a_largo(df, politicas)
+    df['fecha'] = df['fecha'].astype(str)
+
+    columnas_agrupacion = ['id_comercio', 'id_bandera', 'id_sucursal', 'nombre_comercio', 'provincia', 'id_producto']
+    return a_ancho(reconciliar_largo(df, columnas_agrupacion, politicas), columnas_agrupacion, politicas)
+
+def procesar_archivos_2025(carpeta_base, ids_productos, almacen=None, ruta_indice=None,
+                           nombre_archivo='precios_vera_730_2025.csv', politicas=POLITICAS_POR_DEFECTO,
+                           filas_por_bloque=FILAS_POR_BLOQUE, workers=1, memoria_max=None,
+                           precarga_bytes=BYTES_PRECARGA, precarga_archivos=ARCHIVOS_PRECARGA, largo=False):
+    """
+    Busca uno o varios productos en todos los CSV de 2025 con una sola pasada por archivo.
+    El resultado tiene una fila por sucursal y producto, con id_producto como parte de la clave,
+    y los precios distintos del mismo día reconciliados según las políticas.
+    Con workers > 1 los archivos se procesan en un pool de procesos (con memoria_max bytes
+    como tope por worker) y los resultados se juntan en el orden de los archivos.
+    Con un solo worker, mientras se parsea un archivo se leen por adelantado los siguientes
+    (hasta precarga_archivos archivos y precarga_bytes bytes).
+    Con largo=True el resultado tiene una fila por sucursal, producto y fecha (parquet si
+    nombre_archivo termina en .parquet, si no CSV); cada archivo se pasa a largo apenas se
+    procesa y se le entrega a EscritorLargo, sin armar la tabla del año.
+    """
+    ids_productos = normalizar_ids(ids_productos)
+    if len(ids_productos) == 1:
+        descripcion = f"el producto {next(iter(ids_productos))}"
+    else:
+        descripcion = f"ninguno de los {len(ids_productos)} productos"
     # Leemos el archivo de comercios
     try:
-        df_comercios = pd.read_csv('ids_comercios.csv', sep='|')
+        df_comercios = cargar_comercios()
     except Exception as e:
-        print(f"Error al leer ids_comercios.csv: {str(e)}")
+        print(f"Error al leer la tabla de comercios: {str(e)}")
         df_comercios = pd.DataFrame()
+
+    # Si hay un almacén parquet armado y al día con los archivos, lo usamos en lugar de releer los CSV
+    almacen = almacen or ruta_almacen_por_defecto(carpeta_base)
+    if almacen_al_dia(carpeta_base, almacen, '2025'):
+        df_agrupado = buscar_producto_en_almacen(almacen, ids_productos, df_comercios, politicas=politicas, largo=largo)
+        if df_agrupado.empty:
+            print(f"No se encontró {descripcion} en el almacén")
+            return
+        if largo:
+            escribir_largo(df_agrupado, nombre_archivo)
+        else:
+            df_agrupado.to_csv(nombre_archivo, index=False)
+        print(f"\nSe guardaron los resultados en {nombre_archivo}")
+        print(f"Se encontraron {len(df_agrupado)} registros únicos")
+        return
     
+    # Si hay un índice de productos armado, lo usamos para ir directo a las filas
+    # (y no tiene sentido leer los archivos enteros por adelantado)
+    ruta_indice = ruta_indice or ruta_indice_por_defecto(carpeta_base)
+    if os.path.exists(ruta_indice):
+        precarga_bytes = 0
+
     # Lista para almacenar todos los resultados
     resultados = []
     
-    # Buscamos todos los archivos CSV en la carpeta 2025
-    patron_busqueda = str(Path(carpeta_base) / '2025' / '*.csv')
-    archivos = glob.glob(patron_busqueda)
+    # Buscamos todos los archivos de la carpeta 2025 (CSV, o parquet si se descomprimieron así)
+    archivos = archivos_de_carpeta(str(Path(carpeta_base) / '2025'))
     
     # Filtramos archivos mayoristas
     archivos = [archivo for archivo in archivos if 'mayorista' not in archivo.lower()]
     
-    # Procesamos cada archivo
-    for archivo in archivos:
-        df_resultado = buscar_producto_en_archivo(archivo, id_producto, df_comercios)
-        if not df_resultado.empty:
-            resultados.append(df_resultado)
+    # Procesamos cada archivo; cada worker devuelve solo las filas encontradas
+    buscar = partial(buscar_producto_con_indice, ids_productos=ids_productos, df_comercios=df_comercios,
+                     ruta_indice=ruta_indice, filas_por_bloque=filas_por_bloque)
+    escaneos = procesar_en_paralelo(buscar, archivos, workers, memoria_max, precarga_bytes, precarga_archivos)
+    escritor = EscritorLargo(nombre_archivo, politicas) if largo else None
+    for archivo, df_resultado, error in tqdm(escaneos, total=len(archivos), desc="Procesando archivos"):
+        if error:
+            print(f"\nError al procesar {archivo}: {error}")
+        elif not df_resultado.empty:
+            if largo:
+                escritor.agregar(ancho_a_largo(df_resultado))
+            else:
+                resultados.append(df_resultado)
     
+    if largo:
+        if escritor.filas_entrada == 0:
+            escritor.descartar()
+            print(f"No se encontró {descripcion} en ningún archivo")
+            return
+        with etapa('agregar', destino=nombre_archivo, filas_entrada=escritor.filas_entrada) as e:
+            e.filas_salida = escritor.cerrar()
+        print(f"\nSe guardaron los resultados en {nombre_archivo}")
+        print(f"Se encontraron {escritor.filas_salida} precios")
+        return
+
     if not resultados:
-        print(f"No se encontró el producto {id_producto} en ningún archivo")
+        print(f"No se encontró {descripcion} en ningún archivo")
         return
-    
+
     # Combinamos todos los resultados
     df_final = pd.concat(resultados, ignore_index=True)
     
-    # Agrupamos por comercio y provincia
-    columnas_agrupacion = ['id_comercio', 'id_bandera', 'id_sucursal', 'nombre_comercio', 'provincia']
-    columnas_precio = [col for col in df_final.columns if col not in columnas_agrupacion]
-    
-    # Agregamos los precios, combinando los duplicados
-    df_agrupado = df_final.groupby(columnas_agrupacion).agg(
-        {col: lambda x: combinar_precios(x) for col in columnas_precio}
-    ).reset_index()
-    
-    # Ordenamos las columnas de fecha
-    df_agrupado = ordenar_columnas_fecha(df_agrupado)
+    # Agrupamos por sucursal y producto, reconciliando los precios duplicados
+    # (quedan ordenadas las columnas de fecha)
+    columnas_agrupacion = ['id_comercio', 'id_bandera', 'id_sucursal', 'nombre_comercio', 'provincia', 'id_producto']
+    with etapa('agregar', filas_entrada=len(df_final)) as e:
+        df_agrupado = reconciliar_ancho(df_final, columnas_agrupacion, politicas)
+        e.filas_salida = len(df_agrupado)
     
     # Guardamos el resultado
-    nombre_archivo = 'precios_vera_730_2025.csv'
-    df_agrupado.to_csv(nombre_archivo, index=False)
+    with etapa('escribir', destino=nombre_archivo, filas_entrada=len(df_agrupado)):
+        df_agrupado.to_csv(nombre_archivo, index=False)
     print(f"\nSe guardaron los resultados en {nombre_archivo}")
     print(f"Se encontraron {len(df_agrupado)} registros únicos")
 
+def leer_ids_de_archivo(ruta):
+    """Lee ids de un archivo (por ejemplo ids_cervezas_unicos.csv): columna id_producto o la primera"""
+    df = pd.read_csv(ruta, sep=separador_de_archivo(ruta), dtype=str)
+    columna = 'id_producto' if 'id_producto' in df.columns else df.columns[0]
+    return df[columna].dropna().tolist()
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Uso: python buscar_producto_anual.py <id_producto>")
+    parser = argparse.ArgumentParser(description="Busca uno o varios productos en los CSV de precios de 2025")
+    parser.add_argument('ids', nargs='*', help="id_producto a buscar")
+    parser.add_argument('--archivo', help="Archivo con ids a buscar (columna id_producto o la primera)")
+    parser.add_argument('--salida', default='precios_vera_730_2025.csv',
+                        help="Archivo de salida (CSV, o parquet si termina en .parquet con --largo)")
+    parser.add_argument('--largo', action='store_true',
+                        help="Una fila por sucursal, producto y fecha en lugar de una columna por fecha")
+    parser.add_argument('--politicas', default=','.join(POLITICAS_POR_DEFECTO),
+                        help=f"Cómo reconciliar precios del mismo día, separadas por coma ({', '.join(POLITICAS)})")
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE,
+                        help="Filas que se leen por vez de cada CSV (define el pico de memoria)")
+    parser.add_argument('--workers', type=int, default=WORKERS_POR_DEFECTO,
+                        help=f"Procesos que leen archivos en paralelo (por defecto {WORKERS_POR_DEFECTO})")
+    parser.add_argument('--memoria-por-worker', type=float, default=None,
+                        help="Tope de memoria virtual (RLIMIT_AS) de cada worker en GB, no de memoria residente; "
+                             "en macOS y Windows no se aplica (sin tope si no se indica)")
+    parser.add_argument('--precarga-mb', type=int, default=BYTES_PRECARGA // 1024**2,
+                        help="Con un solo worker, MB que se leen por adelantado de los archivos siguientes (0 = sin precarga)")
+    parser.add_argument('--precarga-archivos', type=int, default=ARCHIVOS_PRECARGA,
+                        help="Con un solo worker, cuántos archivos pueden quedar leídos por adelantado")
+    parser.add_argument('--metricas', default=None,
+                        help="Guardar tiempos, filas, bytes y memoria por etapa y archivo en este JSONL y mostrar un resumen")
+    parser.add_argument('--perfil', default=None,
+                        help="Guardar un perfil de cProfile en este archivo (solo ve el proceso principal)")
+    args = parser.parse_args()
+    if args.metricas:
+        activar(args.metricas)
+
+    ids_productos = list(args.ids)
+    if args.archivo:
+        ids_productos += leer_ids_de_archivo(args.archivo)
+    if not ids_productos:
+        parser.print_usage()
         sys.exit(1)
-    
-    id_producto = sys.argv[1]
+
     carpeta_base = "/Volumes/SSD_Fermin/TP_ANALITICA/data"
     
-    procesar_archivos_2025(carpeta_base, id_producto) 
\ No newline at end of file
+    with perfilar(args.perfil):
+        procesar_archivos_2025(carpeta_base, ids_productos, nombre_archivo=args.salida,
+                               politicas=args.politicas.split(','), filas_por_bloque=args.filas_por_bloque,
+                               workers=args.workers,
+                               memoria_max=int(args.memoria_por_worker * 1024**3) if args.memoria_por_worker else None,
+                               precarga_bytes=args.precarga_mb * 1024**2, precarga_archivos=args.precarga_archivos,
+                               largo=args.largo)
+    imprimir_resumen(args.metricas)
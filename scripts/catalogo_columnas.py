@@ -0,0 +1,130 @@
+import os
+import sys
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+from archivos_datos import EXTENSIONES, archivos_de_carpeta, leer_encabezado
+
+# Catálogo de encabezados de los CSV: columnas y separador de cada archivo (de los
+# parquet se lee el esquema y el separador queda vacío).
+# Solo se lee la primera línea de cada CSV, en un pool de hilos (es casi todo espera
+# de disco), y cada archivo se vuelve a leer solo si cambió su tamaño o mtime.
+# Otros scripts pueden consultarlo, por ejemplo con archivos_con_columna.
+
+NOMBRE_CATALOGO = 'catalogo_columnas.sqlite'
+HILOS_POR_DEFECTO = 32
+
+def ruta_catalogo_por_defecto(carpeta):
+    return os.path.join(carpeta, NOMBRE_CATALOGO)
+
+def abrir_catalogo(ruta_catalogo):
+    conn = sqlite3.connect(ruta_catalogo)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS archivos (
+            ruta TEXT PRIMARY KEY,
+            tamano INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            separador TEXT NOT NULL,
+            columnas TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS columnas (
+            columna TEXT NOT NULL,
+            ruta TEXT NOT NULL,
+            posicion INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_columnas ON columnas (columna);
+        CREATE INDEX IF NOT EXISTS idx_columnas_ruta ON columnas (ruta);
+    """)
+    return conn
+
+def encontrar_csv(carpeta):
+    """CSV y parquet de la carpeta y sus subcarpetas (uno por nombre, ver archivos_datos.py)"""
+    archivos = []
+    for root, dirs, files in os.walk(carpeta):
+        # Las particiones clave=valor son de los almacenes parquet (almacen_precios, intervalos_precios)
+        dirs[:] = [d for d in dirs if '=' not in d]
+        if any(os.path.splitext(f)[1].lower() in EXTENSIONES for f in files):
+            archivos.extend(archivos_de_carpeta(root))
+    return sorted(archivos)
+
+def leer_con_firma(archivo):
+    stat = os.stat(archivo)
+    separador, columnas = leer_encabezado(archivo)
+    return archivo, stat.st_size, stat.st_mtime_ns, separador, columnas
+
+def actualizar_catalogo(carpeta, ruta_catalogo=None, hilos=HILOS_POR_DEFECTO):
+    """
+    Lee el encabezado de los CSV de la carpeta que sean nuevos o hayan cambiado y
+    borra del catálogo los que ya no existen. Devuelve la conexión al catálogo.
+    """
+    # Rutas absolutas, para que el catálogo no dependa de desde dónde se corre
+    carpeta = os.path.abspath(carpeta)
+    ruta_catalogo = ruta_catalogo or ruta_catalogo_por_defecto(carpeta)
+    conn = abrir_catalogo(ruta_catalogo)
+    archivos = encontrar_csv(carpeta)
+
+    firmas = {ruta: (tamano, mtime_ns) for ruta, tamano, mtime_ns
+              in conn.execute("SELECT ruta, tamano, mtime_ns FROM archivos")}
+    borrados = [ruta for ruta in set(firmas) - set(archivos) if ruta.startswith(carpeta + os.sep)]
+    with conn:
+        for ruta in borrados:
+            conn.execute("DELETE FROM columnas WHERE ruta = ?", (ruta,))
+            conn.execute("DELETE FROM archivos WHERE ruta = ?", (ruta,))
+
+    pendientes = []
+    for archivo in archivos:
+        stat = os.stat(archivo)
+        if firmas.get(archivo) != (stat.st_size, stat.st_mtime_ns):
+            pendientes.append(archivo)
+    print(f"{len(archivos)} archivos CSV o parquet, {len(pendientes)} para leer")
+
+    def leer(archivo):
+        try:
+            return leer_con_firma(archivo), None
+        except Exception as e:
+            return (archivo,), str(e)
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        for resultado, error in tqdm(pool.map(leer, pendientes), total=len(pendientes), desc="Leyendo encabezados"):
+            if error:
+                print(f"\nError leyendo {resultado[0]}: {error}")
+                continue
+            archivo, tamano, mtime_ns, separador, columnas = resultado
+            with conn:
+                conn.execute("DELETE FROM columnas WHERE ruta = ?", (archivo,))
+                conn.execute("INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?)",
+                             (archivo, tamano, mtime_ns, separador, json.dumps(columnas)))
+                conn.executemany("INSERT INTO columnas VALUES (?, ?, ?)",
+                                 ((col, archivo, i) for i, col in enumerate(columnas)))
+    return conn
+
+def columnas_de(conn, archivo):
+    """Columnas de un archivo según el catálogo (None si no está)"""
+    fila = conn.execute("SELECT columnas FROM archivos WHERE ruta = ?", (archivo,)).fetchone()
+    return json.loads(fila[0]) if fila else None
+
+def archivos_con_columna(conn, columna):
+    """Archivos que tienen la columna. Con un * al final busca por prefijo (por ejemplo 'precio_*')."""
+    if columna.endswith('*'):
+        prefijo = columna[:-1].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        consulta = "SELECT DISTINCT ruta FROM columnas WHERE columna LIKE ? ESCAPE '\\' ORDER BY ruta"
+        return [ruta for (ruta,) in conn.execute(consulta, (prefijo + '%',))]
+    return [ruta for (ruta,) in conn.execute(
+        "SELECT DISTINCT ruta FROM columnas WHERE columna = ? ORDER BY ruta", (columna,))]
+
+def todas_las_columnas(conn):
+    return {columna for (columna,) in conn.execute("SELECT DISTINCT columna FROM columnas")}
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Uso: python catalogo_columnas.py <carpeta_data> [columna]")
+        sys.exit(1)
+
+    conn = actualizar_catalogo(sys.argv[1])
+    if len(sys.argv) > 2:
+        archivos = archivos_con_columna(conn, sys.argv[2])
+        print(f"\n{len(archivos)} archivos tienen la columna {sys.argv[2]}:")
+        for archivo in archivos:
+            print(f"  {archivo}")
+    conn.close()
@@ -0,0 +1,190 @@
+import os
+import re
+import json
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tqdm import tqdm
+from lectura_precios import WORKERS_POR_DEFECTO, procesar_en_paralelo
+from volumenes import parsear_volumenes
+from archivos_datos import elegir_archivo, leer_tabla
+
+# Catálogo de productos armado con todos los productos.csv de las carpetas sepa-*
+# (los datos diarios descomprimidos). Cada productos.csv se lee una sola vez, en
+# paralelo, y se reduce a una fila por producto; el catálogo guarda una fila por
+# (comercio, producto) con la descripción más larga vista y la primera y última fecha
+# en que apareció. Los archivos ya leídos quedan registrados (tamaño y mtime), así que
+# volver a correrlo solo lee las carpetas nuevas.
+# Buscar una categoría ("cerveza" o cualquier lista de palabras) es una consulta
+# sobre el catálogo, sin volver a recorrer las carpetas.
+
+NOMBRE_CATALOGO = 'catalogo_productos.parquet'
+ARCHIVOS_POR_REDUCCION = 64  # Resultados por archivo acumulados antes de reducir
+
+ESQUEMA_CATALOGO = pa.schema([
+    ('id_comercio', pa.int32()),
+    ('id_producto', pa.string()),
+    ('productos_descripcion', pa.string()),
+    ('primera_vez', pa.int32()),  # YYYYMMDD
+    ('ultima_vez', pa.int32()),
+])
+CLAVES_CATALOGO = ['id_comercio', 'id_producto']
+
+# sepa-<id_comercio>_<YYYY-MM-DD>_... (el nombre de las carpetas de cada comercio)
+PATRON_CARPETA = re.compile(r'sepa-(\d+)_(\d{4})-(\d{2})-(\d{2})')
+
+def ruta_catalogo_por_defecto(carpeta):
+    return os.path.join(carpeta, NOMBRE_CATALOGO)
+
+def ruta_registro(ruta_catalogo):
+    return ruta_catalogo + '.leidos.json'
+
+def encontrar_productos(carpeta):
+    """productos.csv (o productos.parquet) de cada carpeta sepa-*"""
+    archivos = []
+    for root, _, files in os.walk(carpeta):
+        nombre = elegir_archivo(files, 'productos')
+        if nombre and 'sepa-' in root:
+            archivos.append(os.path.join(root, nombre))
+    return sorted(archivos)
+
+def comercio_y_fecha(archivo):
+    """
+    id_comercio y fecha (YYYYMMDD) según la carpeta del archivo. Si la carpeta no
+    tiene la fecha, se usa la fecha de modificación del archivo.
+    """
+    carpeta = os.path.dirname(archivo)
+    coincidencia = PATRON_CARPETA.search(carpeta)
+    if coincidencia:
+        anio, mes, dia = coincidencia.group(2, 3, 4)
+        return int(coincidencia.group(1)), int(anio + mes + dia)
+    id_comercio = int(carpeta.split('sepa-')[-1].split('_')[0])
+    return id_comercio, int(time.strftime('%Y%m%d', time.localtime(os.path.getmtime(archivo))))
+
+def reducir(df):
+    """Una fila por (comercio, producto): descripción más larga, primera y última fecha"""
+    fechas = df.groupby(CLAVES_CATALOGO, sort=False).agg(primera_vez=('primera_vez', 'min'),
+                                                          ultima_vez=('ultima_vez', 'max'))
+    largo = df['productos_descripcion'].fillna('').str.len()
+    descripciones = (df.assign(_largo=largo)
+                     .sort_values(CLAVES_CATALOGO + ['_largo'], ascending=[True, True, False], kind='stable')
+                     .drop_duplicates(CLAVES_CATALOGO)
+                     .set_index(CLAVES_CATALOGO)['productos_descripcion'])
+    return fechas.join(descripciones).reset_index()[ESQUEMA_CATALOGO.names]
+
+def leer_productos(archivo):
+    """Lee un productos.csv (o .parquet) y lo reduce a una fila por producto"""
+    id_comercio, fecha = comercio_y_fecha(archivo)
+    df = leer_tabla(archivo, columnas=['id_producto', 'productos_descripcion'], dtype=str)
+    df = df.dropna(subset=['id_producto'])
+    df['id_comercio'] = id_comercio
+    df['primera_vez'] = fecha
+    df['ultima_vez'] = fecha
+    return reducir(df)
+
+def leer_catalogo(ruta_catalogo, columnas=None):
+    return pd.read_parquet(ruta_catalogo, columns=columnas)
+
+def actualizar_catalogo_productos(carpeta, ruta_catalogo=None, workers=WORKERS_POR_DEFECTO):
+    """
+    Lee los productos.csv nuevos o cambiados de la carpeta y los suma al catálogo.
+    Los archivos con errores se informan al final y no se registran, así se
+    reintentan la próxima vez. Devuelve el catálogo como DataFrame.
+    """
+    carpeta = os.path.abspath(carpeta)
+    ruta_catalogo = ruta_catalogo or ruta_catalogo_por_defecto(carpeta)
+    registro = {}
+    if os.path.exists(ruta_registro(ruta_catalogo)):
+        with open(ruta_registro(ruta_catalogo)) as f:
+            registro = json.load(f)
+
+    archivos = encontrar_productos(carpeta)
+    firmas = {}
+    for archivo in archivos:
+        stat = os.stat(archivo)
+        firmas[archivo] = [stat.st_size, stat.st_mtime_ns]
+    pendientes = [archivo for archivo in archivos if registro.get(archivo) != firmas[archivo]]
+    print(f"{len(archivos)} archivos de productos, {len(pendientes)} para leer")
+
+    existe = os.path.exists(ruta_catalogo)
+    if not pendientes and existe:
+        return leer_catalogo(ruta_catalogo)
+
+    acumulado = [leer_catalogo(ruta_catalogo)] if existe else []
+    errores = []
+    for archivo, resultado, error in tqdm(procesar_en_paralelo(leer_productos, pendientes, workers),
+                                          total=len(pendientes), desc="Leyendo productos"):
+        if error:
+            errores.append((archivo, error))
+            continue
+        acumulado.append(resultado)
+        registro[archivo] = firmas[archivo]
+        if len(acumulado) > ARCHIVOS_POR_REDUCCION:
+            acumulado = [reducir(pd.concat(acumulado, ignore_index=True))]
+
+    if acumulado:
+        catalogo = reducir(pd.concat(acumulado, ignore_index=True))
+    else:
+        catalogo = pd.DataFrame(columns=ESQUEMA_CATALOGO.names)
+    catalogo = catalogo.sort_values(CLAVES_CATALOGO, kind='stable').reset_index(drop=True)
+
+    temporal = ruta_catalogo + '.tmp'
+    pq.write_table(pa.Table.from_pandas(catalogo, schema=ESQUEMA_CATALOGO, preserve_index=False),
+                   temporal, compression='zstd')
+    os.replace(temporal, ruta_catalogo)
+    with open(ruta_registro(ruta_catalogo) + '.tmp', 'w') as f:
+        json.dump(registro, f, indent=1)
+    os.replace(ruta_registro(ruta_catalogo) + '.tmp', ruta_registro(ruta_catalogo))
+
+    print(f"Catálogo con {catalogo['id_producto'].nunique()} productos en "
+          f"{catalogo['id_comercio'].nunique()} comercios guardado en {ruta_catalogo}")
+    if errores:
+        print(f"\n{len(errores)} archivos no se pudieron leer:")
+        for archivo, error in errores:
+            print(f"  {archivo}: {error}")
+    return catalogo
+
+def buscar_productos(catalogo, palabras):
+    """
+    Filas del catálogo cuya descripción contiene alguna de las palabras (sin
+    distinguir mayúsculas). La búsqueda se hace una vez por descripción distinta.
+    """
+    if isinstance(palabras, str):
+        palabras = [palabras]
+    patron = '|'.join(re.escape(palabra) for palabra in palabras)
+    descripciones = catalogo['productos_descripcion'].astype('category')
+    coinciden = np.asarray(descripciones.cat.categories.str.contains(patron, case=False, regex=True), dtype=bool)
+    # Las descripciones vacías tienen código -1: caen en el False agregado al final
+    mascara = np.append(coinciden, False)[descripciones.cat.codes.to_numpy()]
+    return catalogo[mascara].reset_index(drop=True)
+
+def productos_unicos(catalogo):
+    """
+    Una fila por producto con la descripción más larga entre todos los comercios,
+    y el volumen (ml) y las unidades del pack que dice la descripción.
+    """
+    largo = catalogo['productos_descripcion'].fillna('').str.len()
+    productos = (catalogo.assign(_largo=largo)
+                 .sort_values(['id_producto', '_largo'], ascending=[True, False], kind='stable')
+                 .drop_duplicates('id_producto')[['id_producto', 'productos_descripcion']]
+                 .reset_index(drop=True))
+    volumenes = parsear_volumenes(productos['productos_descripcion'])
+    return pd.concat([productos, volumenes[['volume_ml', 'pack']]], axis=1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arma el catálogo de productos de las carpetas sepa-*")
+    parser.add_argument('carpeta', help="Carpeta con los datos diarios descomprimidos")
+    parser.add_argument('palabras', nargs='*', help="Palabras a buscar en las descripciones")
+    parser.add_argument('--catalogo', default=None, help=f"Ruta del catálogo (por defecto <carpeta>/{NOMBRE_CATALOGO})")
+    parser.add_argument('--workers', type=int, default=WORKERS_POR_DEFECTO,
+                        help="Procesos leyendo archivos en paralelo")
+    args = parser.parse_args()
+
+    catalogo = actualizar_catalogo_productos(args.carpeta, args.catalogo, args.workers)
+    if args.palabras:
+        encontrados = productos_unicos(buscar_productos(catalogo, args.palabras))
+        print(f"\n{len(encontrados)} productos contienen {', '.join(args.palabras)}:")
+        print(encontrados.to_string(index=False))
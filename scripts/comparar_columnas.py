@@ -1,15 +1,6 @@
 import os
-import pandas as pd
 from collections import defaultdict
-from tqdm import tqdm
-
-def obtener_columnas(archivo):
-    try:
-        # Leer solo la primera fila para obtener las columnas
-        return set(pd.read_csv(archivo, nrows=0).columns)
-    except Exception as e:
-        print(f"\nError leyendo {archivo}: {str(e)}")
-        return set()
+from catalogo_columnas import HILOS_POR_DEFECTO, actualizar_catalogo, todas_las_columnas
 
 def agrupar_columnas_similares(columnas):
     """Agrupa columnas que comparten los primeros 10 caracteres, con manejo especial para fechas"""
@@ -37,30 +28,22 @@ def agrupar_columnas_similares(columnas):
     
     return columnas_procesadas
 
-def analizar_columnas_unicas(ruta):
-    # Encontrar todos los CSVs
-    archivos_csv = []
-    for root, _, files in os.walk(ruta):
-        for f in files:
-            if f.endswith('.csv') and not f.startswith('._'):
-                archivos_csv.append(os.path.join(root, f))
-    
-    if not archivos_csv:
-        print("No se encontraron archivos CSV")
+def analizar_columnas_unicas(ruta, hilos=HILOS_POR_DEFECTO):
+    # Los encabezados salen del catálogo: solo se leen los archivos nuevos o que cambiaron
+    conn = actualizar_catalogo(ruta, hilos=hilos)
+    cantidad = conn.execute("SELECT COUNT(*) FROM archivos").fetchone()[0]
+    if not cantidad:
+        print("No se encontraron archivos CSV ni parquet")
         return
     
-    print(f"\nAnalizando {len(archivos_csv)} archivos CSV...")
-    
-    # Set para almacenar todas las columnas únicas encontradas
-    todas_las_columnas = set()
+    print(f"\nAnalizando {cantidad} archivos...")
     
-    # Procesar cada archivo
-    for archivo in tqdm(archivos_csv, desc="Leyendo archivos"):
-        columnas = obtener_columnas(archivo)
-        todas_las_columnas.update(columnas)
+    # Set con todas las columnas únicas encontradas
+    todas_las_columnas_encontradas = todas_las_columnas(conn)
+    conn.close()
     
     # Agrupar columnas similares
-    columnas_agrupadas = agrupar_columnas_similares(todas_las_columnas)
+    columnas_agrupadas = agrupar_columnas_similares(todas_las_columnas_encontradas)
     
     # Mostrar resultados
     print("\n=== Columnas únicas encontradas ===")
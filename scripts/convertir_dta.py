@@ -1,16 +1,30 @@
 import os
+import json
+import shutil
+import argparse
 import pandas as pd
 import pyreadstat
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from tqdm import tqdm
 import time
 
+FORMATOS_SALIDA = ['csv', 'parquet']
+ENCODINGS = ['latin1', 'utf-8']  # En el orden en que se prueban
+FILAS_MUESTRA = 1000  # Filas que se leen para elegir el encoding y estimar la memoria
+FILAS_POR_BLOQUE = 500_000
+FACTOR_MEMORIA = 3  # Bloque leído + DataFrame + tabla/texto que se escribe
+MEMORIA_TOTAL = 8 * 1024**3  # Tope de memoria entre todas las conversiones en curso
+WORKERS_POR_DEFECTO = os.cpu_count() or 1
+
 def verificar_archivo(ruta):
     """
     Verifica si el archivo existe y retorna su tamaño
     """
     if not os.path.exists(ruta):
         return False, 0
-    
+
     tamano = os.path.getsize(ruta) / (1024*1024*1024)  # Tamaño en GB
     return True, tamano
 
@@ -28,13 +42,320 @@ def encontrar_archivos_dta(ruta):
                     archivos_dta.append((ruta_completa, file, tamano))
     return sorted(archivos_dta, key=lambda x: x[2])  # Ordenar por tamaño
 
-def convertir_dta_a_csv(ruta_origen, ruta_destino):
+def nombre_salida(archivo, formato):
+    return archivo[:-len('.dta')] + '.' + formato
+
+def leer_metadatos(ruta_archivo):
+    """Metadatos del .dta (sin leer filas), probando los encodings en orden. Devuelve (encoding, meta)."""
+    ultimo_error = None
+    for encoding in ENCODINGS:
+        try:
+            _, meta = pyreadstat.read_dta(ruta_archivo, encoding=encoding, metadataonly=True)
+            return encoding, meta
+        except Exception as e:
+            ultimo_error = e
+    raise ultimo_error
+
+def muestrear(ruta_archivo, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Lee unas pocas filas para elegir el encoding (sin releer el archivo entero si falla)
+    y estimar cuánta memoria necesita convertirlo por bloques.
+    Devuelve (encoding, memoria estimada en bytes).
+    """
+    ultimo_error = None
+    for encoding in ENCODINGS:
+        try:
+            muestra, _ = pyreadstat.read_dta(ruta_archivo, encoding=encoding, row_limit=FILAS_MUESTRA)
+            _, meta = pyreadstat.read_dta(ruta_archivo, encoding=encoding, metadataonly=True)
+            break
+        except Exception as e:
+            ultimo_error = e
+    else:
+        raise ultimo_error
+
+    bytes_por_fila = muestra.memory_usage(deep=True).sum() / max(len(muestra), 1)
+    filas = min(filas_por_bloque, meta.number_rows or filas_por_bloque)
+    return encoding, int(bytes_por_fila * filas * FACTOR_MEMORIA)
+
+# Formatos de Stata que pyreadstat convierte a fecha (con dates_as_pandas_datetime, a
+# datetime64) o a hora (datetime.time). Son los mismos que usa pyreadstat: se comparan
+# enteros, así que un %td con otro formato de salida queda como número.
+FORMATOS_FECHA_STATA = {'%td', '%d', '%tdD_m_Y', '%tdCCYY-NN-DD', '%tC', '%tc'}
+FORMATOS_HORA_STATA = {'%tcHH:MM:SS', '%tcHH:MM'}
+
+def tipo_variable_vacia(nombre, meta):
+    """
+    Tipo de arrow para una variable que no tiene ningún valor en el primer bloque,
+    según sus metadatos (en el bloque no hay nada de dónde sacarlo)
+    """
+    if meta.readstat_variable_types.get(nombre) == 'string':
+        return pa.string()
+    formato = meta.original_variable_types.get(nombre)
+    if formato in FORMATOS_FECHA_STATA:
+        return pa.timestamp('us')
+    if formato in FORMATOS_HORA_STATA:
+        return pa.time64('us')
+    return pa.float64()
+
+def esquema_parquet(bloque, meta):
+    """
+    Esquema fijo para todos los bloques, tomado del primero. Las variables de texto van
+    siempre como string y las que vinieron vacías en el primer bloque toman el tipo de
+    sus metadatos (fecha, hora o float64), así un bloque posterior con valores entra
+    en el mismo esquema.
+    """
+    esquema = pa.Schema.from_pandas(bloque, preserve_index=False)
+    for i, campo in enumerate(esquema):
+        if meta.readstat_variable_types.get(campo.name) == 'string':
+            esquema = esquema.set(i, pa.field(campo.name, pa.string()))
+        elif pa.types.is_null(campo.type):
+            esquema = esquema.set(i, pa.field(campo.name, tipo_variable_vacia(campo.name, meta)))
+    return esquema
+
+def firma_origen(ruta_archivo):
+    stat = os.stat(ruta_archivo)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def escribir_json(ruta, datos):
+    """Escribe un JSON de forma atómica: un corte a mitad de camino no lo deja roto"""
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w') as f:
+        json.dump(datos, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+def leer_json(ruta):
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta) as f:
+            return json.load(f)
+    except ValueError:
+        return None
+
+# Mientras se convierte, la salida se arma al lado de la definitiva:
+#   csv:     nombre.csv.tmp (se le van agregando bloques)
+#   parquet: nombre.parquet.partes/ (un parquet por bloque, se unen al final)
+# y nombre.<formato>.progreso.json guarda hasta qué fila quedó escrito.
+# Recién al terminar se renombra a la salida definitiva.
+
+def ruta_progreso(ruta_salida):
+    return ruta_salida + '.progreso.json'
+
+def ruta_partes(ruta_salida):
+    return ruta_salida + '.partes'
+
+def leer_progreso(ruta_salida, ruta_archivo, formato):
+    """Checkpoint de una conversión cortada, si corresponde a este mismo origen y formato"""
+    progreso = leer_json(ruta_progreso(ruta_salida))
+    if progreso is None or progreso.get('origen') != firma_origen(ruta_archivo) or progreso.get('formato') != formato:
+        return None
+    return progreso
+
+def unir_partes(partes, destino):
+    """Une los parquet de cada bloque en uno solo, de a una parte por vez"""
+    temporal = destino + '.tmp'
+    with pq.ParquetWriter(temporal, pq.read_schema(partes[0]), compression='zstd') as writer:
+        for parte in partes:
+            writer.write_table(pq.read_table(parte))
+    os.replace(temporal, destino)
+
+def convertir_archivo(ruta_archivo, ruta_salida, formato='csv', encoding='latin1', filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Convierte un .dta a CSV o parquet de a filas_por_bloque filas, escribiendo cada
+    bloque apenas se lee: la memoria no depende del tamaño del archivo.
+    Después de cada bloque se guarda un checkpoint; si la conversión se corta, la
+    próxima retoma desde el último bloque completo. La salida definitiva aparece
+    recién al final, con un rename.
+    Devuelve (filas, columnas).
+    """
+    progreso = leer_progreso(ruta_salida, ruta_archivo, formato)
+    if progreso is None:
+        progreso = {'origen': firma_origen(ruta_archivo), 'formato': formato, 'encoding': encoding,
+                    'filas': 0, 'columnas': None, 'bytes': 0, 'partes': 0}
+    else:
+        print(f"Retomando {os.path.basename(ruta_archivo)} desde la fila {progreso['filas']}")
+    # Si se retoma, hay que seguir con el encoding con el que se empezó
+    encoding = progreso['encoding']
+
+    temporal = ruta_salida + '.tmp'
+    carpeta_partes = ruta_partes(ruta_salida)
+    f_csv = None
+    if formato == 'csv':
+        if progreso['filas'] and os.path.exists(temporal):
+            # Descartamos lo que se haya escrito después del último checkpoint
+            os.truncate(temporal, progreso['bytes'])
+            f_csv = open(temporal, 'a', newline='', encoding='utf-8')
+        else:
+            progreso.update(filas=0, bytes=0)
+            f_csv = open(temporal, 'w', newline='', encoding='utf-8')
+    else:
+        os.makedirs(carpeta_partes, exist_ok=True)
+        if not all(os.path.exists(os.path.join(carpeta_partes, f'parte-{i:05d}.parquet')) for i in range(progreso['partes'])):
+            progreso['partes'] = 0
+        for nombre in os.listdir(carpeta_partes):
+            if not nombre.endswith('.parquet') or int(nombre[len('parte-'):-len('.parquet')]) >= progreso['partes']:
+                os.remove(os.path.join(carpeta_partes, nombre))
+        if progreso['partes'] == 0:
+            progreso['filas'] = 0
+    esquema = pq.read_schema(os.path.join(carpeta_partes, 'parte-00000.parquet')) if progreso['partes'] else None
+
+    try:
+        lector = pyreadstat.read_file_in_chunks(pyreadstat.read_dta, ruta_archivo, chunksize=filas_por_bloque,
+                                                offset=progreso['filas'], encoding=encoding,
+                                                dates_as_pandas_datetime=True)
+        for bloque, meta in lector:
+            if formato == 'csv':
+                bloque.to_csv(f_csv, header=progreso['filas'] == 0, index=False)
+                f_csv.flush()
+                os.fsync(f_csv.fileno())
+                progreso['bytes'] = os.fstat(f_csv.fileno()).st_size
+            else:
+                if esquema is None:
+                    esquema = esquema_parquet(bloque, meta)
+                parte = os.path.join(carpeta_partes, f"parte-{progreso['partes']:05d}.parquet")
+                pq.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False),
+                               parte + '.tmp', compression='zstd')
+                os.replace(parte + '.tmp', parte)
+                progreso['partes'] += 1
+            progreso['columnas'] = bloque.shape[1]
+            progreso['filas'] += len(bloque)
+            escribir_json(ruta_progreso(ruta_salida), progreso)
+
+        if progreso['columnas'] is None:
+            # Archivo sin filas: igual dejamos las columnas
+            _, meta = pyreadstat.read_dta(ruta_archivo, encoding=encoding, metadataonly=True)
+            progreso['columnas'] = len(meta.column_names)
+            if formato == 'csv':
+                pd.DataFrame(columns=meta.column_names).to_csv(f_csv, index=False)
+            else:
+                pq.write_table(pa.table({col: pa.array([], pa.string()) for col in meta.column_names}), temporal)
+    finally:
+        if f_csv is not None:
+            f_csv.close()
+
+    if formato == 'parquet' and progreso['partes']:
+        partes = [os.path.join(carpeta_partes, f'parte-{i:05d}.parquet') for i in range(progreso['partes'])]
+        unir_partes(partes, temporal)
+    os.replace(temporal, ruta_salida)
+    if os.path.isdir(carpeta_partes):
+        shutil.rmtree(carpeta_partes)
+    if os.path.exists(ruta_progreso(ruta_salida)):
+        os.remove(ruta_progreso(ruta_salida))
+    return progreso['filas'], progreso['columnas']
+
+# Registro de conversiones terminadas (en convertidos_dta): por cada salida, las filas y
+# columnas escritas, la firma del .dta de origen y el tamaño de la salida. Una salida
+# cuenta como convertida solo si todo eso sigue coincidiendo.
+REGISTRO_CONVERSIONES = '_convertidos.json'
+
+def leer_registro(ruta_destino):
+    return leer_json(os.path.join(ruta_destino, REGISTRO_CONVERSIONES)) or {}
+
+def registrar_conversion(ruta_destino, registro, ruta_archivo, ruta_salida, filas, columnas):
+    registro[os.path.basename(ruta_salida)] = {
+        'filas': filas,
+        'columnas': columnas,
+        'origen': firma_origen(ruta_archivo),
+        'tamano_salida': os.path.getsize(ruta_salida),
+    }
+    escribir_json(os.path.join(ruta_destino, REGISTRO_CONVERSIONES), registro)
+
+def conversion_completa(registro, ruta_archivo, ruta_salida):
+    entrada = registro.get(os.path.basename(ruta_salida))
+    return (entrada is not None and os.path.exists(ruta_salida)
+            and entrada['origen'] == firma_origen(ruta_archivo)
+            and entrada['tamano_salida'] == os.path.getsize(ruta_salida))
+
+def contar_salida(ruta_salida, formato):
+    """Filas y columnas de una salida ya escrita"""
+    if formato == 'parquet':
+        metadatos = pq.read_metadata(ruta_salida)
+        return metadatos.num_rows, metadatos.num_columns
+    columnas = len(pd.read_csv(ruta_salida, nrows=0).columns)
+    filas = sum(len(bloque) for bloque in pd.read_csv(ruta_salida, usecols=[0], dtype=str,
+                                                        chunksize=FILAS_POR_BLOQUE))
+    return filas, columnas
+
+def verificar_salida_previa(ruta_archivo, ruta_salida, formato):
+    """
+    Para salidas que no están en el registro (de antes de que existiera, o de una
+    corrida cortada): devuelve (filas, columnas) si coinciden con el .dta, si no None.
+    """
+    try:
+        _, meta = leer_metadatos(ruta_archivo)
+        filas, columnas = contar_salida(ruta_salida, formato)
+    except Exception:
+        return None
+    if (filas, columnas) != (meta.number_rows, meta.number_columns):
+        return None
+    return filas, columnas
+
+def convertir_pendientes(pendientes, ruta_destino, formato='csv', workers=1, memoria_max=MEMORIA_TOTAL,
+                         filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Convierte los archivos pendientes en paralelo. Solo se lanza uno nuevo si su memoria
+    estimada entra en memoria_max junto con los que están en curso; si uno solo no entra,
+    se convierte cuando no queda ningún otro corriendo. Cada conversión terminada queda
+    en el registro de ruta_destino.
+    Devuelve la lista de (archivo, error) de los que fallaron.
     """
-    Convierte archivos .dta de Stata a CSV
+    registro = leer_registro(ruta_destino)
+    cola = list(pendientes)
+    en_curso = {}
+    reservado = 0
+    errores = []
+
+    Pool = ProcessPoolExecutor if workers > 1 else ThreadPoolExecutor
+    with tqdm(total=len(cola), desc="Convirtiendo archivos") as barra, Pool(max_workers=max(1, workers)) as pool:
+        while cola or en_curso:
+            for item in list(cola):
+                if len(en_curso) >= max(1, workers):
+                    break
+                archivo, ruta_archivo, tamano, ruta_salida, encoding, memoria = item
+                if en_curso and reservado + memoria > memoria_max:
+                    continue
+                print(f"[{time.strftime('%H:%M:%S')}] Procesando: {archivo} ({tamano:.2f} GB, {encoding})")
+                futuro = pool.submit(convertir_archivo, ruta_archivo, ruta_salida, formato, encoding, filas_por_bloque)
+                en_curso[futuro] = (item, time.time())
+                cola.remove(item)
+                reservado += memoria
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                item, inicio = en_curso.pop(futuro)
+                archivo, ruta_archivo, _, ruta_salida, _, memoria = item
+                reservado -= memoria
+                tiempo_total = time.time() - inicio
+                try:
+                    filas, columnas = futuro.result()
+                    registrar_conversion(ruta_destino, registro, ruta_archivo, ruta_salida, filas, columnas)
+                    print(f"\n✓ Convertido exitosamente: {archivo} -> {os.path.basename(ruta_salida)}")
+                    print(f"  Dimensiones: {filas} filas x {columnas} columnas")
+                    print(f"  Tiempo total: {tiempo_total/60:.1f} minutos")
+                except Exception as e:
+                    print(f"\n❌ Error al convertir {archivo} después de {tiempo_total/60:.1f} minutos:")
+                    print(f"Error: {str(e)}")
+                    errores.append((archivo, str(e)))
+                barra.update(1)
+    return errores
+
+def convertir_dta_a_csv(ruta_origen, ruta_destino, formato='csv', workers=1, memoria_max=MEMORIA_TOTAL,
+                        filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Convierte archivos .dta de Stata a CSV (o parquet)
     Args:
         ruta_origen: Ruta donde están los archivos .dta
         ruta_destino: Ruta donde se guardarán los CSV
+        formato: 'csv' o 'parquet'
+        workers: Conversiones en paralelo
+        memoria_max: Tope de memoria (bytes) entre todas las conversiones en curso
+        filas_por_bloque: Filas que se leen y escriben por vez
     """
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato inválido: {formato}. Opciones: {', '.join(FORMATOS_SALIDA)}")
+
     # Crear directorio destino específico para archivos convertidos de .dta
     ruta_destino = os.path.join(ruta_destino, "convertidos_dta")
     if not os.path.exists(ruta_destino):
@@ -44,78 +365,81 @@ def convertir_dta_a_csv(ruta_origen, ruta_destino):
     archivos_dta = encontrar_archivos_dta(ruta_origen)
 
     print(f"\nEncontrados {len(archivos_dta)} archivos .dta en total")
-    
-    # Analizar estado de cada archivo
+
+    # Analizar estado de cada archivo: una salida cuenta como convertida si está en el
+    # registro y coincide con el .dta actual, o si (sin registro) sus filas y columnas
+    # coinciden con las del .dta
+    registro = leer_registro(ruta_destino)
     archivos_pendientes = []
     archivos_convertidos = []
-    
+
     for ruta_archivo, archivo, tamano_dta in archivos_dta:
-        nombre_csv = archivo.replace('.dta', '.csv')
-        ruta_csv = os.path.join(ruta_destino, nombre_csv)
-        
-        if os.path.exists(ruta_csv):
-            tamano_csv = os.path.getsize(ruta_csv) / (1024*1024*1024)  # Tamaño en GB
-            archivos_convertidos.append((archivo, tamano_csv))
+        ruta_salida = os.path.join(ruta_destino, nombre_salida(archivo, formato))
+
+        completa = conversion_completa(registro, ruta_archivo, ruta_salida)
+        if not completa and os.path.exists(ruta_salida):
+            dimensiones = verificar_salida_previa(ruta_archivo, ruta_salida, formato)
+            if dimensiones is not None:
+                registrar_conversion(ruta_destino, registro, ruta_archivo, ruta_salida, *dimensiones)
+                completa = True
+            else:
+                print(f"⚠ {nombre_salida(archivo, formato)} está incompleto o desactualizado, se vuelve a convertir")
+
+        if completa:
+            tamano_salida = os.path.getsize(ruta_salida) / (1024*1024*1024)  # Tamaño en GB
+            archivos_convertidos.append((archivo, tamano_salida))
         else:
             archivos_pendientes.append((archivo, ruta_archivo, tamano_dta))
 
     # Mostrar resumen
     print("\nArchivos ya convertidos:")
     for archivo, tamano in sorted(archivos_convertidos):
-        print(f"✓ {archivo} -> {archivo.replace('.dta', '.csv')} ({tamano:.2f} GB)")
-    
+        print(f"✓ {archivo} -> {nombre_salida(archivo, formato)} ({tamano:.2f} GB)")
+
     print("\nArchivos pendientes por convertir (ordenados por tamaño):")
-    for archivo, _, tamano in archivos_pendientes:
-        print(f"• {archivo} ({tamano:.2f} GB)")
+    for archivo, ruta_archivo, tamano in archivos_pendientes:
+        progreso = leer_progreso(os.path.join(ruta_destino, nombre_salida(archivo, formato)), ruta_archivo, formato)
+        retomar = f", se retoma desde la fila {progreso['filas']}" if progreso else ""
+        print(f"• {archivo} ({tamano:.2f} GB{retomar})")
 
     if not archivos_pendientes:
         print("\n¡Todos los archivos ya están convertidos!")
         return
 
+    # Encoding y memoria estimada de cada pendiente, con una muestra chica
     print(f"\nComenzando conversión de {len(archivos_pendientes)} archivos pendientes...\n")
-
-    # Convertir solo los archivos pendientes
+    pendientes = []
     for archivo, ruta_archivo, tamano in archivos_pendientes:
-        nombre_csv = archivo.replace('.dta', '.csv')
-        ruta_csv = os.path.join(ruta_destino, nombre_csv)
-
-        print(f"\n{'='*80}")
-        print(f"Procesando: {archivo} ({tamano:.2f} GB)")
-        print(f"Ruta completa: {ruta_archivo}")
-        print(f"{'='*80}\n")
-
-        inicio = time.time()
-        
         try:
-            print(f"[{time.strftime('%H:%M:%S')}] Intentando leer {archivo} con latin1...")
-            try:
-                df, _ = pyreadstat.read_dta(ruta_archivo, encoding='latin1')
-                print(f"[{time.strftime('%H:%M:%S')}] Lectura con latin1 exitosa")
-            except Exception as e1:
-                print(f"[{time.strftime('%H:%M:%S')}] Error con latin1: {str(e1)}")
-                print(f"[{time.strftime('%H:%M:%S')}] Intentando con utf-8...")
-                df, _ = pyreadstat.read_dta(ruta_archivo, encoding='utf-8')
-                print(f"[{time.strftime('%H:%M:%S')}] Lectura con utf-8 exitosa")
-            
-            print(f"[{time.strftime('%H:%M:%S')}] Guardando CSV...")
-            df.to_csv(ruta_csv, index=False)
-            
-            fin = time.time()
-            tiempo_total = fin - inicio
-            print(f"\n✓ Convertido exitosamente: {archivo} -> {nombre_csv}")
-            print(f"  Dimensiones: {df.shape[0]} filas x {df.shape[1]} columnas")
-            print(f"  Tiempo total: {tiempo_total/60:.1f} minutos")
-            
+            encoding, memoria = muestrear(ruta_archivo, filas_por_bloque)
         except Exception as e:
-            fin = time.time()
-            tiempo_total = fin - inicio
-            print(f"\n❌ Error al convertir {archivo} después de {tiempo_total/60:.1f} minutos:")
-            print(f"Error: {str(e)}")
-            print("\nContinuando con el siguiente archivo...\n")
+            print(f"\n❌ No se pudo leer {archivo} con ningún encoding ({', '.join(ENCODINGS)}): {str(e)}")
+            continue
+        ruta_salida = os.path.join(ruta_destino, nombre_salida(archivo, formato))
+        pendientes.append((archivo, ruta_archivo, tamano, ruta_salida, encoding, memoria))
+
+    errores = convertir_pendientes(pendientes, ruta_destino, formato, workers, memoria_max, filas_por_bloque)
+    if errores:
+        print(f"\n{len(errores)} archivos no se pudieron convertir:")
+        for archivo, error in errores:
+            print(f"  ✗ {archivo}: {error}")
 
 if __name__ == "__main__":
     # Rutas para los archivos
     RUTA_ORIGEN = "/Volumes/SSD_Fermin/TP_ANALITICA/data"
     RUTA_DESTINO = "/Volumes/SSD_Fermin/TP_ANALITICA/data"
-    
-    convertir_dta_a_csv(RUTA_ORIGEN, RUTA_DESTINO) 
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Convierte los .dta de Stata a CSV o parquet por bloques")
+    parser.add_argument('--origen', default=RUTA_ORIGEN, help="Carpeta donde buscar los .dta")
+    parser.add_argument('--destino', default=RUTA_DESTINO, help="Carpeta donde se crea convertidos_dta")
+    parser.add_argument('--formato', choices=FORMATOS_SALIDA, default='csv', help="Formato de salida")
+    parser.add_argument('--workers', type=int, default=WORKERS_POR_DEFECTO,
+                        help=f"Conversiones en paralelo (por defecto {WORKERS_POR_DEFECTO})")
+    parser.add_argument('--memoria-gb', type=float, default=MEMORIA_TOTAL / 1024**3,
+                        help="Tope de memoria entre todas las conversiones en curso, en GB")
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE,
+                        help="Filas que se leen y escriben por vez")
+    args = parser.parse_args()
+
+    convertir_dta_a_csv(args.origen, args.destino, args.formato, args.workers,
+                        int(args.memoria_gb * 1024**3), args.filas_por_bloque)
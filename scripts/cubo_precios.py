@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import warnings
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from intervalos_precios import fechas_a_dias, dias_a_fechas
+
+# Cubo de precios producto x sucursal x día en un .npy mapeado en memoria, armado a
+# partir de la salida de buscar_precios_cervezas (la ancha en CSV o la larga en parquet).
+# Los productos, sucursales y días se guardan aparte como diccionarios a enteros; los
+# días son un rango continuo, así que la posición de una fecha es una resta.
+# Varios procesos pueden abrir el mismo cubo en modo lectura y comparten las páginas
+# del SO, sin copias.
+#
+# Por defecto los precios van en float32 (la mitad de disco y memoria que float64):
+# alcanza para los centavos hasta ~131.000. Para precios más altos, dtype='float64'.
+
+CLAVES_SUCURSAL = ['id_comercio', 'id_bandera', 'id_sucursal']
+ATRIBUTOS_SUCURSAL = ['nombre_comercio', 'provincia']
+FILAS_POR_BLOQUE = 200_000
+PRODUCTOS_POR_BLOQUE = 64  # Productos por vez en las reducciones (acota la memoria)
+
+def leer_por_bloques(origen, columnas=None, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Recorre la salida de la búsqueda por bloques: parquet (largo) o CSV (ancho)"""
+    if origen.endswith('.parquet'):
+        archivo = pq.ParquetFile(origen)
+        for lote in archivo.iter_batches(batch_size=filas_por_bloque, columns=columnas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(origen, usecols=columnas, dtype={'id_producto': str}, chunksize=filas_por_bloque)
+
+def politicas_disponibles(sufijos):
+    return ', '.join(sorted(set(sufijos)))
+
+def columnas_fecha_ancho(origen, politica=None):
+    """
+    Columnas de precio de la salida ancha: YYYYMMDD si tiene una sola política de
+    reconciliación, o YYYYMMDD_<politica> de la política pedida si tiene varias
+    """
+    columnas = pd.read_csv(origen, nrows=0).columns
+    fechas = [col for col in columnas if col.isdigit() and len(col) == 8]
+    sufijos = [col[9:] for col in columnas if len(col) > 9 and col[:8].isdigit() and col[8] == '_']
+    if fechas or not sufijos:
+        return fechas
+    if politica is None:
+        raise ValueError(f"La salida tiene varias políticas por fecha ({politicas_disponibles(sufijos)}); "
+                         f"el cubo se arma con una sola, elegirla con politica")
+    if politica not in sufijos:
+        raise ValueError(f"La salida no tiene la política {politica} (tiene {politicas_disponibles(sufijos)})")
+    return [col for col in columnas if len(col) > 9 and col[:8].isdigit() and col[9:] == politica]
+
+def columna_precio_largo(origen, politica=None):
+    """
+    Columna de precio de la salida larga: precio si tiene una sola política de
+    reconciliación, o precio_<politica> de la política pedida si tiene varias
+    """
+    columnas = pq.read_schema(origen).names
+    if 'precio' in columnas:
+        return 'precio'
+    sufijos = [col[len('precio_'):] for col in columnas if col.startswith('precio_')]
+    if politica is None:
+        raise ValueError(f"La salida tiene varias políticas por fecha ({politicas_disponibles(sufijos)}); "
+                         f"el cubo se arma con una sola, elegirla con politica")
+    if politica not in sufijos:
+        raise ValueError(f"La salida no tiene la política {politica} (tiene {politicas_disponibles(sufijos)})")
+    return f'precio_{politica}'
+
+def armar_diccionarios(origen, filas_por_bloque=FILAS_POR_BLOQUE, politica=None):
+    """Primera pasada: productos, sucursales (con sus atributos) y rango de fechas"""
+    largo = origen.endswith('.parquet')
+    columnas = ['id_producto'] + CLAVES_SUCURSAL + ATRIBUTOS_SUCURSAL + (['fecha'] if largo else [])
+    productos = set()
+    sucursales = []
+    fecha_min = fecha_max = None
+    for bloque in leer_por_bloques(origen, columnas, filas_por_bloque):
+        productos.update(bloque['id_producto'].astype(str))
+        sucursales.append(bloque[CLAVES_SUCURSAL + ATRIBUTOS_SUCURSAL].drop_duplicates(CLAVES_SUCURSAL))
+        if largo and len(bloque):
+            minimo, maximo = int(bloque['fecha'].min()), int(bloque['fecha'].max())
+            fecha_min = minimo if fecha_min is None else min(fecha_min, minimo)
+            fecha_max = maximo if fecha_max is None else max(fecha_max, maximo)
+    if not largo:
+        fechas = [int(col[:8]) for col in columnas_fecha_ancho(origen, politica)]
+        fecha_min, fecha_max = min(fechas), max(fechas)
+
+    productos = pd.Index(sorted(productos), name='id_producto')
+    sucursales = (pd.concat(sucursales).drop_duplicates(CLAVES_SUCURSAL)
+                  .astype({'provincia': str, 'nombre_comercio': str})
+                  .sort_values(CLAVES_SUCURSAL).reset_index(drop=True))
+    return productos, sucursales, fecha_min, fecha_max
+
+def construir_cubo(origen, carpeta_cubo, dtype='float32', filas_por_bloque=FILAS_POR_BLOQUE, politica=None):
+    """
+    Arma el cubo en carpeta_cubo: cubo.npy (producto x sucursal x día, NaN donde no hay
+    precio), productos.csv, sucursales.csv y meta.json. Lee el origen en dos pasadas
+    por bloques, así que la memoria no depende del tamaño del origen.
+    Si el origen se guardó con varias políticas de reconciliación, politica elige cuál
+    va al cubo (sin elegirla es un ValueError).
+    """
+    if origen.endswith('.parquet'):
+        columna_precio = columna_precio_largo(origen, politica)  # Antes de recorrer nada, para fallar rápido
+    productos, sucursales, fecha_min, fecha_max = armar_diccionarios(origen, filas_por_bloque, politica)
+    inicio = fechas_a_dias([fecha_min])[0]
+    dias = int((fechas_a_dias([fecha_max])[0] - inicio).astype(np.int64)) + 1
+    forma = (len(productos), len(sucursales), dias)
+    print(f"Cubo de {forma[0]} productos x {forma[1]} sucursales x {forma[2]} días "
+          f"({np.prod(forma) * np.dtype(dtype).itemsize / 1024**3:.2f} GB)")
+
+    os.makedirs(carpeta_cubo, exist_ok=True)
+    temporal = os.path.join(carpeta_cubo, 'cubo.npy.tmp')
+    cubo = np.lib.format.open_memmap(temporal, mode='w+', dtype=dtype, shape=forma)
+    for i in range(0, forma[0], PRODUCTOS_POR_BLOQUE):
+        cubo[i:i + PRODUCTOS_POR_BLOQUE] = np.nan
+
+    indice_sucursales = pd.MultiIndex.from_frame(sucursales[CLAVES_SUCURSAL])
+    largo = origen.endswith('.parquet')
+    if largo:
+        columnas, col_dias = ['id_producto'] + CLAVES_SUCURSAL + ['fecha', columna_precio], None
+    else:
+        columnas_fecha = columnas_fecha_ancho(origen, politica)
+        columnas = ['id_producto'] + CLAVES_SUCURSAL + columnas_fecha
+        col_dias = (fechas_a_dias([int(col[:8]) for col in columnas_fecha]) - inicio).astype(np.int64)
+
+    for bloque in leer_por_bloques(origen, columnas, filas_por_bloque):
+        p = productos.get_indexer(bloque['id_producto'].astype(str))
+        s = indice_sucursales.get_indexer(pd.MultiIndex.from_frame(bloque[CLAVES_SUCURSAL]))
+        if largo:
+            d = (fechas_a_dias(bloque['fecha'].to_numpy()) - inicio).astype(np.int64)
+            cubo[p, s, d] = bloque[columna_precio].to_numpy()
+        else:
+            valores = bloque[columnas_fecha].to_numpy(dtype=np.float64)
+            cubo[p[:, None], s[:, None], col_dias[None, :]] = valores
+    cubo.flush()
+    del cubo
+    os.replace(temporal, os.path.join(carpeta_cubo, 'cubo.npy'))
+
+    productos.to_series().to_csv(os.path.join(carpeta_cubo, 'productos.csv'), index=False)
+    sucursales.to_csv(os.path.join(carpeta_cubo, 'sucursales.csv'), index=False)
+    with open(os.path.join(carpeta_cubo, 'meta.json'), 'w') as f:
+        json.dump({'origen': origen, 'fecha_inicio': int(fecha_min), 'dias': dias, 'dtype': dtype,
+                   'politica': politica}, f, indent=1)
+    print(f"Cubo guardado en {carpeta_cubo}")
+    return carpeta_cubo
+
+class CuboPrecios:
+    """
+    Acceso al cubo armado por construir_cubo. Las selecciones por producto, sucursal o
+    rango de fechas son vistas del memmap (no copian); las reducciones recorren el cubo
+    de a PRODUCTOS_POR_BLOQUE productos.
+    """
+    def __init__(self, carpeta_cubo, modo='r'):
+        with open(os.path.join(carpeta_cubo, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.cubo = np.load(os.path.join(carpeta_cubo, 'cubo.npy'), mmap_mode=modo)
+        self.productos = pd.Index(pd.read_csv(os.path.join(carpeta_cubo, 'productos.csv'),
+                                              dtype={'id_producto': str})['id_producto'])
+        self.sucursales = pd.read_csv(os.path.join(carpeta_cubo, 'sucursales.csv'))
+        self.indice_sucursales = pd.MultiIndex.from_frame(self.sucursales[CLAVES_SUCURSAL])
+        self.inicio = fechas_a_dias([self.meta['fecha_inicio']])[0]
+        self.fechas = dias_a_fechas(self.inicio + np.arange(self.meta['dias']))
+
+    def posicion_fecha(self, fecha):
+        return int((fechas_a_dias([int(fecha)])[0] - self.inicio).astype(np.int64))
+
+    def rango_dias(self, desde=None, hasta=None):
+        """slice de días para [desde, hasta] (fechas YYYYMMDD, inclusive)"""
+        i = 0 if desde is None else max(self.posicion_fecha(desde), 0)
+        j = self.meta['dias'] if hasta is None else min(self.posicion_fecha(hasta) + 1, self.meta['dias'])
+        return slice(i, j)
+
+    def producto(self, id_producto, desde=None, hasta=None):
+        """Matriz sucursal x día de un producto"""
+        return self.cubo[self.productos.get_loc(str(id_producto)), :, self.rango_dias(desde, hasta)]
+
+    def sucursal(self, id_comercio, id_bandera, id_sucursal, desde=None, hasta=None):
+        """Matriz producto x día de una sucursal"""
+        s = self.indice_sucursales.get_loc((id_comercio, id_bandera, id_sucursal))
+        return self.cubo[:, s, self.rango_dias(desde, hasta)]
+
+    def rango(self, desde=None, hasta=None):
+        """Cubo producto x sucursal x día recortado a las fechas"""
+        return self.cubo[:, :, self.rango_dias(desde, hasta)]
+
+    def media_por_provincia(self, desde=None, hasta=None):
+        """Precio medio de cada producto en cada provincia (DataFrame producto x provincia)"""
+        dias = self.rango_dias(desde, hasta)
+        provincias = self.sucursales['provincia'].astype(str)
+        resultado = {}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # Provincias sin precios dan NaN
+            for provincia in sorted(provincias.unique()):
+                columnas = np.flatnonzero(provincias.to_numpy() == provincia)
+                medias = []
+                for i in range(0, len(self.productos), PRODUCTOS_POR_BLOQUE):
+                    bloque = self.cubo[i:i + PRODUCTOS_POR_BLOQUE][:, columnas, dias]
+                    medias.append(np.nanmean(bloque.reshape(len(bloque), -1).astype(np.float64), axis=1))
+                resultado[provincia] = np.concatenate(medias) if medias else []
+        return pd.DataFrame(resultado, index=self.productos)
+
+    def dispersion_diaria(self, desde=None, hasta=None):
+        """
+        Dispersión de precios entre sucursales por producto y día: coeficiente de
+        variación (desvío / media). DataFrame producto x fecha.
+        """
+        dias = self.rango_dias(desde, hasta)
+        filas = []
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # Días sin precios dan NaN
+            for i in range(0, len(self.productos), PRODUCTOS_POR_BLOQUE):
+                bloque = self.cubo[i:i + PRODUCTOS_POR_BLOQUE, :, dias].astype(np.float64)
+                filas.append(np.nanstd(bloque, axis=1) / np.nanmean(bloque, axis=1))
+        valores = np.concatenate(filas) if filas else np.empty((0, dias.stop - dias.start))
+        return pd.DataFrame(valores, index=self.productos, columns=self.fechas[dias])
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3, 4, 5):
+        print("Uso: python cubo_precios.py <precios_cervezas_2025.csv|..._largo.parquet> [carpeta_cubo] "
+              "[float32|float64] [politica]")
+        sys.exit(1)
+
+    origen = sys.argv[1]
+    carpeta_cubo = sys.argv[2] if len(sys.argv) > 2 else 'cubo_precios'
+    dtype = sys.argv[3] if len(sys.argv) > 3 else 'float32'
+    politica = sys.argv[4] if len(sys.argv) > 4 else None
+    construir_cubo(origen, carpeta_cubo, dtype, politica=politica)
@@ -1,87 +1,233 @@
 import os
+import io
 import gzip
 import shutil
 import zipfile
 import subprocess
 import sys
+import struct
 import shutil as sh
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from tqdm import tqdm
 import libarchive
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import manifiesto_extraccion
+from archivos_datos import detectar_separador
 
 EXT_COMP = ['.gz', '.rar', '.zip']
-RATIO_ESTIMADO = 10  # Ratio de compresión estimado para CSVs
+RATIO_SIN_METADATOS = 10  # Solo para entradas cuyo tamaño no figura en el encabezado
+MARGEN_LIBRE = 1024 * 1024 * 1024  # Espacio que siempre dejamos libre en el disco destino
+WORKERS_POR_DEFECTO = os.cpu_count() or 1
+FORMATOS_SALIDA = ['csv', 'parquet']
+FILAS_POR_BLOQUE = 200_000  # Filas por bloque al convertir a parquet (acota la memoria)
 
 def ruta_data(archivo, crudo_root, data_root):
     rel_path = os.path.relpath(archivo, crudo_root)
     return os.path.join(data_root, os.path.dirname(rel_path))
 
+def ruta_segura(destino_dir, nombre):
+    """Une destino_dir con el nombre de un miembro sin dejar que se escape de destino_dir"""
+    destino = os.path.normpath(os.path.join(destino_dir, nombre))
+    if os.path.commonpath([os.path.abspath(destino), os.path.abspath(destino_dir)]) != os.path.abspath(destino_dir):
+        raise ValueError(f"Ruta fuera del destino dentro del comprimido: {nombre}")
+    return destino
+
+def salida_completa(destino, tamano=None):
+    """
+    True si la salida existe y, cuando se conoce, tiene el tamaño esperado.
+    Se compara módulo 2^32 porque el tamaño de los .gz viene de ISIZE.
+    """
+    if not os.path.exists(destino):
+        return False
+    return tamano is None or os.path.getsize(destino) % 2 ** 32 == tamano % 2 ** 32
+
+def escribir_atomico(flujo, destino):
+    """Copia el flujo a un temporal y lo renombra al terminar, para no dejar salidas truncadas"""
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    temporal = destino + '.tmp'
+    with open(temporal, 'wb') as f_out:
+        shutil.copyfileobj(flujo, f_out)
+    os.replace(temporal, destino)
+
 def descomprimir_gz(archivo, destino_dir):
     os.makedirs(destino_dir, exist_ok=True)
     destino = os.path.join(destino_dir, os.path.basename(archivo)[:-3])
-    if os.path.exists(destino):
-        return
+    if salida_completa(destino, tamano_descomprimido_gz(archivo)):
+        return [destino]
     with gzip.open(archivo, 'rb') as f_in:
-        with open(destino, 'wb') as f_out:
-            shutil.copyfileobj(f_in, f_out)
+        escribir_atomico(f_in, destino)
+    return [destino]
 
 def descomprimir_zip(archivo, destino_dir):
     os.makedirs(destino_dir, exist_ok=True)
-    # Para zip, verificamos si todos los archivos ya existen
+    salidas = []
     with zipfile.ZipFile(archivo, 'r') as zip_ref:
-        archivos = zip_ref.namelist()
-        todos_existen = all(os.path.exists(os.path.join(destino_dir, f)) for f in archivos)
-        if todos_existen:
-            return
-        zip_ref.extractall(destino_dir)
+        for info in zip_ref.infolist():
+            destino = ruta_segura(destino_dir, info.filename)
+            if info.is_dir():
+                os.makedirs(destino, exist_ok=True)
+                continue
+            # Solo reescribimos los miembros que faltan o quedaron incompletos
+            if not salida_completa(destino, info.file_size):
+                with zip_ref.open(info) as f_in:
+                    escribir_atomico(f_in, destino)
+            salidas.append(destino)
+    return salidas
 
 def descomprimir_rar(archivo, destino_dir):
     os.makedirs(destino_dir, exist_ok=True)
+    salidas = []
     try:
-        # Para rar, verificamos si todos los archivos ya existen
-        with libarchive.file_reader(archivo) as archive:
-            archivos = [entry.pathname for entry in archive]
-            todos_existen = all(os.path.exists(os.path.join(destino_dir, f)) for f in archivos)
-            if todos_existen:
-                return
-
-        # Si no existen todos, procedemos con la descompresión
+        # Una sola pasada: las entradas ya completas se saltean sin leer sus bloques
         with libarchive.file_reader(archivo) as archive:
             for entry in archive:
-                entry_path = os.path.join(destino_dir, entry.pathname)
+                entry_path = ruta_segura(destino_dir, entry.pathname)
                 if entry.isdir:
                     os.makedirs(entry_path, exist_ok=True)
-                else:
-                    os.makedirs(os.path.dirname(entry_path), exist_ok=True)
-                    with open(entry_path, 'wb') as f:
-                        for block in entry.get_blocks():
-                            f.write(block)
+                    continue
+                if not salida_completa(entry_path, entry.size or None):
+                    escribir_atomico(FlujoLibarchive(entry), entry_path)
+                salidas.append(entry_path)
     except Exception as e:
         print(f"\nError al descomprimir {archivo}: {str(e)}")
         print("Asegurate de tener instalado el paquete libarchive:")
         print("pip install libarchive")
         raise
+    return salidas
 
 def copiar_no_comprimido(archivo, destino_dir):
     os.makedirs(destino_dir, exist_ok=True)
     destino = os.path.join(destino_dir, os.path.basename(archivo))
+    if salida_completa(destino, os.path.getsize(archivo)):
+        return [destino]
+    temporal = destino + '.tmp'
+    shutil.copy2(archivo, temporal)
+    os.replace(temporal, destino)
+    return [destino]
+
+class FlujoLibarchive(io.RawIOBase):
+    """Expone los bloques de una entrada de libarchive como un archivo de solo lectura"""
+    def __init__(self, entry):
+        self._bloques = iter(entry.get_blocks())
+        self._pendiente = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pendiente:
+            try:
+                self._pendiente = next(self._bloques)
+            except StopIteration:
+                return 0
+        n = min(len(buffer), len(self._pendiente))
+        buffer[:n] = self._pendiente[:n]
+        self._pendiente = self._pendiente[n:]
+        return n
+
+def csv_a_parquet(flujo, destino, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Lee un CSV desde un flujo binario y lo escribe como parquet por bloques,
+    sin que el CSV expandido llegue a tocar el disco.
+    Todas las columnas se guardan como texto para que el esquema no cambie entre bloques.
+    """
+    flujo = io.BufferedReader(flujo, buffer_size=1024 * 1024) if not hasattr(flujo, 'peek') else flujo
+    # Se mira la primera línea sin consumirla
+    separador = detectar_separador(flujo.peek(64 * 1024).split(b'\n', 1)[0])
+    temporal = destino + '.tmp'
+    writer = None
+    try:
+        for bloque in pd.read_csv(flujo, sep=separador, dtype=str, chunksize=filas_por_bloque,
+                                  encoding_errors='replace'):
+            if writer is None:
+                esquema = pa.schema([(col, pa.string()) for col in bloque.columns])
+                writer = pq.ParquetWriter(temporal, esquema, compression='zstd')
+            writer.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # CSV vacío: dejamos un parquet sin columnas para no reintentarlo
+        pq.write_table(pa.table({}), temporal)
+    os.replace(temporal, destino)
+
+def nombre_salida(nombre, formato):
+    """Nombre con el que queda escrito un miembro según el formato de salida"""
+    if formato == 'parquet' and nombre.lower().endswith('.csv'):
+        return nombre[:-4] + '.parquet'
+    return nombre
+
+def escribir_miembro(flujo, nombre, destino_dir):
+    """Escribe un miembro de un comprimido: los CSV van a parquet, el resto se copia tal cual"""
+    destino = ruta_segura(destino_dir, nombre_salida(nombre, 'parquet'))
     if os.path.exists(destino):
-        return
-    shutil.copy2(archivo, destino)
+        return destino
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    if nombre.lower().endswith('.csv'):
+        csv_a_parquet(flujo, destino)
+    else:
+        escribir_atomico(flujo, destino)
+    return destino
+
+def convertir_gz(archivo, destino_dir):
+    with gzip.open(archivo, 'rb') as f_in:
+        return [escribir_miembro(f_in, os.path.basename(archivo)[:-3], destino_dir)]
+
+def convertir_zip(archivo, destino_dir):
+    salidas = []
+    with zipfile.ZipFile(archivo, 'r') as zip_ref:
+        for info in zip_ref.infolist():
+            if info.is_dir():
+                continue
+            with zip_ref.open(info) as f_in:
+                salidas.append(escribir_miembro(f_in, info.filename, destino_dir))
+    return salidas
+
+def convertir_rar(archivo, destino_dir):
+    salidas = []
+    with libarchive.file_reader(archivo) as archive:
+        for entry in archive:
+            if entry.isdir:
+                continue
+            salidas.append(escribir_miembro(FlujoLibarchive(entry), entry.pathname, destino_dir))
+    return salidas
 
-def procesar_archivo(archivo, crudo_root, data_root):
+def convertir_no_comprimido(archivo, destino_dir):
+    with open(archivo, 'rb') as f_in:
+        return [escribir_miembro(f_in, os.path.basename(archivo), destino_dir)]
+
+def procesar_archivo(archivo, crudo_root, data_root, formato='csv'):
+    """Extrae un archivo de 'crudo' y devuelve la lista de salidas escritas"""
     # Ignorar archivos de metadatos de macOS
     if os.path.basename(archivo).startswith('._'):
-        return
+        return []
         
     destino_dir = ruta_data(archivo, crudo_root, data_root)
-    if archivo.endswith('.gz'):
-        descomprimir_gz(archivo, destino_dir)
+    if formato == 'parquet':
+        if archivo.endswith('.gz'):
+            return convertir_gz(archivo, destino_dir)
+        elif archivo.endswith('.zip'):
+            return convertir_zip(archivo, destino_dir)
+        elif archivo.endswith('.rar'):
+            return convertir_rar(archivo, destino_dir)
+        else:
+            return convertir_no_comprimido(archivo, destino_dir)
+    elif archivo.endswith('.gz'):
+        return descomprimir_gz(archivo, destino_dir)
     elif archivo.endswith('.zip'):
-        descomprimir_zip(archivo, destino_dir)
+        return descomprimir_zip(archivo, destino_dir)
     elif archivo.endswith('.rar'):
-        descomprimir_rar(archivo, destino_dir)
+        return descomprimir_rar(archivo, destino_dir)
     else:
-        copiar_no_comprimido(archivo, destino_dir)
+        return copiar_no_comprimido(archivo, destino_dir)
+
+def procesar_y_hashear(archivo, crudo_root, data_root, formato='csv', hash_contenido=None):
+    """Calcula el hash del comprimido (si no viene calculado) y lo extrae"""
+    if hash_contenido is None:
+        hash_contenido = manifiesto_extraccion.hash_archivo(archivo)
+    return procesar_archivo(archivo, crudo_root, data_root, formato), hash_contenido
 
 def contar_archivos_y_comprimidos(ruta):
     total = 0
@@ -99,13 +245,325 @@ def espacio_libre(path):
     total, used, free = sh.disk_usage(path)
     return free
 
-def recorrer_y_procesar(ruta, crudo_root, data_root):
+def tamano_descomprimido_gz(archivo):
+    """
+    Lee el tamaño descomprimido del trailer ISIZE del gzip (últimos 4 bytes).
+    ISIZE es el tamaño módulo 2^32. Solo si el comprimido tiene 4 GB o más pudo haber
+    dado la vuelta: ahí sumamos vueltas hasta que no quede por debajo del tamaño
+    comprimido (y el valor puede quedar corto). Con menos, ISIZE es el tamaño exacto,
+    aunque sea menor que el comprimido (archivos vacíos o chicos).
+    """
+    tamano_comprimido = os.path.getsize(archivo)
+    with open(archivo, 'rb') as f:
+        f.seek(-4, os.SEEK_END)
+        isize = struct.unpack('<I', f.read(4))[0]
+    if tamano_comprimido >= 2 ** 32:
+        while isize < tamano_comprimido:
+            isize += 2 ** 32
+    return isize
+
+def entradas_comprimido(archivo):
+    """Devuelve [(nombre, tamaño descomprimido)] leyendo solo los metadatos del archivo"""
+    if archivo.endswith('.gz'):
+        return [(os.path.basename(archivo)[:-3], tamano_descomprimido_gz(archivo))]
+    if archivo.endswith('.zip'):
+        with zipfile.ZipFile(archivo, 'r') as zip_ref:
+            return [(info.filename, info.file_size) for info in zip_ref.infolist() if not info.is_dir()]
+    if archivo.endswith('.rar'):
+        entradas = []
+        with libarchive.file_reader(archivo) as archive:
+            for entry in archive:
+                if entry.isdir:
+                    continue
+                tamano = entry.size
+                if not tamano:
+                    tamano = os.path.getsize(archivo) * RATIO_SIN_METADATOS
+                entradas.append((entry.pathname, tamano))
+        return entradas
+    return [(os.path.basename(archivo), os.path.getsize(archivo))]
+
+def salidas_pendientes(archivo, crudo_root, data_root, formato='csv'):
+    """
+    Salidas que falta escribir para este archivo, como [(destino, tamaño)].
+    En csv una salida con otro tamaño que el del encabezado cuenta como pendiente.
+    """
+    destino_dir = ruta_data(archivo, crudo_root, data_root)
+    pendientes = []
+    for nombre, tamano in entradas_comprimido(archivo):
+        destino = os.path.join(destino_dir, nombre_salida(nombre, formato))
+        if not salida_completa(destino, tamano if formato == 'csv' else None):
+            pendientes.append((destino, tamano))
+    return pendientes
+
+def bytes_pendientes(archivo, crudo_root, data_root, formato='csv'):
+    """Bytes que falta escribir para este archivo (0 si ya está todo extraído)"""
+    return sum(tamano for _, tamano in salidas_pendientes(archivo, crudo_root, data_root, formato))
+
+def bytes_en_disco(destino):
+    """Lo que ocupan ahora la salida y su temporal (ver escribir_atomico)"""
+    return sum(os.path.getsize(ruta) for ruta in (destino, destino + '.tmp') if os.path.exists(ruta))
+
+def bytes_escritos(previos):
+    """Bytes que escribió una extracción en curso desde que se lanzó. previos: {destino: bytes en disco al lanzarla}"""
+    return sum(max(0, bytes_en_disco(destino) - antes) for destino, antes in previos.items())
+
+def salidas_existentes(archivo, crudo_root, data_root, formato='csv'):
+    """Salidas ya escritas de un archivo, como [(ruta relativa a data_root, tamaño)]"""
+    destino_dir = ruta_data(archivo, crudo_root, data_root)
+    salidas = []
+    for nombre, _ in entradas_comprimido(archivo):
+        destino = os.path.join(destino_dir, nombre_salida(nombre, formato))
+        salidas.append((os.path.relpath(destino, data_root), os.path.getsize(destino)))
+    return salidas
+
+def planificar(ruta, crudo_root, data_root, formato='csv', manifiesto=None):
+    """
+    Recorre la ruta leyendo los tamaños reales de los encabezados.
+    Devuelve [(archivo, tamaño comprimido, bytes pendientes)] de mayor a menor,
+    sin los archivos que ya están extraídos, y la lista de los que no se pudieron leer.
+
+    Con manifiesto, los comprimidos registrados que no cambiaron (y cuyas salidas siguen
+    completas) se descartan con un stat por archivo, sin abrirlos. Los que ya estaban extraídos pero no figuraban
+    se registran para que la próxima corrida tampoco tenga que abrirlos.
+    """
+    plan = []
+    ilegibles = []
+    for archivo, tamano in listar_por_tamano(ruta):
+        if os.path.basename(archivo).startswith('._'):
+            continue
+        rel = os.path.relpath(archivo, crudo_root)
+        stat = os.stat(archivo)
+        if manifiesto is not None:
+            if manifiesto_extraccion.sin_cambios(manifiesto, rel, formato, stat, data_root):
+                continue
+            # Una salida registrada que quedó truncada se borra para que se vuelva a escribir
+            # (en parquet no hay un tamaño esperado con qué detectarla)
+            for salida in manifiesto_extraccion.salidas_alteradas(manifiesto, rel, formato, data_root):
+                if os.path.exists(os.path.join(data_root, salida)):
+                    os.remove(os.path.join(data_root, salida))
+        try:
+            pendiente = bytes_pendientes(archivo, crudo_root, data_root, formato)
+            if pendiente == 0 and manifiesto is not None:
+                salidas = salidas_existentes(archivo, crudo_root, data_root, formato)
+                manifiesto_extraccion.registrar(manifiesto, rel, formato, stat, None, salidas)
+        except Exception as e:
+            ilegibles.append((archivo, str(e)))
+            continue
+        if pendiente > 0:
+            plan.append((archivo, tamano, pendiente))
+    return plan, ilegibles
+
+def separar_duplicados(plan, manifiesto, crudo_root, data_root, formato='csv'):
+    """
+    Detecta comprimidos con el mismo contenido que otro ya extraído (o que otro del plan).
+    Solo se hashean los que comparten tamaño exacto con algún otro, que son pocos.
+    No cuentan como originales el propio archivo (si se vuelve a extraer porque le
+    faltan salidas) ni los registrados cuyas salidas se borraron o truncaron.
+    Devuelve el plan sin duplicados, la lista de (archivo, ruta relativa del original)
+    y los hashes ya calculados, para no volver a leerlos.
+    """
+    hashes = {}
+    por_tamano = {}
+    for item in plan:
+        por_tamano.setdefault(item[1], []).append(item)
+
+    def hash_de(archivo):
+        if archivo not in hashes:
+            hashes[archivo] = manifiesto_extraccion.hash_archivo(archivo)
+        return hashes[archivo]
+
+    nuevo_plan = []
+    duplicados = []
+    vistos = {}
+    for item in plan:
+        archivo, tamano, _ = item
+        rel = os.path.relpath(archivo, crudo_root)
+        registrados = [(ruta, hash_registrado) for ruta, hash_registrado
+                       in manifiesto_extraccion.registrados_con_tamano(manifiesto, tamano, formato)
+                       if ruta != rel and not manifiesto_extraccion.salidas_alteradas(manifiesto, ruta, formato, data_root)]
+        if len(por_tamano[tamano]) == 1 and not registrados:
+            nuevo_plan.append(item)
+            continue
+        h = hash_de(archivo)
+        original = None
+        for ruta, hash_registrado in registrados:
+            if hash_registrado is None and os.path.exists(os.path.join(crudo_root, ruta)):
+                hash_registrado = hash_de(os.path.join(crudo_root, ruta))
+                manifiesto_extraccion.actualizar_hash(manifiesto, ruta, formato, hash_registrado)
+            if hash_registrado == h:
+                original = ruta
+                break
+        if original is None and h in vistos:
+            original = os.path.relpath(vistos[h], crudo_root)
+        if original is None:
+            vistos[h] = archivo
+            nuevo_plan.append(item)
+        else:
+            duplicados.append((archivo, original))
+    return nuevo_plan, duplicados, hashes
+
+def enlazar_salidas(archivo, original, crudo_root, data_root, formato, manifiesto):
+    """
+    Reusa las salidas de un comprimido idéntico ya extraído: crea hard links
+    (o copias si el disco no los soporta, como exFAT) en la carpeta del duplicado.
+    """
+    destino_dir = ruta_data(archivo, crudo_root, data_root)
+    origen_dir = ruta_data(os.path.join(crudo_root, original), crudo_root, data_root)
+    salidas = []
+    for salida, tamano in manifiesto_extraccion.salidas_de(manifiesto, original, formato):
+        origen = os.path.join(data_root, salida)
+        if original.endswith('.gz'):
+            # En .gz el nombre de la salida sale del nombre del comprimido
+            nombre = nombre_salida(os.path.basename(archivo)[:-3], formato)
+        else:
+            nombre = os.path.relpath(origen, origen_dir)
+        destino = ruta_segura(destino_dir, nombre)
+        if not salida_completa(destino, tamano):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            if os.path.exists(destino):
+                os.remove(destino)
+            try:
+                os.link(origen, destino)
+            except OSError:
+                shutil.copy2(origen, destino)
+        salidas.append((os.path.relpath(destino, data_root), tamano))
+    return salidas
+
+def listar_por_tamano(ruta):
+    """Lista los archivos de la ruta ordenados de mayor a menor tamaño"""
     archivos = []
     for root, dirs, files in os.walk(ruta):
         for nombre in files:
-            archivos.append(os.path.join(root, nombre))
-    for archivo in tqdm(archivos, desc="Procesando archivos"):
-        procesar_archivo(archivo, crudo_root, data_root)
+            archivo = os.path.join(root, nombre)
+            archivos.append((archivo, os.path.getsize(archivo)))
+    # Los más grandes primero, así el último archivo en terminar no es uno enorme
+    return sorted(archivos, key=lambda x: x[1], reverse=True)
+
+def recorrer_y_procesar(ruta, crudo_root, data_root, workers=1, formato='csv',
+                        plan=None, margen=MARGEN_LIBRE, borrar_origen=False, manifiesto=None):
+    """
+    Descomprime todos los archivos de la ruta usando un pool de procesos.
+    Con formato='parquet' los CSV se convierten en el momento, sin escribir el CSV expandido.
+    Los archivos se procesan de mayor a menor y un error en uno no corta el resto.
+
+    Solo se lanza un archivo si sus bytes pendientes entran en el espacio libre
+    (menos el margen y lo que les falta escribir a los que están en curso); los que
+    no entran quedan para la próxima corrida, igual que sus duplicados. Con borrar_origen=True se borra cada comprimido
+    apenas se extrae bien, liberando espacio para los siguientes.
+
+    Cada comprimido extraído se registra en el manifiesto de data_root, y los que
+    son idénticos a otro ya extraído se enlazan en lugar de descomprimirse de nuevo.
+    Devuelve la lista de (archivo, error) de los que fallaron.
+    """
+    if manifiesto is None:
+        manifiesto = manifiesto_extraccion.abrir_manifiesto(data_root)
+    if plan is None:
+        plan, errores = planificar(ruta, crudo_root, data_root, formato, manifiesto)
+    else:
+        errores = []
+    items = {item[0]: item for item in plan}
+    plan, duplicados, hashes = separar_duplicados(plan, manifiesto, crudo_root, data_root, formato)
+    disco = os.path.dirname(os.path.abspath(data_root))
+    pendientes = list(plan)
+    omitidos = []
+    en_curso = {}  # futuro -> (item, {destino: bytes en disco al lanzarlo})
+
+    Pool = ProcessPoolExecutor if workers > 1 else ThreadPoolExecutor
+    total_bytes = sum(tamano for _, tamano, _ in plan)
+    with tqdm(total=total_bytes, desc="Procesando archivos", unit='B',
+              unit_scale=True, unit_divisor=1024) as barra, Pool(max_workers=max(1, workers)) as pool:
+        while pendientes or en_curso:
+            # Lo ya escrito por los que están en curso ya no figura como libre: de cada
+            # reserva solo se descuenta lo que todavía falta escribir
+            reservado = sum(max(0, item[2] - bytes_escritos(previos)) for item, previos in en_curso.values())
+            disponible = espacio_libre(disco) - margen - reservado
+            for item in list(pendientes):
+                if len(en_curso) >= max(1, workers):
+                    break
+                archivo, tamano, necesario = item
+                if necesario <= disponible:
+                    previos = {destino: bytes_en_disco(destino) for destino, _
+                               in salidas_pendientes(archivo, crudo_root, data_root, formato)}
+                    futuro = pool.submit(procesar_y_hashear, archivo, crudo_root, data_root,
+                                         formato, hashes.get(archivo))
+                    en_curso[futuro] = (item, previos)
+                    pendientes.remove(item)
+                    disponible -= necesario
+            if not en_curso:
+                # No entra ninguno de los que quedan
+                omitidos = pendientes
+                break
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                (archivo, tamano, necesario), _ = en_curso.pop(futuro)
+                try:
+                    salidas, hash_contenido = futuro.result()
+                    manifiesto_extraccion.registrar(
+                        manifiesto, os.path.relpath(archivo, crudo_root), formato, os.stat(archivo),
+                        hash_contenido, [(os.path.relpath(s, data_root), os.path.getsize(s)) for s in salidas]
+                    )
+                    if borrar_origen and any(archivo.endswith(ext) for ext in EXT_COMP):
+                        os.remove(archivo)
+                except Exception as e:
+                    errores.append((archivo, str(e)))
+                barra.update(tamano)
+
+    # Los duplicados se resuelven al final, cuando su original ya quedó registrado.
+    # Si el original no entró en el espacio libre, el duplicado también queda para después.
+    sin_espacio = {os.path.relpath(archivo, crudo_root) for archivo, _, _ in omitidos}
+    enlazados = 0
+    for archivo, original in duplicados:
+        if original in sin_espacio:
+            omitidos.append(items[archivo])
+            continue
+        try:
+            if not manifiesto_extraccion.salidas_de(manifiesto, original, formato):
+                raise ValueError(f"El original {original} no se pudo extraer")
+            salidas = enlazar_salidas(archivo, original, crudo_root, data_root, formato, manifiesto)
+            manifiesto_extraccion.registrar(
+                manifiesto, os.path.relpath(archivo, crudo_root), formato, os.stat(archivo),
+                hashes[archivo], salidas
+            )
+            enlazados += 1
+        except Exception as e:
+            errores.append((archivo, str(e)))
+    if enlazados:
+        print(f"\n{enlazados} archivos eran idénticos a otros ya extraídos y se enlazaron.")
+
+    if omitidos:
+        faltan = sum(necesario for _, _, necesario in omitidos)
+        print(f"\n{len(omitidos)} archivos no entran en el espacio libre y quedaron sin extraer "
+              f"({faltan/1024/1024/1024:.2f} GB pendientes).")
+    if errores:
+        print(f"\n{len(errores)} archivos no se pudieron procesar:")
+        for archivo, error in errores:
+            print(f"  ✗ {archivo}: {error}")
+    return errores
+
+def pedir_workers():
+    resp = input(f"Cantidad de procesos en paralelo (Enter = {WORKERS_POR_DEFECTO}): ").strip()
+    if not resp:
+        return WORKERS_POR_DEFECTO
+    try:
+        return max(1, int(resp))
+    except ValueError:
+        print(f"Valor inválido, se usan {WORKERS_POR_DEFECTO} procesos.")
+        return WORKERS_POR_DEFECTO
+
+def pedir_formato():
+    resp = input("Formato de salida para los CSV (csv/parquet, Enter = csv): ").strip().lower()
+    if not resp:
+        return 'csv'
+    if resp not in FORMATOS_SALIDA:
+        print("Formato inválido, se usa csv.")
+        return 'csv'
+    return resp
+
+def pedir_borrar_origen():
+    print("Se puede borrar cada comprimido de 'crudo' apenas se extrae bien, para liberar espacio.")
+    resp = input("¿Borrar los comprimidos ya extraídos? (s/n, Enter = n): ").strip().lower()
+    return resp == 's'
 
 def verificar_acceso_escritura(path):
     try:
@@ -154,18 +612,34 @@ def main():
 
     print(f"La carpeta de salida 'data' se creará en: {data_root}")
     total, comprimidos, tam_comprimidos = contar_archivos_y_comprimidos(crudo_root)
+    formato = pedir_formato()
+    print("Leyendo tamaños reales desde los encabezados de los comprimidos...")
+    manifiesto = manifiesto_extraccion.abrir_manifiesto(data_root)
+    plan, ilegibles = planificar(crudo_root, crudo_root, data_root, formato, manifiesto)
+    necesario = sum(pendiente for _, _, pendiente in plan)
     free = espacio_libre(os.path.dirname(crudo_root))
-    estimado = tam_comprimidos * RATIO_ESTIMADO
     print(f"Se encontraron {total} archivos en total.")
     print(f"De los cuales {comprimidos} son comprimidos (.gz, .rar, .zip).")
     print(f"Tamaño total de archivos comprimidos: {tam_comprimidos/1024/1024/1024:.2f} GB.")
-    print(f"Espacio estimado necesario para descomprimir (ratio {RATIO_ESTIMADO}x): hasta {estimado/1024/1024/1024:.2f} GB.")
+    print(f"Archivos que faltan extraer: {len(plan)}")
+    print(f"Bytes que faltan escribir: {necesario/1024/1024/1024:.2f} GB.")
+    if formato == 'parquet':
+        print("(En parquet es una cota superior: es el tamaño de los CSV sin comprimir.)")
     print(f"Espacio libre en disco: {free/1024/1024/1024:.2f} GB.")
+    if ilegibles:
+        print(f"No se pudieron leer los encabezados de {len(ilegibles)} archivos:")
+        for archivo, error in ilegibles:
+            print(f"  ✗ {archivo}: {error}")
+    if necesario > free - MARGEN_LIBRE:
+        print("No entra todo: se van a extraer solo los archivos que quepan en el espacio libre.")
     resp = input("¿Continuar? (s/n): ")
     if resp.lower() != 's':
         print("Cancelado.")
         sys.exit(0)
-    recorrer_y_procesar(crudo_root, crudo_root, data_root)
+    borrar_origen = pedir_borrar_origen()
+    workers = pedir_workers()
+    recorrer_y_procesar(crudo_root, crudo_root, data_root, workers, formato,
+                        plan=plan, borrar_origen=borrar_origen, manifiesto=manifiesto)
 
 if __name__ == "__main__":
     main()
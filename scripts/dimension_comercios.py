@@ -0,0 +1,180 @@
+import os
+import sys
+import sqlite3
+import pandas as pd
+from tqdm import tqdm
+from catalogo_productos import comercio_y_fecha
+from archivos_datos import elegir_archivo, leer_tabla
+
+# Dimensión de comercios en SQLite, armada con los comercio.csv de las carpetas sepa-*.
+# Cada comercio.csv se ingesta una sola vez (se registran tamaño y mtime) y suma sus
+# observaciones (comercio, bandera, nombre, fecha del dump) con upsert. A partir de las
+# observaciones se arman las vigencias: un intervalo [desde, hasta] por cada tramo en
+# que una bandera tuvo el mismo nombre, así un cambio de nombre queda registrado con
+# sus fechas en lugar de aparecer como inconsistencia.
+# Los scripts cargan la tabla de comercios con cargar_comercios, que devuelve lo mismo
+# que tenía ids_comercios.csv (id_comercio|comercio_bandera_nombre).
+
+NOMBRE_DIMENSION = 'comercios.sqlite'
+CSV_COMERCIOS = 'ids_comercios.csv'  # Lo que se usaba antes de la dimensión
+
+def abrir_dimension(ruta_dimension=NOMBRE_DIMENSION):
+    conn = sqlite3.connect(ruta_dimension)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS archivos (
+            ruta TEXT PRIMARY KEY,
+            tamano INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS observaciones (
+            id_comercio INTEGER NOT NULL,
+            id_bandera INTEGER NOT NULL,
+            comercio_bandera_nombre TEXT NOT NULL,
+            fecha INTEGER NOT NULL,
+            PRIMARY KEY (id_comercio, id_bandera, fecha, comercio_bandera_nombre)
+        );
+        CREATE TABLE IF NOT EXISTS vigencias (
+            id_comercio INTEGER NOT NULL,
+            id_bandera INTEGER NOT NULL,
+            comercio_bandera_nombre TEXT NOT NULL,
+            desde INTEGER NOT NULL,
+            hasta INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_vigencias ON vigencias (id_comercio, id_bandera);
+    """)
+    return conn
+
+def encontrar_comercios(carpeta):
+    """comercio.csv (o comercio.parquet) de cada carpeta sepa-*"""
+    archivos = []
+    for root, _, files in os.walk(carpeta):
+        nombre = elegir_archivo(files, 'comercio')
+        if nombre and 'sepa-' in root:
+            archivos.append(os.path.join(root, nombre))
+    return sorted(archivos)
+
+def leer_comercio(archivo):
+    """Filas válidas de un comercio.csv como (id_comercio, id_bandera, nombre, fecha del dump)"""
+    _, fecha = comercio_y_fecha(archivo)
+    df = leer_tabla(archivo, dtype=str)
+    # Filtrar filas que no son datos válidos (el pie de los archivos, por ejemplo)
+    df = df[df['id_comercio'].astype(str).str.match(r'^\d+$')].dropna(subset=['comercio_bandera_nombre'])
+    id_bandera = df['id_bandera'] if 'id_bandera' in df.columns else pd.Series('1', index=df.index)
+    return pd.DataFrame({
+        'id_comercio': df['id_comercio'].astype(int),
+        'id_bandera': pd.to_numeric(id_bandera, errors='coerce').fillna(1).astype(int),
+        'comercio_bandera_nombre': df['comercio_bandera_nombre'].str.strip(),
+        'fecha': fecha,
+    }).drop_duplicates()
+
+def calcular_vigencias(observaciones):
+    """
+    Intervalos [desde, hasta] de cada nombre de una bandera. Un intervalo se corta en
+    el primer dump de la bandera en que ese nombre no aparece.
+    """
+    vigencias = []
+    for (id_comercio, id_bandera), grupo in observaciones.groupby(['id_comercio', 'id_bandera']):
+        presencia = pd.crosstab(grupo['fecha'], grupo['comercio_bandera_nombre']).gt(0).sort_index()
+        fechas = presencia.index.to_numpy()
+        for nombre in presencia.columns:
+            esta = presencia[nombre].to_numpy()
+            # Cada tramo de dumps seguidos con el nombre es una vigencia
+            tramo = (esta != pd.Series(esta).shift(fill_value=False).to_numpy()).cumsum()
+            for t in pd.unique(tramo[esta]):
+                dias = fechas[esta & (tramo == t)]
+                vigencias.append((id_comercio, id_bandera, nombre, int(dias[0]), int(dias[-1])))
+    return pd.DataFrame(vigencias, columns=['id_comercio', 'id_bandera', 'comercio_bandera_nombre', 'desde', 'hasta'])
+
+def actualizar_comercios(carpeta, ruta_dimension=NOMBRE_DIMENSION):
+    """
+    Ingesta los comercio.csv nuevos o cambiados y recalcula las vigencias de las
+    banderas que tocaron. Devuelve la conexión a la dimensión.
+    """
+    carpeta = os.path.abspath(carpeta)
+    conn = abrir_dimension(ruta_dimension)
+    firmas = {ruta: (tamano, mtime_ns) for ruta, tamano, mtime_ns
+              in conn.execute("SELECT ruta, tamano, mtime_ns FROM archivos")}
+    archivos = encontrar_comercios(carpeta)
+    pendientes = []
+    for archivo in archivos:
+        stat = os.stat(archivo)
+        if firmas.get(archivo) != (stat.st_size, stat.st_mtime_ns):
+            pendientes.append((archivo, stat.st_size, stat.st_mtime_ns))
+    print(f"{len(archivos)} archivos de comercios, {len(pendientes)} para ingestar")
+
+    tocadas = set()
+    errores = []
+    for archivo, tamano, mtime_ns in tqdm(pendientes, desc="Ingestando comercios"):
+        try:
+            df = leer_comercio(archivo)
+        except Exception as e:
+            errores.append((archivo, str(e)))
+            continue
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO observaciones VALUES (?, ?, ?, ?)",
+                             df.itertuples(index=False, name=None))
+            conn.execute("INSERT OR REPLACE INTO archivos VALUES (?, ?, ?)", (archivo, tamano, mtime_ns))
+        tocadas.update(zip(df['id_comercio'], df['id_bandera']))
+
+    with conn:
+        for id_comercio, id_bandera in tocadas:
+            observaciones = pd.read_sql_query(
+                "SELECT * FROM observaciones WHERE id_comercio = ? AND id_bandera = ?",
+                conn, params=(int(id_comercio), int(id_bandera)))
+            conn.execute("DELETE FROM vigencias WHERE id_comercio = ? AND id_bandera = ?",
+                         (int(id_comercio), int(id_bandera)))
+            conn.executemany("INSERT INTO vigencias VALUES (?, ?, ?, ?, ?)",
+                             calcular_vigencias(observaciones).itertuples(index=False, name=None))
+
+    cambios = cambios_de_nombre(conn)
+    if not cambios.empty:
+        print("\nBanderas que cambiaron de nombre:")
+        print(cambios.to_string(index=False))
+    if errores:
+        print(f"\n{len(errores)} archivos no se pudieron ingestar:")
+        for archivo, error in errores:
+            print(f"  {archivo}: {error}")
+    return conn
+
+def vigencias(conn):
+    return pd.read_sql_query("SELECT * FROM vigencias ORDER BY id_comercio, id_bandera, desde", conn)
+
+def cambios_de_nombre(conn):
+    """Vigencias de las banderas que tuvieron más de un nombre"""
+    tabla = vigencias(conn)
+    nombres = tabla.groupby(['id_comercio', 'id_bandera'])['comercio_bandera_nombre'].transform('nunique')
+    return tabla[nombres > 1].reset_index(drop=True)
+
+def comercios_en_fecha(conn, fecha=None):
+    """
+    Nombre de cada bandera vigente en fecha (YYYYMMDD). Sin fecha, o si la bandera no
+    tiene un dump que la cubra, se usa el último nombre conocido hasta esa fecha.
+    """
+    tabla = vigencias(conn)
+    if fecha is not None:
+        tabla = tabla[tabla['desde'] <= int(fecha)]
+        tabla = tabla.assign(hasta=tabla['hasta'].clip(upper=int(fecha)))
+    ultima = tabla.groupby(['id_comercio', 'id_bandera'])['hasta'].transform('max')
+    return tabla[tabla['hasta'] == ultima].reset_index(drop=True)
+
+def cargar_comercios(ruta_dimension=NOMBRE_DIMENSION, fecha=None):
+    """
+    Tabla id_comercio|comercio_bandera_nombre ordenada como ids_comercios.csv.
+    Si la dimensión todavía no se armó, lee ids_comercios.csv.
+    """
+    if not os.path.exists(ruta_dimension):
+        print(f"No existe {ruta_dimension}, leyendo {CSV_COMERCIOS}")
+        return pd.read_csv(CSV_COMERCIOS, sep='|')
+    conn = abrir_dimension(ruta_dimension)
+    comercios = comercios_en_fecha(conn, fecha)[['id_comercio', 'comercio_bandera_nombre']]
+    conn.close()
+    return (comercios.drop_duplicates().sort_values(['id_comercio', 'comercio_bandera_nombre'])
+            .reset_index(drop=True))
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Uso: python dimension_comercios.py <carpeta_data_daily> [comercios.sqlite]")
+        sys.exit(1)
+
+    ruta_dimension = sys.argv[2] if len(sys.argv) > 2 else NOMBRE_DIMENSION
+    actualizar_comercios(sys.argv[1], ruta_dimension).close()
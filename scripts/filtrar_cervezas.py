@@ -1,24 +1,35 @@
 import pandas as pd
 import sys
+from indice_descripciones import construir_indice, filas_que_coinciden
 
-def filtrar_cervezas(patron):
-    # Leer el CSV de cervezas
+def filtrar_cervezas(patrones):
+    # Un patrón suelto también vale
+    if isinstance(patrones, str):
+        patrones = [patrones]
+
+    # Índice de las descripciones (se arma la primera vez o si cambió el CSV)
+    conn = construir_indice('ids_cervezas.csv')
+
+    # Leer el CSV de cervezas una sola vez para todos los patrones
     df = pd.read_csv('ids_cervezas.csv', sep='|')
-    
-    # Filtrar por el patrón (case insensitive)
-    df_filtrado = df[df['productos_descripcion'].str.contains(patron, case=False, na=False)]
-    
-    # Guardar resultado
-    nombre_archivo = f'ids_{patron.lower()}.csv'
-    df_filtrado.to_csv(nombre_archivo, index=False, sep='|')
-    return len(df_filtrado)
+
+    cantidades = {}
+    for patron in patrones:
+        # Filtrar por el patrón (sin distinguir mayúsculas ni acentos)
+        df_filtrado = df.iloc[filas_que_coinciden(conn, patron)]
+
+        # Guardar resultado
+        nombre_archivo = f"ids_{'_'.join(patron.lower().split())}.csv"
+        df_filtrado.to_csv(nombre_archivo, index=False, sep='|')
+        cantidades[patron] = (len(df_filtrado), nombre_archivo)
+    conn.close()
+    return cantidades
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Uso: python filtrar_cervezas.py <patron>")
+    if len(sys.argv) < 2:
+        print("Uso: python filtrar_cervezas.py <patron> [patron ...]")
         sys.exit(1)
-        
-    patron = sys.argv[1]
-    cantidad = filtrar_cervezas(patron)
-    print(f"Se encontraron {cantidad} productos que contienen '{patron}'")
-    print(f"Resultados guardados en 'ids_{patron.lower()}.csv'") 
\ No newline at end of file
+
+    for patron, (cantidad, nombre_archivo) in filtrar_cervezas(sys.argv[1:]).items():
+        print(f"Se encontraron {cantidad} productos que contienen '{patron}'")
+        print(f"Resultados guardados en '{nombre_archivo}'")
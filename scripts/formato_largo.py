@@ -0,0 +1,200 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+from reconciliar_precios import POLITICAS_POR_DEFECTO, validar_politicas, reconciliar_largo
+
+# Salida en formato largo de las búsquedas: una fila por (sucursal, producto, fecha)
+# con el precio, en lugar de una columna por fecha. Cada archivo procesado se pasa
+# a largo apenas se lee (sin las celdas vacías) y se le entrega a EscritorLargo, así
+# nunca existe la tabla del año entero, ni ancha ni larga.
+#
+# Tipos: fecha como int32 (YYYYMMDD), ids angostos y nullables como en TIPOS_BASE de
+# lectura_precios.py (un id vacío o no numérico llega como <NA>), provincia y
+# nombre_comercio categóricos, precio en float64. Las filas con alguna clave vacía
+# se descartan al reconciliar, igual que en la salida ancha.
+
+CLAVES = ['id_comercio', 'id_bandera', 'id_sucursal', 'nombre_comercio', 'provincia', 'id_producto']
+CATEGORICAS = ['nombre_comercio', 'provincia']
+TIPOS_LARGO = {
+    'id_comercio': 'Int32',
+    'id_bandera': 'Int16',
+    'id_sucursal': 'Int32',
+    'nombre_comercio': 'category',
+    'provincia': 'category',
+    'id_producto': str,
+    'fecha': 'int32',
+}
+FILAS_POR_GRUPO = 256 * 1024  # Filas por row group (o por bloque en CSV) al escribir
+
+def ancho_a_largo(df_ancho, claves=CLAVES):
+    """
+    Pasa el resultado de un archivo (claves + una columna YYYYMMDD por fecha) a largo,
+    sin las celdas vacías y con los tipos compactos.
+    """
+    columnas_fecha = [col for col in df_ancho.columns if col not in claves]
+    largo = df_ancho.melt(id_vars=list(claves), value_vars=columnas_fecha, var_name='fecha', value_name='precio')
+    largo['precio'] = pd.to_numeric(largo['precio'], errors='coerce')
+    largo = largo.dropna(subset=['precio'])
+    return largo.astype(TIPOS_LARGO).reset_index(drop=True)
+
+def concatenar_largo(partes):
+    """Concatena partes en largo manteniendo las columnas categóricas (unificando sus categorías)"""
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return pd.DataFrame(columns=list(TIPOS_LARGO) + ['precio']).astype(TIPOS_LARGO)
+    for col in CATEGORICAS:
+        categorias = union_categoricals([parte[col] for parte in partes], sort_categories=True).categories
+        partes = [parte.assign(**{col: parte[col].cat.set_categories(categorias)}) for parte in partes]
+    return pd.concat(partes, ignore_index=True)
+
+def reconciliar_a_largo(df_largo, politicas=POLITICAS_POR_DEFECTO, claves=CLAVES):
+    """
+    Reconciliación de los precios del mismo día, quedando en largo. Con una sola
+    política el precio queda en la columna precio; con varias, en precio_<política>.
+    """
+    politicas = validar_politicas(politicas)
+    reconciliado = reconciliar_largo(df_largo, claves, politicas)
+    if len(politicas) == 1:
+        reconciliado = reconciliado.rename(columns={politicas[0]: 'precio'})
+    else:
+        reconciliado = reconciliado.rename(columns={p: f'precio_{p}' for p in politicas})
+    for col, tipo in TIPOS_LARGO.items():
+        if col in reconciliado.columns:
+            reconciliado[col] = reconciliado[col].astype(tipo)
+    return reconciliado.sort_values(list(claves) + ['fecha'], kind='stable').reset_index(drop=True)
+
+def esquema_largo(df_largo):
+    """
+    Esquema parquet del resultado. Los categóricos van como diccionario de texto con
+    índices int32, así sirve para partes con categorías distintas.
+    """
+    esquema = pa.Schema.from_pandas(df_largo.iloc[:0], preserve_index=False)
+    for col in CATEGORICAS:
+        if col in esquema.names:
+            esquema = esquema.set(esquema.get_field_index(col), pa.field(col, pa.dictionary(pa.int32(), pa.string())))
+    return esquema
+
+class SalidaLargo:
+    """
+    Archivo de salida en largo que se escribe de a partes, de a filas_por_grupo filas:
+    parquet si el destino termina en .parquet (los categóricos quedan como diccionario),
+    si no CSV. Se escribe en destino.tmp y se renombra al cerrar.
+    """
+    def __init__(self, destino, filas_por_grupo=FILAS_POR_GRUPO):
+        self.destino = destino
+        self.temporal = destino + '.tmp'
+        self.filas_por_grupo = filas_por_grupo
+        self.parquet = destino.endswith('.parquet')
+        self.salida = None  # ParquetWriter o archivo CSV, abierto con la primera parte
+        self.esquema = None
+        self.filas = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *_):
+        self.cerrar(descartar=tipo is not None)
+
+    def escribir(self, df_largo):
+        if self.salida is None:
+            if self.parquet:
+                self.esquema = esquema_largo(df_largo)
+                self.salida = pq.ParquetWriter(self.temporal, self.esquema, compression='zstd')
+            else:
+                self.salida = open(self.temporal, 'w', newline='', encoding='utf-8')
+                df_largo.iloc[:0].to_csv(self.salida, index=False)
+        for inicio in range(0, len(df_largo), self.filas_por_grupo):
+            bloque = df_largo.iloc[inicio:inicio + self.filas_por_grupo]
+            if self.parquet:
+                self.salida.write_table(pa.Table.from_pandas(bloque, schema=self.esquema, preserve_index=False))
+            else:
+                bloque.to_csv(self.salida, header=False, index=False)
+        self.filas += len(df_largo)
+
+    def cerrar(self, descartar=False):
+        if self.salida is not None:
+            self.salida.close()
+            self.salida = None
+        if descartar:
+            if os.path.exists(self.temporal):
+                os.remove(self.temporal)
+        elif os.path.exists(self.temporal):
+            os.replace(self.temporal, self.destino)
+
+def escribir_largo(df_largo, destino, filas_por_grupo=FILAS_POR_GRUPO):
+    """Escribe un resultado en largo que ya está entero en memoria (ver SalidaLargo)"""
+    with SalidaLargo(destino, filas_por_grupo) as salida:
+        salida.escribir(df_largo)
+
+class EscritorLargo:
+    """
+    Reconcilia y escribe en destino el resultado en largo a medida que llegan las
+    partes de cada archivo, sin juntar el año en memoria. Cada parte (sin reconciliar)
+    va a un parquet temporal y se anotan los hashes de sus claves + fecha. Al cerrar,
+    cada parte se reconcilia y escribe por separado; los precios de una sucursal,
+    producto y fecha que aparecen en más de una parte se juntan y se reconcilian al
+    final, así el resultado es el mismo que reconciliando todo junto.
+    Las filas quedan ordenadas dentro de cada parte, no en todo el archivo.
+    """
+    def __init__(self, destino, politicas=POLITICAS_POR_DEFECTO, claves=CLAVES, filas_por_grupo=FILAS_POR_GRUPO):
+        self.destino = destino
+        self.politicas = validar_politicas(politicas)
+        self.claves = list(claves)
+        self.filas_por_grupo = filas_por_grupo
+        # TemporaryDirectory se borra sola aunque el proceso se corte antes de cerrar
+        self.carpeta_partes = tempfile.TemporaryDirectory(prefix='.partes_largo_',
+                                                          dir=os.path.dirname(os.path.abspath(destino)))
+        self.partes = []
+        self.hashes_partes = []  # Hashes distintos de claves + fecha de cada parte
+        self.filas_entrada = 0
+        self.filas_salida = 0
+
+    def hashes(self, parte):
+        return pd.util.hash_pandas_object(parte[self.claves + ['fecha']], index=False).to_numpy()
+
+    def agregar(self, parte):
+        """Guarda la parte en largo de un archivo (la salida de ancho_a_largo)"""
+        if parte.empty:
+            return
+        # Solo se ordena la parte; los repetidos entre partes se buscan una vez al cerrar
+        self.hashes_partes.append(np.unique(self.hashes(parte)))
+        ruta = os.path.join(self.carpeta_partes.name, f'parte-{len(self.partes):05d}.parquet')
+        parte.to_parquet(ruta, index=False)
+        self.partes.append(ruta)
+        self.filas_entrada += len(parte)
+
+    def claves_compartidas(self):
+        """Hashes que aparecen en más de una parte (cada parte aporta cada hash una sola vez)"""
+        if not self.hashes_partes:
+            return np.empty(0, dtype=np.uint64)
+        valores, veces = np.unique(np.concatenate(self.hashes_partes), return_counts=True)
+        return valores[veces > 1]
+
+    def cerrar(self):
+        """Reconcilia y escribe las partes. Devuelve la cantidad de filas escritas."""
+        try:
+            with SalidaLargo(self.destino, self.filas_por_grupo) as salida:
+                compartidas = []
+                en_varias_partes = self.claves_compartidas()
+                for ruta in self.partes:
+                    parte = pd.read_parquet(ruta)
+                    en_varias = np.isin(self.hashes(parte), en_varias_partes)
+                    if en_varias.any():
+                        compartidas.append(parte[en_varias])
+                        parte = parte[~en_varias]
+                    if not parte.empty:
+                        salida.escribir(reconciliar_a_largo(parte, self.politicas, self.claves))
+                if compartidas or salida.filas == 0:
+                    salida.escribir(reconciliar_a_largo(concatenar_largo(compartidas), self.politicas, self.claves))
+                self.filas_salida = salida.filas
+        finally:
+            self.descartar()
+        return self.filas_salida
+
+    def descartar(self):
+        """Borra las partes guardadas sin escribir nada"""
+        self.carpeta_partes.cleanup()
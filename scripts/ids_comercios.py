@@ -1,56 +1,32 @@
-import pandas as pd
-import os
-from pathlib import Path
+import sys
+from dimension_comercios import NOMBRE_DIMENSION, actualizar_comercios, vigencias, comercios_en_fecha, cambios_de_nombre
+
+def procesar_comercios(carpeta='data_daily_test', ruta_dimension=NOMBRE_DIMENSION):
+    # Ingestar los comercio.csv nuevos en la dimensión (los ya ingestados se saltean)
+    conn = actualizar_comercios(carpeta, ruta_dimension)
+
+    # Todos los nombres que tuvo cada comercio alguna vez, ordenados por id_comercio y comercio_bandera_nombre
+    # (como antes de la dimensión: los cruces por nombre siguen encontrando los nombres viejos)
+    resultados = vigencias(conn)[['id_comercio', 'comercio_bandera_nombre']]
+    resultados = resultados.drop_duplicates().sort_values(['id_comercio', 'comercio_bandera_nombre'])
+
+    # Aparte, solo los nombres vigentes de cada bandera
+    vigentes = comercios_en_fecha(conn)[['id_comercio', 'comercio_bandera_nombre']]
+    vigentes = vigentes.drop_duplicates().sort_values(['id_comercio', 'comercio_bandera_nombre'])
+    cambios = cambios_de_nombre(conn)
+    conn.close()
 
-def procesar_comercios():
-    # Inicializar un DataFrame para almacenar los resultados
-    resultados = pd.DataFrame(columns=['id_comercio', 'comercio_bandera_nombre'])
-    errores_encontrados = False
-    
-    # Recorrer todos los directorios en data_daily_test
-    for root, dirs, files in os.walk('data_daily_test'):
-        for file in files:
-            if file == 'comercio.csv':
-                archivo_path = os.path.join(root, file)
-                print(f"Procesando: {archivo_path}")
-                
-                try:
-                    # Leer el CSV usando | como separador
-                    df = pd.read_csv(archivo_path, 
-                                   sep='|')
-                    
-                    # Filtrar filas que no son datos válidos
-                    df = df[df['id_comercio'].astype(str).str.match(r'^\d+$')]
-                    
-                    # Verificar inconsistencias
-                    inconsistencias = df.groupby('id_comercio')['comercio_bandera_nombre'].nunique() > 1
-                    if inconsistencias.any():
-                        errores_encontrados = True
-                        print("\n¡ATENCIÓN! Se encontraron inconsistencias:")
-                        for id_comercio in inconsistencias[inconsistencias].index:
-                            nombres = df[df['id_comercio'] == id_comercio]['comercio_bandera_nombre'].unique()
-                            print(f"id_comercio {id_comercio} tiene múltiples nombres: {nombres}")
-                    
-                    # Concatenar con resultados existentes
-                    resultados = pd.concat([resultados, df[['id_comercio', 'comercio_bandera_nombre']]]).drop_duplicates()
-                
-                except Exception as e:
-                    print(f"Error al procesar {archivo_path}: {str(e)}")
-    
-    # Convertir id_comercio a número para ordenar correctamente
-    resultados['id_comercio'] = pd.to_numeric(resultados['id_comercio'])
-    
-    # Ordenar resultados por id_comercio y comercio_bandera_nombre
-    resultados = resultados.sort_values(['id_comercio', 'comercio_bandera_nombre'])
-    
     # Guardar resultados usando | como separador
-    resultados = resultados.drop_duplicates()
     resultados.to_csv('comercios_unicos.csv', index=False, sep='|')
+    vigentes.to_csv('comercios_vigentes.csv', index=False, sep='|')
     print(f"\nProceso completado. Se encontraron {len(resultados)} comercios únicos.")
-    print(f"Resultados guardados en 'comercios_unicos.csv'")
-    
-    if errores_encontrados:
-        print("\n⚠️ ADVERTENCIA: Se encontraron inconsistencias en los datos. Ver detalles arriba.")
+    print(f"Resultados guardados en 'comercios_unicos.csv' (todos los nombres) "
+          f"y 'comercios_vigentes.csv' ({len(vigentes)} nombres vigentes)")
+
+    if not cambios.empty:
+        banderas = len(cambios[['id_comercio', 'id_bandera']].drop_duplicates())
+        print(f"\n⚠️ ADVERTENCIA: {banderas} banderas tuvieron más de un nombre (ver cambios_de_nombre en dimension_comercios.py)")
 
 if __name__ == "__main__":
-    procesar_comercios() 
\ No newline at end of file
+    carpeta = sys.argv[1] if len(sys.argv) > 1 else 'data_daily_test'
+    procesar_comercios(carpeta)
@@ -0,0 +1,117 @@
+import os
+import sys
+import sqlite3
+import unicodedata
+import pandas as pd
+
+# Índice de texto sobre productos_descripcion (por ejemplo de ids_cervezas.csv), en
+# SQLite con FTS5 y el tokenizador trigram: cada descripción distinta se guarda una
+# vez, ya normalizada (minúsculas y sin acentos), y las búsquedas por subcadena usan
+# el índice de trigramas en lugar de recorrer todas las descripciones.
+# Se arma una vez y se rearma solo si cambió el CSV (tamaño o mtime).
+#
+# Un patrón es una o más palabras separadas por espacios; una descripción coincide
+# si contiene todas (en cualquier orden). Por ejemplo 'quilmes 473' o 'ipa lata'.
+
+CSV_POR_DEFECTO = 'ids_cervezas.csv'
+NOMBRE_INDICE = 'indice_descripciones.sqlite'
+
+def normalizar(texto):
+    """Minúsculas y sin acentos ni diéresis ('Cerveza Negra ÁMBAR' -> 'cerveza negra ambar')"""
+    descompuesto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+def abrir_indice(ruta_indice=NOMBRE_INDICE):
+    conn = sqlite3.connect(ruta_indice)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS origen (
+            ruta TEXT PRIMARY KEY,
+            tamano INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS filas (
+            fila INTEGER PRIMARY KEY,
+            id_descripcion INTEGER NOT NULL,
+            id_producto TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_filas ON filas (id_descripcion);
+        CREATE VIRTUAL TABLE IF NOT EXISTS descripciones USING fts5(texto, tokenize='trigram');
+    """)
+    return conn
+
+def indice_vigente(conn, origen):
+    """True si el índice se armó con este CSV y el CSV no cambió desde entonces"""
+    stat = os.stat(origen)
+    fila = conn.execute("SELECT tamano, mtime_ns FROM origen WHERE ruta = ?", (os.path.abspath(origen),)).fetchone()
+    return fila == (stat.st_size, stat.st_mtime_ns)
+
+def construir_indice(origen=CSV_POR_DEFECTO, ruta_indice=NOMBRE_INDICE):
+    """
+    Arma (o rearma si el CSV cambió) el índice de las descripciones del CSV.
+    Devuelve la conexión al índice.
+    """
+    conn = abrir_indice(ruta_indice)
+    if indice_vigente(conn, origen):
+        return conn
+
+    df = pd.read_csv(origen, sep='|', usecols=['id_producto', 'productos_descripcion'], dtype=str)
+    # Cada descripción distinta se normaliza e indexa una sola vez
+    codigos, distintas = pd.factorize(df['productos_descripcion'].fillna(''))
+    stat = os.stat(origen)
+    with conn:
+        conn.execute("DELETE FROM origen")
+        conn.execute("DELETE FROM filas")
+        conn.execute("DELETE FROM descripciones")
+        conn.executemany("INSERT INTO descripciones (rowid, texto) VALUES (?, ?)",
+                         ((i, normalizar(texto)) for i, texto in enumerate(distintas)))
+        conn.executemany("INSERT INTO filas VALUES (?, ?, ?)",
+                         zip(range(len(df)), codigos.tolist(), df['id_producto'].fillna('')))
+        conn.execute("INSERT INTO origen VALUES (?, ?, ?)", (os.path.abspath(origen), stat.st_size, stat.st_mtime_ns))
+    print(f"Indexadas {len(distintas)} descripciones distintas de {len(df)} filas de {origen}")
+    return conn
+
+def condicion(patron):
+    """
+    WHERE sobre descripciones para un patrón: las palabras de 3 letras o más van por
+    el índice de trigramas (MATCH); las más cortas, con LIKE.
+    """
+    palabras = normalizar(patron).split()
+    if not palabras:
+        raise ValueError(f"Patrón vacío: {patron!r}")
+    largas = [p for p in palabras if len(p) >= 3]
+    cortas = [p for p in palabras if len(p) < 3]
+    partes, parametros = [], []
+    if largas:
+        partes.append("descripciones MATCH ?")
+        parametros.append(' AND '.join('"' + p.replace('"', '""') + '"' for p in largas))
+    for p in cortas:
+        partes.append("texto LIKE ? ESCAPE '\\'")
+        parametros.append('%' + p.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+    return ' AND '.join(partes), parametros
+
+def filas_que_coinciden(conn, patron):
+    """Números de fila del CSV (en orden) cuya descripción coincide con el patrón"""
+    where, parametros = condicion(patron)
+    consulta = f"""SELECT fila FROM filas WHERE id_descripcion IN
+                   (SELECT rowid FROM descripciones WHERE {where}) ORDER BY fila"""
+    return [fila for (fila,) in conn.execute(consulta, parametros)]
+
+def buscar(conn, patrones):
+    """{patrón: set de id_producto cuya descripción coincide} para cada patrón"""
+    resultados = {}
+    for patron in patrones:
+        where, parametros = condicion(patron)
+        consulta = f"""SELECT DISTINCT id_producto FROM filas WHERE id_descripcion IN
+                       (SELECT rowid FROM descripciones WHERE {where})"""
+        resultados[patron] = {id_producto for (id_producto,) in conn.execute(consulta, parametros)}
+    return resultados
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python indice_descripciones.py <patron> [patron ...]")
+        sys.exit(1)
+
+    conn = construir_indice()
+    for patron, ids in buscar(conn, sys.argv[1:]).items():
+        print(f"'{patron}': {len(ids)} productos")
+    conn.close()
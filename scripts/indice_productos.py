@@ -0,0 +1,155 @@
+import os
+import io
+import csv
+import sys
+import glob
+import sqlite3
+from array import array
+from pathlib import Path
+import pandas as pd
+from tqdm import tqdm
+from archivos_datos import detectar_separador
+
+# Índice persistente id_producto -> (archivo, offsets de sus filas, cantidad de filas).
+# Con el índice, buscar un producto en un CSV anual es leer solo sus líneas
+# en lugar de parsear el archivo entero. Cada archivo se reindexa solo si
+# cambió su tamaño o mtime.
+
+NOMBRE_INDICE = 'indice_productos.sqlite'
+
+def ruta_indice_por_defecto(carpeta_base):
+    return str(Path(carpeta_base) / NOMBRE_INDICE)
+
+def abrir_indice(ruta_indice):
+    conn = sqlite3.connect(ruta_indice)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS archivos (
+            ruta TEXT PRIMARY KEY,
+            tamano INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            encabezado BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS ubicaciones (
+            id_producto TEXT NOT NULL,
+            ruta TEXT NOT NULL,
+            offsets BLOB NOT NULL,
+            filas INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_ubicaciones ON ubicaciones (id_producto, ruta);
+    """)
+    return conn
+
+def campo(linea, posicion, separador):
+    """Extrae el campo en la posición dada de una línea del CSV (en bytes)"""
+    if b'"' in linea:
+        fila = next(csv.reader([linea.decode('utf-8', errors='replace')], delimiter=separador.decode()))
+        return fila[posicion] if posicion < len(fila) else ''
+    partes = linea.rstrip(b'\r\n').split(separador, posicion + 1)
+    return partes[posicion].decode('utf-8', errors='replace') if posicion < len(partes) else ''
+
+def indexar_archivo(conn, archivo):
+    """Recorre el archivo una vez anotando el offset de cada fila por id_producto"""
+    offsets_por_producto = {}
+    with open(archivo, 'rb') as f:
+        encabezado = f.readline()
+        separador = detectar_separador(encabezado).encode()
+        columnas = next(csv.reader([encabezado.decode('utf-8-sig', errors='replace')], delimiter=separador.decode()))
+        columnas = [col.strip() for col in columnas]
+        if 'id_producto' not in columnas:
+            print(f"Archivo {archivo} no tiene la columna id_producto, saltando...")
+            return False
+        posicion = columnas.index('id_producto')
+
+        offset = f.tell()
+        for linea in f:
+            id_producto = campo(linea, posicion, separador)
+            offsets = offsets_por_producto.get(id_producto)
+            if offsets is None:
+                offsets = offsets_por_producto[id_producto] = array('q')
+            offsets.append(offset)
+            offset += len(linea)
+
+    stat = os.stat(archivo)
+    with conn:
+        conn.execute("DELETE FROM ubicaciones WHERE ruta = ?", (archivo,))
+        conn.execute("INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?)",
+                     (archivo, stat.st_size, stat.st_mtime_ns, encabezado))
+        conn.executemany(
+            "INSERT INTO ubicaciones VALUES (?, ?, ?, ?)",
+            ((id_producto, archivo, offsets.tobytes(), len(offsets))
+             for id_producto, offsets in offsets_por_producto.items())
+        )
+    return True
+
+def archivo_vigente(conn, archivo):
+    """True si el archivo está indexado y no cambió desde entonces"""
+    fila = conn.execute("SELECT tamano, mtime_ns FROM archivos WHERE ruta = ?", (archivo,)).fetchone()
+    if fila is None:
+        return False
+    stat = os.stat(archivo)
+    return fila == (stat.st_size, stat.st_mtime_ns)
+
+def actualizar_indice(carpeta_base, año='2025', ruta_indice=None):
+    """
+    Indexa los CSV del año (sin mayoristas) que sean nuevos o hayan cambiado,
+    y borra del índice los que ya no existen.
+    """
+    ruta_indice = ruta_indice or ruta_indice_por_defecto(carpeta_base)
+    conn = abrir_indice(ruta_indice)
+    archivos = glob.glob(str(Path(carpeta_base) / año / '*.csv'))
+    archivos = [archivo for archivo in archivos if 'mayorista' not in archivo.lower()]
+
+    indexados = {ruta for (ruta,) in conn.execute("SELECT ruta FROM archivos")}
+    for ruta in indexados - set(archivos):
+        if Path(ruta).parent.name != año:
+            continue
+        with conn:
+            conn.execute("DELETE FROM ubicaciones WHERE ruta = ?", (ruta,))
+            conn.execute("DELETE FROM archivos WHERE ruta = ?", (ruta,))
+
+    pendientes = [archivo for archivo in archivos if not archivo_vigente(conn, archivo)]
+    print(f"{len(archivos)} archivos, {len(pendientes)} para indexar")
+    for archivo in tqdm(pendientes, desc="Indexando archivos"):
+        try:
+            indexar_archivo(conn, archivo)
+        except Exception as e:
+            print(f"Error al indexar {archivo}: {str(e)}")
+    conn.close()
+    return ruta_indice
+
+def leer_filas_indexadas(conn, archivo, ids_productos):
+    """
+    Lee del archivo solo las filas de los productos pedidos, yendo directo a sus offsets.
+    Devuelve None si el archivo no está indexado o cambió (hay que leerlo entero).
+    """
+    if not archivo_vigente(conn, archivo):
+        return None
+    ids = [str(i) for i in ids_productos]
+    (encabezado,) = conn.execute("SELECT encabezado FROM archivos WHERE ruta = ?", (archivo,)).fetchone()
+    offsets = array('q')
+    # De a 500 ids por consulta para no pasar el límite de parámetros de SQLite
+    for i in range(0, len(ids), 500):
+        lote = ids[i:i + 500]
+        marcadores = ','.join('?' * len(lote))
+        for (blob,) in conn.execute(
+            f"SELECT offsets FROM ubicaciones WHERE ruta = ? AND id_producto IN ({marcadores})",
+            [archivo] + lote
+        ):
+            offsets.frombytes(blob)
+
+    separador = detectar_separador(encabezado)
+    lineas = [encabezado]
+    with open(archivo, 'rb') as f:
+        for offset in sorted(offsets):
+            f.seek(offset)
+            lineas.append(f.readline())
+    return pd.read_csv(io.BytesIO(b''.join(lineas)), sep=separador, dtype={'id_producto': str})
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Uso: python indice_productos.py <carpeta_data> [año]")
+        sys.exit(1)
+
+    carpeta_base = sys.argv[1]
+    año = sys.argv[2] if len(sys.argv) > 2 else '2025'
+    actualizar_indice(carpeta_base, año)
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+try:
+    import resource
+except ImportError:
+    resource = None  # En Windows no existe; el pico de memoria queda sin medir
+from contextlib import contextmanager
+import pandas as pd
+
+# Mediciones por etapa (leer, filtrar, unir, agregar, escribir, ...) y por archivo, en
+# lugar de prints de avance. Cada medición es una línea JSON con el tiempo, las filas
+# que entraron y salieron, los bytes leídos y la memoria del proceso.
+#
+# Se activa con activar(ruta): la ruta queda en una variable de entorno, así que los
+# workers del pool de procesos (que la heredan) escriben en el mismo archivo. Sin
+# activar, las etapas solo toman el tiempo y no escriben nada.
+# Después resumen() agrupa por etapa y archivos_lentos() marca los archivos más lentos.
+
+VARIABLE_METRICAS = 'PRECIOS_METRICAS'
+
+def ruta_activa():
+    return os.environ.get(VARIABLE_METRICAS)
+
+def activar(ruta_jsonl):
+    """Empieza un archivo de métricas nuevo en ruta_jsonl (y lo hereda cada worker que se cree después)"""
+    ruta_jsonl = os.path.abspath(ruta_jsonl)
+    open(ruta_jsonl, 'w').close()
+    os.environ[VARIABLE_METRICAS] = ruta_jsonl
+    return ruta_jsonl
+
+def rss_mb():
+    """RSS actual del proceso (en Linux; en otros sistemas el pico, que es lo que hay, o None)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except OSError:
+        return rss_pico_mb()
+
+def rss_pico_mb():
+    """Pico de RSS del proceso, o None donde no hay resource"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024**2 if sys.platform == 'darwin' else 1024)
+
+def redondear(mb):
+    return None if mb is None else round(mb, 1)
+
+def registrar(etapa, archivo=None, segundos=0.0, **datos):
+    """Escribe una medición ya tomada (por ejemplo tiempos acumulados de varios bloques)"""
+    ruta = ruta_activa()
+    if not ruta:
+        return
+    evento = {'etapa': etapa, 'archivo': archivo, 'segundos': round(segundos, 6), 'pid': os.getpid(),
+              'rss_mb': redondear(rss_mb()), 'rss_pico_mb': redondear(rss_pico_mb())}
+    evento.update(datos)
+    # Una línea por write con O_APPEND: los procesos no se pisan las líneas
+    with open(ruta, 'a') as f:
+        f.write(json.dumps(evento, default=str) + '\n')
+
+class Etapa:
+    """
+    Medición de un tramo de código. Dentro del with se pueden completar filas_entrada,
+    filas_salida, bytes_leidos o cualquier otro dato en .datos.
+    """
+    def __init__(self, nombre, archivo=None, **datos):
+        self.nombre = nombre
+        self.archivo = archivo
+        self.datos = datos
+        self.segundos = 0.0
+
+    def __setattr__(self, nombre, valor):
+        if nombre in ('filas_entrada', 'filas_salida', 'bytes_leidos'):
+            self.datos[nombre] = int(valor)
+        else:
+            super().__setattr__(nombre, valor)
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        self.segundos = time.perf_counter() - self.inicio
+        if tipo is not None:
+            self.datos['error'] = f"{tipo.__name__}: {error}"
+        registrar(self.nombre, self.archivo, self.segundos, **self.datos)
+        return False
+
+def etapa(nombre, archivo=None, **datos):
+    return Etapa(nombre, archivo, **datos)
+
+class LecturaMedida:
+    """
+    Envuelve un archivo abierto en binario y cuenta los bytes y el tiempo que se pasa
+    esperando al disco en read() y read1(). Se le puede pasar a pd.read_csv en lugar de la ruta:
+    el resto del tiempo de lectura es parseo.
+    """
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.bytes_leidos = 0
+        self.segundos = 0.0
+
+    def medir(self, leer, n):
+        inicio = time.perf_counter()
+        datos = leer(n)
+        self.segundos += time.perf_counter() - inicio
+        self.bytes_leidos += len(datos)
+        return datos
+
+    def read(self, n=-1):
+        return self.medir(self.archivo.read, n)
+
+    def read1(self, n=-1):
+        # pandas envuelve el archivo en un TextIOWrapper, que lee con read1
+        return self.medir(self.archivo.read1, n)
+
+    def __getattr__(self, nombre):
+        return getattr(self.archivo, nombre)
+
+    def __iter__(self):
+        return iter(self.archivo)
+
+def leer_eventos(ruta_jsonl):
+    with open(ruta_jsonl) as f:
+        return pd.DataFrame([json.loads(linea) for linea in f if linea.strip()])
+
+def resumen(ruta_jsonl):
+    """Tabla por etapa: veces, segundos (total y máximo), filas, bytes, MB/s y pico de memoria"""
+    eventos = leer_eventos(ruta_jsonl)
+    if eventos.empty:
+        return eventos
+    for col in ('filas_entrada', 'filas_salida', 'bytes_leidos'):
+        eventos[col] = eventos[col].fillna(0).astype('int64') if col in eventos.columns else 0
+    tabla = eventos.groupby('etapa', sort=False).agg(
+        veces=('segundos', 'size'),
+        segundos=('segundos', 'sum'),
+        maximo=('segundos', 'max'),
+        filas_entrada=('filas_entrada', 'sum'),
+        filas_salida=('filas_salida', 'sum'),
+        bytes_leidos=('bytes_leidos', 'sum'),
+        rss_pico_mb=('rss_pico_mb', 'max'),
+    )
+    tabla['mb_por_s'] = (tabla['bytes_leidos'] / 1024**2 / tabla['segundos']).where(tabla['bytes_leidos'] > 0)
+    tabla['porcentaje'] = 100 * tabla['segundos'] / tabla['segundos'].sum()
+    return tabla.sort_values('segundos', ascending=False)
+
+def archivos_lentos(ruta_jsonl, n=5):
+    """Los n archivos que más tiempo llevaron, con el tiempo de cada etapa"""
+    eventos = leer_eventos(ruta_jsonl)
+    if eventos.empty or 'archivo' not in eventos.columns or eventos['archivo'].isna().all():
+        return pd.DataFrame()
+    por_archivo = eventos.dropna(subset=['archivo']).pivot_table(
+        index='archivo', columns='etapa', values='segundos', aggfunc='sum', fill_value=0)
+    por_archivo['total'] = por_archivo.sum(axis=1)
+    return por_archivo.sort_values('total', ascending=False).head(n)
+
+def imprimir_resumen(ruta_jsonl=None, n=5):
+    ruta_jsonl = ruta_jsonl or ruta_activa()
+    if not ruta_jsonl or not os.path.exists(ruta_jsonl):
+        return
+    tabla = resumen(ruta_jsonl)
+    if tabla.empty:
+        return
+    with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.float_format', '{:,.2f}'.format):
+        print("\n=== Tiempo por etapa ===")
+        print(tabla.to_string())
+        lentos = archivos_lentos(ruta_jsonl, n)
+        if not lentos.empty:
+            print(f"\n=== {len(lentos)} archivos más lentos (segundos por etapa) ===")
+            print(lentos.to_string())
+    print(f"\nMediciones completas en {ruta_jsonl}")
+
+@contextmanager
+def perfilar(ruta_perfil=None, lineas=25):
+    """
+    cProfile sobre el bloque: guarda el perfil en ruta_perfil (para snakeviz o pstats)
+    e imprime las funciones con más tiempo acumulado. Sin ruta no hace nada.
+    Solo ve el proceso actual, no los workers de un pool.
+    """
+    if not ruta_perfil:
+        yield
+        return
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield
+    finally:
+        perfil.disable()
+        perfil.dump_stats(ruta_perfil)
+        print(f"\n=== Perfil (guardado en {ruta_perfil}) ===")
+        pstats.Stats(perfil).sort_stats('cumulative').print_stats(lineas)
@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from tqdm import tqdm
+from archivos_datos import archivos_de_carpeta, leer_columnas, leer_por_bloques
+from lectura_precios import IDS_ENTEROS, tipar_ids
+from almacen_precios import COLUMNAS_BASE, FILAS_POR_BLOQUE, FILAS_POR_ROW_GROUP, columnas_de_precio
+
+# Series de precios guardadas como intervalos: por cada fila de los CSV anuales
+# (sucursal y producto) solo se guardan los tramos en que el precio no cambia,
+# como (desde, hasta, precio). Un tramo se corta cuando cambia el precio, cuando
+# falta el precio ese día o cuando falta el día entero en el archivo, así que
+# expandir un intervalo es tomar todos los días entre desde y hasta.
+# No se reconcilia nada al guardar: expandir devuelve exactamente los precios
+# no vacíos de los CSV (filas duplicadas incluidas).
+
+REGISTRO_INGESTA = '_ingestados.json'
+
+ESQUEMA_INTERVALOS = pa.schema([
+    ('id_comercio', pa.int32()),
+    ('id_bandera', pa.int16()),
+    ('id_sucursal', pa.int32()),
+    ('provincia', pa.dictionary(pa.int16(), pa.string())),
+    ('id_producto', pa.string()),
+    ('desde', pa.int32()),
+    ('hasta', pa.int32()),
+    ('precio', pa.float64()),
+])
+
+def ruta_intervalos_por_defecto(carpeta_base):
+    return str(Path(carpeta_base) / 'intervalos_precios')
+
+def fechas_a_dias(fechas):
+    """YYYYMMDD (enteros) -> datetime64[D], sin pasar por strings"""
+    fechas = np.asarray(fechas, dtype=np.int64)
+    meses = (fechas // 10000 - 1970) * 12 + (fechas // 100 % 100 - 1)
+    return meses.astype('datetime64[M]').astype('datetime64[D]') + (fechas % 100 - 1)
+
+def dias_a_fechas(dias):
+    """datetime64[D] -> YYYYMMDD como int32"""
+    meses = dias.astype('datetime64[M]')
+    anio = meses.astype('datetime64[Y]').astype(np.int64) + 1970
+    mes = meses.astype(np.int64) % 12 + 1
+    dia = (dias - meses.astype('datetime64[D]')).astype(np.int64) + 1
+    return (anio * 10000 + mes * 100 + dia).astype(np.int32)
+
+def bloque_a_intervalos(df, columnas_precio):
+    """
+    Comprime un bloque del CSV ancho a intervalos de precio constante, en bloque con numpy.
+    columnas_precio es {columna: fecha YYYYMMDD}.
+    """
+    orden = sorted(columnas_precio, key=columnas_precio.get)
+    fechas = np.array([int(columnas_precio[col]) for col in orden], dtype=np.int32)
+    precios = df[orden].to_numpy(dtype=np.float64)
+    hay_precio = ~np.isnan(precios)
+
+    # Dos días seguidos son el mismo tramo si son días consecutivos y tienen el mismo precio
+    consecutivos = np.diff(fechas_a_dias(fechas)).astype(np.int64) == 1
+    sigue = (precios[:, 1:] == precios[:, :-1]) & consecutivos
+    inicio = hay_precio.copy()
+    inicio[:, 1:] &= ~sigue
+    fin = hay_precio.copy()
+    fin[:, :-1] &= ~sigue
+
+    # Los inicios y los fines salen en el mismo orden (fila, columna), así que se aparean
+    filas, col_inicio = np.nonzero(inicio)
+    _, col_fin = np.nonzero(fin)
+
+    provincia = df['sucursales_provincia'] if 'sucursales_provincia' in df.columns else pd.Series('Desconocida', index=df.index)
+    intervalos = pd.DataFrame({
+        'id_comercio': df['id_comercio'].to_numpy()[filas],
+        'id_bandera': df['id_bandera'].to_numpy()[filas],
+        'id_sucursal': df['id_sucursal'].to_numpy()[filas],
+        'provincia': provincia.astype(str).to_numpy()[filas],
+        'id_producto': df['id_producto'].to_numpy()[filas],
+        'desde': fechas[col_inicio],
+        'hasta': fechas[col_fin],
+        'precio': precios[filas, col_inicio],
+    })
+    intervalos = intervalos.sort_values(['id_producto', 'desde'], kind='stable')
+    return pa.Table.from_pandas(intervalos, schema=ESQUEMA_INTERVALOS, preserve_index=False), int(hay_precio.sum())
+
+def comprimir_archivo(archivo, destino, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Convierte un CSV anual a un parquet de intervalos.
+    Devuelve (precios leídos, intervalos escritos).
+    """
+    columnas = leer_columnas(archivo)
+    columnas_precio = columnas_de_precio(columnas)
+    if 'id_producto' not in columnas or not columnas_precio:
+        print(f"Archivo {archivo} no tiene id_producto o columnas precio_YYYYMMDD, saltando...")
+        return 0, 0
+
+    usecols = [col for col in COLUMNAS_BASE if col in columnas] + list(columnas_precio)
+    dtypes = {'id_producto': str, 'sucursales_provincia': 'category'}
+    dtypes.update({col: str for col in IDS_ENTEROS})
+    dtypes.update({col: 'float64' for col in columnas_precio})
+
+    precios = intervalos = 0
+    temporal = destino + '.tmp'
+    with pq.ParquetWriter(temporal, ESQUEMA_INTERVALOS, compression='zstd') as writer:
+        for bloque in leer_por_bloques(archivo, usecols, dtypes, filas_por_bloque):
+            tabla, leidos = bloque_a_intervalos(tipar_ids(bloque), columnas_precio)
+            if len(tabla):
+                writer.write_table(tabla, row_group_size=FILAS_POR_ROW_GROUP)
+            precios += leidos
+            intervalos += len(tabla)
+    os.replace(temporal, destino)
+    return precios, intervalos
+
+def comprimir_precios(carpeta_base, carpeta_intervalos=None, año='2025'):
+    """
+    Convierte los CSV anuales (excluyendo mayoristas) a intervalos, un parquet por CSV.
+    Los archivos que no cambiaron desde la última vez (tamaño y mtime) se saltean.
+    """
+    carpeta_intervalos = carpeta_intervalos or ruta_intervalos_por_defecto(carpeta_base)
+    destino_año = os.path.join(carpeta_intervalos, f'anio={año}')
+    os.makedirs(destino_año, exist_ok=True)
+    ruta_registro = os.path.join(carpeta_intervalos, REGISTRO_INGESTA)
+    registro = {}
+    if os.path.exists(ruta_registro):
+        with open(ruta_registro) as f:
+            registro = json.load(f)
+
+    archivos = archivos_de_carpeta(str(Path(carpeta_base) / año))
+    archivos = [archivo for archivo in archivos if 'mayorista' not in archivo.lower()]
+    print(f"Encontrados {len(archivos)} archivos de precios (excluyendo mayoristas)")
+
+    total_precios = total_intervalos = 0
+    for archivo in tqdm(archivos, desc="Comprimiendo archivos"):
+        stat = os.stat(archivo)
+        firma = [stat.st_size, stat.st_mtime_ns]
+        if registro.get(archivo) == firma:
+            continue
+        try:
+            precios, intervalos = comprimir_archivo(archivo, os.path.join(destino_año, Path(archivo).stem + '.parquet'))
+        except Exception as e:
+            print(f"Error al comprimir {archivo}: {str(e)}")
+            continue
+        total_precios += precios
+        total_intervalos += intervalos
+        registro[archivo] = firma
+        with open(ruta_registro, 'w') as f:
+            json.dump(registro, f, indent=1)
+
+    if total_intervalos:
+        print(f"{total_precios} precios guardados como {total_intervalos} intervalos "
+              f"({total_precios / total_intervalos:.1f} precios por intervalo)")
+    print(f"Intervalos actualizados en {carpeta_intervalos}")
+    return carpeta_intervalos
+
+def leer_intervalos(carpeta_intervalos, ids_productos=None, desde=None, hasta=None, año='2025'):
+    """
+    Intervalos que se superponen con [desde, hasta] (fechas YYYYMMDD, cualquiera puede
+    faltar), opcionalmente solo de algunos productos.
+    """
+    dataset = ds.dataset(carpeta_intervalos, format='parquet', partitioning='hive',
+                         exclude_invalid_files=True, ignore_prefixes=['_', '.'])
+    filtro = ds.field('anio') == int(año)
+    if ids_productos is not None:
+        filtro &= ds.field('id_producto').isin(pa.array([str(i) for i in ids_productos], type=pa.string()))
+    if desde is not None:
+        filtro &= ds.field('hasta') >= int(desde)
+    if hasta is not None:
+        filtro &= ds.field('desde') <= int(hasta)
+    return dataset.to_table(columns=ESQUEMA_INTERVALOS.names, filter=filtro).to_pandas()
+
+def expandir(intervalos, desde=None, hasta=None):
+    """
+    Pasa intervalos a una fila por día (formato largo, con columna fecha YYYYMMDD),
+    recortados a [desde, hasta] si se indican.
+    """
+    inicio = fechas_a_dias(intervalos['desde'].to_numpy())
+    final = fechas_a_dias(intervalos['hasta'].to_numpy())
+    if desde is not None:
+        inicio = np.maximum(inicio, fechas_a_dias([int(desde)])[0])
+    if hasta is not None:
+        final = np.minimum(final, fechas_a_dias([int(hasta)])[0])
+    dias = np.maximum((final - inicio).astype(np.int64) + 1, 0)
+
+    repetidas = np.repeat(np.arange(len(intervalos)), dias)
+    # Posición de cada fila dentro de su intervalo: 0, 1, 2, ... reiniciando en cada uno
+    desplazamiento = np.arange(len(repetidas)) - np.repeat(np.cumsum(dias) - dias, dias)
+    largo = intervalos.drop(columns=['desde', 'hasta']).iloc[repetidas].reset_index(drop=True)
+    largo.insert(len(largo.columns) - 1, 'fecha', dias_a_fechas(inicio[repetidas] + desplazamiento))
+    return largo
+
+def precios_en_rango(carpeta_intervalos, desde, hasta, ids_productos=None, año='2025'):
+    """Precios (una fila por día) entre desde y hasta, leyendo solo los intervalos que tocan el rango"""
+    return expandir(leer_intervalos(carpeta_intervalos, ids_productos, desde, hasta, año), desde, hasta)
+
+def precio_en_fecha(carpeta_intervalos, fecha, ids_productos=None, año='2025'):
+    """Precio vigente en una fecha para cada sucursal y producto: los intervalos que la contienen"""
+    intervalos = leer_intervalos(carpeta_intervalos, ids_productos, fecha, fecha, año)
+    intervalos = intervalos.drop(columns=['desde', 'hasta'])
+    intervalos.insert(len(intervalos.columns) - 1, 'fecha', np.int32(fecha))
+    return intervalos
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3, 4):
+        print("Uso: python intervalos_precios.py <carpeta_data> [año] [carpeta_intervalos]")
+        sys.exit(1)
+
+    carpeta_base = sys.argv[1]
+    año = sys.argv[2] if len(sys.argv) > 2 else '2025'
+    carpeta_intervalos = sys.argv[3] if len(sys.argv) > 3 else None
+    comprimir_precios(carpeta_base, carpeta_intervalos, año)
@@ -0,0 +1,207 @@
+import os
+import time
+import queue
+import threading
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from instrumentacion import LecturaMedida, registrar
+from archivos_datos import leer_columnas, leer_por_bloques
+
+# Lectura por bloques de los CSV anuales de precios (o de su versión en parquet).
+# Cada bloque se filtra apenas se lee y solo se guardan las filas de los productos
+# buscados, así que la memoria depende de filas_por_bloque y no del tamaño del archivo.
+# Se leen solo las columnas que usan las búsquedas, con tipos explícitos.
+
+COLUMNAS_BASE = ['id_comercio', 'id_bandera', 'id_sucursal', 'sucursales_provincia', 'id_producto']
+FILAS_POR_BLOQUE = 250_000
+WORKERS_POR_DEFECTO = 1        # Varios procesos solo si se piden: cada uno carga pandas y sus bloques
+BYTES_PRECARGA = 512 * 1024**2  # Tope de bytes leídos por adelantado
+ARCHIVOS_PRECARGA = 2           # Archivos listos esperando a ser procesados
+BLOQUE_LECTURA = 1024**2
+
+# Los precios se leen en float64: en float32 se pierden centavos en los precios altos
+# (por encima de ~131.000). Lo mismo vale para el almacén, los intervalos y la salida en largo.
+# Los ids son enteros nullables y se leen como texto: el pie de los archivos de SEPA
+# ("Última actualización: ...") y las celdas vacías no entran en un entero. Se pasan a
+# número recién después de filtrar, cuando el pie ya quedó afuera (no tiene id_producto).
+TIPOS_BASE = {
+    'id_comercio': 'Int32',
+    'id_bandera': 'Int16',
+    'id_sucursal': 'Int32',
+    'sucursales_provincia': 'category',
+    'id_producto': str,
+}
+IDS_ENTEROS = ['id_comercio', 'id_bandera', 'id_sucursal']
+
+def columnas_a_leer(columnas):
+    """Columnas base presentes en el archivo más todas las precio_*, con los tipos para leerlas"""
+    usecols = [col for col in COLUMNAS_BASE if col in columnas]
+    usecols += [col for col in columnas if col.startswith('precio_')]
+    dtypes = {col: str if col in IDS_ENTEROS else TIPOS_BASE.get(col, 'float64') for col in usecols}
+    return usecols, dtypes
+
+def tipar_ids(df):
+    """Pasa los ids leídos como texto a sus enteros nullables (lo que no es número queda <NA>)"""
+    for col in IDS_ENTEROS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(TIPOS_BASE[col])
+    return df
+
+def escanear_archivo(archivo, ids_productos, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Lee el archivo por bloques y devuelve (filas de los productos pedidos, total de filas leídas).
+    Si el archivo no tiene la columna id_producto devuelve (None, 0).
+    """
+    columnas = leer_columnas(archivo)
+    if 'id_producto' not in columnas:
+        return None, 0
+    usecols, dtypes = columnas_a_leer(columnas)
+    ids_productos = {str(i) for i in ids_productos}
+
+    encontrados = []
+    total_filas = 0
+    # Se mide por separado la espera de disco, el parseo y el filtrado (ver instrumentacion.py)
+    leer = filtrar = 0.0
+    with open(archivo, 'rb') as f:
+        lectura = LecturaMedida(f)
+        bloques = leer_por_bloques(archivo, usecols, dtypes, filas_por_bloque, flujo=lectura)
+        while True:
+            inicio = time.perf_counter()
+            bloque = next(bloques, None)
+            leer += time.perf_counter() - inicio
+            if bloque is None:
+                break
+            inicio = time.perf_counter()
+            total_filas += len(bloque)
+            filtrado = bloque[bloque['id_producto'].isin(ids_productos)]
+            if not filtrado.empty:
+                encontrados.append(filtrado)
+            filtrar += time.perf_counter() - inicio
+    filas_encontradas = sum(len(parte) for parte in encontrados)
+    registrar('disco', archivo, lectura.segundos, bytes_leidos=lectura.bytes_leidos)
+    registrar('parsear', archivo, leer - lectura.segundos, filas_salida=total_filas)
+    registrar('filtrar', archivo, filtrar, filas_entrada=total_filas, filas_salida=filas_encontradas)
+
+    if not encontrados:
+        return tipar_ids(pd.DataFrame(columns=usecols)), total_filas
+    return tipar_ids(pd.concat(encontrados, ignore_index=True)), total_filas
+
+def leer_prefijo(archivo, n, buffer):
+    """Lee los primeros n bytes del archivo y los descarta: quedan en el cache de páginas del SO"""
+    try:
+        with open(archivo, 'rb', buffering=0) as f:
+            vista = memoryview(buffer)
+            while n > 0:
+                leidos = f.readinto(vista[:min(n, len(buffer))])
+                if not leidos:
+                    break
+                n -= leidos
+    except OSError:
+        pass  # El error le va a saltar al que procese el archivo
+
+class Precarga:
+    """
+    Recorre una lista de archivos mientras un hilo va leyendo los siguientes, así el
+    disco trabaja mientras se parsea el archivo actual. La lectura por adelantado tiene
+    dos topes: archivos_max archivos listos en la cola y bytes_max bytes leídos de
+    archivos que todavía no se empezaron a procesar. El archivo en curso ya no cuenta:
+    si contara, uno más grande que el tope lo ocuparía entero y el siguiente no se
+    leería hasta terminarlo.
+    """
+    def __init__(self, archivos, bytes_max=BYTES_PRECARGA, archivos_max=ARCHIVOS_PRECARGA):
+        self.archivos = list(archivos)
+        self.bytes_max = bytes_max
+        self.archivos_max = archivos_max
+        self.listos = queue.Queue(maxsize=max(1, archivos_max))
+        self.pendientes = 0  # Bytes leídos por adelantado de archivos que todavía no se entregaron
+        self.condicion = threading.Condition()
+        self.detener = threading.Event()
+
+    def __len__(self):
+        return len(self.archivos)
+
+    def bytes_a_leer(self, archivo):
+        try:
+            tamano = os.path.getsize(archivo)
+        except OSError:
+            return 0
+        # Un archivo más grande que el tope se lee solo hasta el tope
+        return min(tamano, self.bytes_max)
+
+    def leer_adelantado(self):
+        buffer = bytearray(BLOQUE_LECTURA)
+        for archivo in self.archivos:
+            n = self.bytes_a_leer(archivo)
+            with self.condicion:
+                self.condicion.wait_for(lambda: self.detener.is_set() or self.pendientes + n <= self.bytes_max)
+                if self.detener.is_set():
+                    return
+                self.pendientes += n
+            leer_prefijo(archivo, n, buffer)
+            while not self.detener.is_set():
+                try:
+                    self.listos.put((archivo, n), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def __iter__(self):
+        if self.bytes_max <= 0 or self.archivos_max <= 0:
+            yield from self.archivos
+            return
+        hilo = threading.Thread(target=self.leer_adelantado, daemon=True)
+        hilo.start()
+        try:
+            for _ in self.archivos:
+                archivo, n = self.listos.get()
+                # Liberamos los bytes del archivo al entregarlo, así el hilo lee el
+                # siguiente mientras este se parsea
+                with self.condicion:
+                    self.pendientes -= n
+                    self.condicion.notify()
+                yield archivo
+        finally:
+            self.detener.set()
+            with self.condicion:
+                self.condicion.notify()
+
+def limitar_memoria(memoria_max):
+    """
+    Inicializador de cada worker: pone un tope de memoria virtual (en bytes).
+    Si un archivo lo supera, ese archivo falla con MemoryError y el resto sigue.
+    Es un tope de memoria virtual (RLIMIT_AS), no de memoria residente: tiene que dejar
+    margen para lo que reservan numpy y pyarrow sin usar. En macOS y Windows no se aplica.
+    """
+    if not memoria_max:
+        return
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memoria_max, memoria_max))
+    except (ImportError, ValueError, OSError) as e:
+        # En Windows no existe resource y macOS no soporta RLIMIT_AS
+        print(f"No se pudo limitar la memoria del worker: {str(e)}")
+
+def _ejecutar(funcion, archivo):
+    """Corre funcion(archivo) y devuelve (resultado, error) en lugar de propagar la excepción"""
+    try:
+        return funcion(archivo), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {str(e)}"
+
+def procesar_en_paralelo(funcion, archivos, workers=1, memoria_max=None,
+                         precarga_bytes=BYTES_PRECARGA, precarga_archivos=ARCHIVOS_PRECARGA):
+    """
+    Aplica funcion(archivo) a cada archivo y va devolviendo (archivo, resultado, error)
+    en el mismo orden de archivos, así el resultado combinado no depende de qué worker
+    termina primero. Con workers > 1 usa un pool de procesos; la función tiene que
+    poder serializarse (una función de módulo o un functools.partial de una).
+    Con un solo worker los archivos siguientes se leen por adelantado (ver Precarga);
+    con varios, los workers ya se solapan leyendo y parseando.
+    """
+    if workers <= 1:
+        for archivo in Precarga(archivos, precarga_bytes, precarga_archivos):
+            yield (archivo,) + _ejecutar(funcion, archivo)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=limitar_memoria, initargs=(memoria_max,)) as pool:
+        for archivo, (resultado, error) in zip(archivos, pool.map(_ejecutar, [funcion] * len(archivos), archivos)):
+            yield archivo, resultado, error
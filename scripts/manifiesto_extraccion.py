@@ -0,0 +1,104 @@
+import os
+import hashlib
+import sqlite3
+import time
+
+NOMBRE_MANIFIESTO = '.manifiesto_extraccion.sqlite'
+
+def abrir_manifiesto(data_root):
+    """
+    Abre (o crea) el manifiesto de extracción dentro de data_root.
+    Guarda por cada comprimido de 'crudo' su tamaño, mtime y hash de contenido,
+    y por cada salida escrita su tamaño. Las rutas se guardan relativas a
+    crudo_root y data_root para que no dependan de dónde está montado el disco.
+    """
+    os.makedirs(data_root, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(data_root, NOMBRE_MANIFIESTO))
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS archivos (
+            ruta TEXT NOT NULL,
+            formato TEXT NOT NULL,
+            tamano INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            hash TEXT,
+            extraido_en TEXT NOT NULL,
+            PRIMARY KEY (ruta, formato)
+        );
+        CREATE INDEX IF NOT EXISTS idx_archivos_tamano ON archivos (tamano);
+        CREATE TABLE IF NOT EXISTS salidas (
+            ruta_archivo TEXT NOT NULL,
+            formato TEXT NOT NULL,
+            salida TEXT NOT NULL,
+            tamano INTEGER NOT NULL,
+            PRIMARY KEY (ruta_archivo, formato, salida)
+        );
+    """)
+    return conn
+
+def hash_archivo(archivo, tamano_bloque=8 * 1024 * 1024):
+    """Hash del contenido del archivo (blake2b), leído por bloques"""
+    h = hashlib.blake2b(digest_size=20)
+    with open(archivo, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+def salidas_alteradas(conn, ruta, formato, data_root):
+    """Salidas registradas de un comprimido que ya no están o cambiaron de tamaño (borradas o truncadas)"""
+    alteradas = []
+    for salida, tamano in salidas_de(conn, ruta, formato):
+        destino = os.path.join(data_root, salida)
+        if not os.path.exists(destino) or os.path.getsize(destino) != tamano:
+            alteradas.append(salida)
+    return alteradas
+
+def sin_cambios(conn, ruta, formato, stat, data_root):
+    """
+    True si el comprimido ya se extrajo en este formato, no cambió (mismo tamaño y mtime)
+    y sus salidas siguen en data_root con el tamaño registrado
+    """
+    fila = conn.execute(
+        "SELECT tamano, mtime_ns FROM archivos WHERE ruta = ? AND formato = ?",
+        (ruta, formato)
+    ).fetchone()
+    if fila is None or fila != (stat.st_size, stat.st_mtime_ns):
+        return False
+    return not salidas_alteradas(conn, ruta, formato, data_root)
+
+def registrar(conn, ruta, formato, stat, hash_contenido, salidas):
+    """
+    Registra un comprimido extraído por completo.
+    salidas: lista de (ruta relativa a data_root, tamaño)
+    """
+    with conn:
+        conn.execute("DELETE FROM salidas WHERE ruta_archivo = ? AND formato = ?", (ruta, formato))
+        conn.execute(
+            "INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?, ?)",
+            (ruta, formato, stat.st_size, stat.st_mtime_ns, hash_contenido,
+             time.strftime('%Y-%m-%d %H:%M:%S'))
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO salidas VALUES (?, ?, ?, ?)",
+            [(ruta, formato, salida, tamano) for salida, tamano in salidas]
+        )
+
+def actualizar_hash(conn, ruta, formato, hash_contenido):
+    with conn:
+        conn.execute(
+            "UPDATE archivos SET hash = ? WHERE ruta = ? AND formato = ?",
+            (hash_contenido, ruta, formato)
+        )
+
+def registrados_con_tamano(conn, tamano, formato):
+    """Comprimidos ya extraídos con ese tamaño exacto: [(ruta, hash)]"""
+    return conn.execute(
+        "SELECT ruta, hash FROM archivos WHERE tamano = ? AND formato = ?",
+        (tamano, formato)
+    ).fetchall()
+
+def salidas_de(conn, ruta, formato):
+    """Salidas registradas de un comprimido: [(ruta relativa a data_root, tamaño)]"""
+    return conn.execute(
+        "SELECT salida, tamano FROM salidas WHERE ruta_archivo = ? AND formato = ? ORDER BY salida",
+        (ruta, formato)
+    ).fetchall()
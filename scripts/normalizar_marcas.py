@@ -0,0 +1,144 @@
+import os
+import re
+import sys
+import json
+import difflib
+import unicodedata
+import pandas as pd
+
+try:
+    from rapidfuzz import fuzz, process, utils
+except ImportError:  # Sin rapidfuzz se compara con difflib (más lento, mismos bloques)
+    fuzz = process = utils = None
+
+# Con qué se puntúa: los dos dan puntajes distintos, así que es parte de la clave del cache
+PUNTAJE = 'rapidfuzz.WRatio' if process is not None else 'difflib.SequenceMatcher'
+
+# Normalización de marcas: cada marca distinta se lleva a una de las marcas más
+# frecuentes (las canónicas) si se parece lo suficiente, como hacía el notebook con
+# process.extractOne, pero sin comparar cada marca contra todas las canónicas:
+#   - bloqueo: solo se comparan marcas que comparten una palabra de 3 letras o más,
+#     o las 3 primeras letras sin espacios (SALTACAUTIVA con SALTA CAUTIVA);
+#   - los puntajes de cada bloque se calculan juntos (rapidfuzz.process.cdist con
+#     WRatio, el mismo puntaje de extractOne; con difflib si rapidfuzz no está);
+#   - las decisiones quedan en un archivo JSON, así en las corridas siguientes
+#     solo se puntúan las marcas nuevas.
+# Después se aplican los reemplazos escritos a mano, que siempre ganan.
+
+CACHE_POR_DEFECTO = 'marcas_normalizadas.json'
+TOP_CANONICAS = 40
+UMBRAL = 90
+
+REEMPLAZOS_MARCAS = {
+    # Marcas duplicadas o mal normalizadas
+    'STELLA': 'STELLA ARTOIS',
+    'PATAGONIA 24_7': 'PATAGONIA',
+    'QUILMES 1890': 'QUILMES',
+    'HEINEKEN CERVEZA LATA': 'HEINEKEN',
+    'SALTACAUTIVA': 'SALTA CAUTIVA',
+    'EAZY 27': '27 EAZY',
+    'ISEBECK': 'ISENBECK',
+}
+
+def limpiar_marcas(marcas):
+    """Como brand_clean del notebook: texto en mayúsculas y sin espacios en los bordes"""
+    return marcas.astype(str).str.upper().str.strip()
+
+def clave_comparacion(marca):
+    """Sin acentos y solo letras y números, para armar los bloques"""
+    sin_acentos = ''.join(c for c in unicodedata.normalize('NFKD', marca) if not unicodedata.combining(c))
+    return re.sub(r'[^A-Z0-9]+', ' ', sin_acentos.upper()).strip()
+
+def claves_bloque(marca):
+    clave = clave_comparacion(marca)
+    claves = {'p:' + clave.replace(' ', '')[:3]}
+    claves.update('t:' + palabra for palabra in clave.split() if len(palabra) >= 3)
+    return claves
+
+def armar_pares(marcas, canonicas):
+    """(bloque, marca, canónica) para cada marca y cada canónica con la que comparte bloque"""
+    def explotar(valores, nombre):
+        tabla = pd.DataFrame({nombre: valores, 'bloque': [sorted(claves_bloque(v)) for v in valores]})
+        return tabla.explode('bloque')
+    return explotar(marcas, 'marca').merge(explotar(canonicas, 'canonica'), on='bloque')
+
+def puntuar_bloque(marcas, canonicas):
+    """Matriz de puntajes (0 a 100) marcas x canónicas"""
+    if process is not None:
+        return process.cdist(marcas, canonicas, scorer=fuzz.WRatio, processor=utils.default_process)
+    return [[100 * difflib.SequenceMatcher(None, clave_comparacion(m), clave_comparacion(c)).ratio()
+             for c in canonicas] for m in marcas]
+
+def elegir_canonicas(marcas, canonicas, umbral=UMBRAL):
+    """{marca: canónica} para las marcas; la canónica es la de mayor puntaje si llega al umbral"""
+    pares = armar_pares(list(marcas), list(canonicas))
+    puntajes = []
+    for _, bloque in pares.groupby('bloque', sort=False):
+        filas = pd.unique(bloque['marca'])
+        columnas = pd.unique(bloque['canonica'])
+        matriz = pd.DataFrame(puntuar_bloque(list(filas), list(columnas)), index=filas, columns=columnas)
+        puntajes.append(matriz.stack().rename('puntaje').rename_axis(['marca', 'canonica']).reset_index())
+
+    decisiones = {marca: marca for marca in marcas}
+    if puntajes:
+        puntajes = pd.concat(puntajes, ignore_index=True)
+        # A igual puntaje gana la canónica más frecuente (el orden de la lista), como extractOne
+        orden = {canonica: i for i, canonica in enumerate(canonicas)}
+        puntajes['orden'] = puntajes['canonica'].map(orden)
+        mejores = (puntajes.sort_values(['marca', 'puntaje', 'orden'], ascending=[True, False, True])
+                   .drop_duplicates('marca'))
+        mejores = mejores[mejores['puntaje'] >= umbral]
+        decisiones.update(zip(mejores['marca'], mejores['canonica']))
+    return decisiones
+
+def leer_cache(ruta_cache, canonicas, umbral):
+    """Decisiones guardadas, si se tomaron con las mismas canónicas, el mismo puntaje y el mismo umbral"""
+    if not ruta_cache or not os.path.exists(ruta_cache):
+        return {}
+    with open(ruta_cache, encoding='utf-8') as f:
+        cache = json.load(f)
+    if (cache.get('canonicas') != list(canonicas) or cache.get('umbral') != umbral
+            or cache.get('puntaje') != PUNTAJE):
+        print("Cambiaron las marcas canónicas, el puntaje o el umbral, se vuelven a puntuar todas las marcas")
+        return {}
+    return cache['decisiones']
+
+def guardar_cache(ruta_cache, canonicas, umbral, decisiones):
+    temporal = ruta_cache + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({'canonicas': list(canonicas), 'puntaje': PUNTAJE, 'umbral': umbral, 'decisiones': decisiones},
+                  f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta_cache)
+
+def normalizar_marcas(marcas, top=TOP_CANONICAS, umbral=UMBRAL, ruta_cache=CACHE_POR_DEFECTO,
+                      reemplazos=REEMPLAZOS_MARCAS, canonicas=None):
+    """
+    Columna brand_normalizada para la Serie de marcas (brand o brand_clean).
+    Las canónicas son las top marcas más frecuentes, salvo que se pasen.
+    """
+    limpias = limpiar_marcas(marcas.dropna())
+    if canonicas is None:
+        canonicas = limpias.value_counts().head(top).index.tolist()
+    decisiones = leer_cache(ruta_cache, canonicas, umbral)
+
+    nuevas = [marca for marca in limpias.unique() if marca not in decisiones]
+    if nuevas:
+        print(f"Puntuando {len(nuevas)} marcas nuevas contra {len(canonicas)} canónicas")
+        decisiones.update(elegir_canonicas(nuevas, canonicas, umbral))
+        if ruta_cache:
+            guardar_cache(ruta_cache, canonicas, umbral, decisiones)
+
+    normalizadas = limpiar_marcas(marcas).map(decisiones).where(marcas.notna())
+    return normalizadas.replace(reemplazos or {}).rename('brand_normalizada')
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Uso: python normalizar_marcas.py <archivo_csv_con_brand> [columna]")
+        sys.exit(1)
+
+    columna = sys.argv[2] if len(sys.argv) > 2 else 'brand'
+    df = pd.read_csv(sys.argv[1], usecols=[columna])
+    df['brand_normalizada'] = normalizar_marcas(df[columna])
+    cambios = df[limpiar_marcas(df[columna]) != df['brand_normalizada']].drop_duplicates()
+    print(f"\n{len(cambios)} marcas cambiadas:")
+    print(cambios.to_string(index=False))
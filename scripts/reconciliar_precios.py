@@ -0,0 +1,88 @@
+import pandas as pd
+
+# Reconciliación de precios distintos para la misma sucursal, producto y día.
+# En lugar de juntar los precios en un string ("899.0-949.0"), cada política
+# da una columna numérica. Todo se resuelve con reducciones nativas de groupby
+# sobre el formato largo, sin funciones de Python por grupo.
+#
+# Políticas:
+#   min, max, media: precio mínimo, máximo y promedio del día
+#   moda:            precio más repetido (en empate, el menor)
+#   n_precios:       cantidad de precios distintos (1 = sin conflicto)
+
+POLITICAS = ['min', 'max', 'media', 'moda', 'n_precios']
+POLITICAS_POR_DEFECTO = ['moda']
+
+def validar_politicas(politicas):
+    if isinstance(politicas, str):
+        politicas = [p.strip() for p in politicas.split(',') if p.strip()]
+    invalidas = [p for p in politicas if p not in POLITICAS]
+    if invalidas or not politicas:
+        raise ValueError(f"Políticas inválidas: {invalidas or politicas}. Opciones: {', '.join(POLITICAS)}")
+    return list(politicas)
+
+def reconciliar_largo(df, claves, politicas=POLITICAS_POR_DEFECTO, columna_fecha='fecha', columna_precio='precio'):
+    """
+    Reconcilia un DataFrame largo (una fila por precio observado).
+    Devuelve una fila por claves + fecha con una columna por política.
+    """
+    politicas = validar_politicas(politicas)
+    grupo = list(claves) + [columna_fecha]
+    df = df.dropna(subset=[columna_precio])
+    precios = df.groupby(grupo, observed=True)[columna_precio]
+
+    columnas = {}
+    if 'min' in politicas:
+        columnas['min'] = precios.min()
+    if 'max' in politicas:
+        columnas['max'] = precios.max()
+    if 'media' in politicas:
+        columnas['media'] = precios.mean()
+    if 'n_precios' in politicas:
+        columnas['n_precios'] = precios.nunique().astype('int32')
+    if 'moda' in politicas:
+        # Contamos cada precio dentro del grupo y nos quedamos con el más frecuente
+        conteos = df.groupby(grupo + [columna_precio], observed=True).size().rename('_n').reset_index()
+        conteos = conteos.sort_values(grupo + ['_n', columna_precio], ascending=[True] * len(grupo) + [False, True])
+        moda = conteos.drop_duplicates(subset=grupo, keep='first').set_index(grupo)[columna_precio]
+        columnas['moda'] = moda
+
+    resultado = pd.DataFrame({p: columnas[p] for p in politicas})
+    return resultado.reset_index()
+
+def a_ancho(df_reconciliado, claves, politicas=POLITICAS_POR_DEFECTO, columna_fecha='fecha'):
+    """
+    Pasa el resultado de reconciliar_largo a una columna por fecha.
+    Con una sola política las columnas se llaman como la fecha (YYYYMMDD);
+    con varias, fecha_politica (por ejemplo 20250101_min).
+    """
+    politicas = validar_politicas(politicas)
+    ancho = df_reconciliado.set_index(list(claves) + [columna_fecha])[politicas].unstack(columna_fecha)
+    ancho.columns = [str(fecha) if len(politicas) == 1 else f'{fecha}_{politica}' for politica, fecha in ancho.columns]
+    ancho = ancho.reset_index()
+    columnas_fecha = sorted(col for col in ancho.columns if col not in claves)
+    return completar_conteos(ancho[list(claves) + columnas_fecha], claves, politicas)
+
+def completar_conteos(ancho, claves, politicas):
+    """Donde no hubo precios el conteo de n_precios es 0, no NaN"""
+    if politicas == ['n_precios']:
+        conteos = [col for col in ancho.columns if col not in claves]
+    else:
+        conteos = [col for col in ancho.columns if col.endswith('_n_precios')]
+    ancho[conteos] = ancho[conteos].fillna(0).astype('int32')
+    return ancho
+
+def reconciliar_ancho(df, claves, politicas=POLITICAS_POR_DEFECTO):
+    """
+    Reconcilia un DataFrame ancho (una columna por fecha, varias filas por clave).
+    Las columnas que no son clave se toman como fechas.
+    """
+    columnas_fecha = [col for col in df.columns if col not in claves]
+    largo = df.melt(id_vars=list(claves), value_vars=columnas_fecha, var_name='fecha', value_name='precio')
+    largo['precio'] = pd.to_numeric(largo['precio'], errors='coerce')
+    reconciliado = reconciliar_largo(largo, claves, politicas)
+    ancho = a_ancho(reconciliado, claves, politicas)
+    # Las claves sin ningún precio también quedan, con las fechas vacías
+    claves_unicas = df[list(claves)].dropna().drop_duplicates().sort_values(list(claves))
+    ancho = claves_unicas.merge(ancho, on=list(claves), how='left').reset_index(drop=True)
+    return completar_conteos(ancho, claves, validar_politicas(politicas))
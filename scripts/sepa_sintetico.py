@@ -0,0 +1,172 @@
+import os
+import io
+import sys
+import gzip
+import json
+import zipfile
+import numpy as np
+import pandas as pd
+from intervalos_precios import fechas_a_dias, dias_a_fechas
+
+# Genera un árbol crudo/ con datos falsos pero con la forma de los de SEPA, para poder
+# correr y medir los scripts sin el disco externo:
+#   crudo/sepa/<YYYY-MM-DD>/sepa-<id_comercio>_<YYYY-MM-DD>_09-05-11.zip
+#       con la carpeta sepa-..._09-05-11/ y adentro comercio.csv y productos.csv ('|')
+#   crudo/<año>/precios_<n>.csv.gz (y un precios_mayorista.csv.gz)
+#       los CSV anuales anchos: claves de sucursal y producto + precio_YYYYMMDD
+# Descomprimido con descomprimir_todo queda el data/ que esperan los demás scripts.
+# Todo sale de una semilla, así que el mismo tamaño genera siempre los mismos archivos.
+
+ESCALAS = {
+    # comercios, sucursales por comercio, productos, días de precios, dumps diarios, CSV anuales
+    'chico': dict(comercios=4, sucursales=5, productos=500, dias=30, dumps=5, archivos_anuales=2),
+    'mediano': dict(comercios=8, sucursales=25, productos=2000, dias=60, dumps=10, archivos_anuales=4),
+    'grande': dict(comercios=12, sucursales=60, productos=5000, dias=90, dumps=20, archivos_anuales=8),
+}
+SURTIDO = 0.6        # Parte de los productos que vende cada sucursal
+SIN_PRECIO = 0.1     # Celdas vacías en los CSV anuales
+DUPLICADAS = 0.01    # Filas repetidas en los CSV anuales (mismo día, otro precio)
+
+MARCAS_CERVEZA = ['QUILMES', 'PATAGONIA', 'STELLA ARTOIS', 'BRAHMA', 'HEINEKEN', 'ANDES', 'SALTA', 'CORONA']
+ESTILOS = ['RUBIA', 'NEGRA', 'IPA', 'ROJA', 'LAGER', 'STOUT', 'VERA IPA', 'AMBER LAGER']
+ENVASES = [('LATA', '473 cm3'), ('BOTELLA', '1 lt'), ('PORRON', '330 cc'), ('LATA PACK X6', '2838 cm3'),
+           ('BOTELLA', '710 cc'), ('LATA', '355 cc')]
+OTROS = ['ARROZ', 'FIDEOS', 'YERBA', 'ACEITE', 'GALLETITAS', 'LECHE', 'AZUCAR', 'GASEOSA', 'VINO TINTO', 'JUGO']
+PROVINCIAS = ['AR-B', 'AR-C', 'AR-X', 'AR-S', 'AR-M', 'AR-T', 'AR-U']
+
+def generar_productos(productos, rng):
+    """id_producto (EAN de 13 dígitos), descripción, marca y precio base; ~20% son cervezas"""
+    ids = rng.choice(np.arange(7790000000000, 7799999999999, 7919), productos, replace=False).astype(str)
+    cerveza = rng.random(productos) < 0.2
+    envase = rng.integers(0, len(ENVASES), productos)
+    marca = np.array(MARCAS_CERVEZA)[rng.integers(0, len(MARCAS_CERVEZA), productos)]
+    descripcion = np.where(
+        cerveza,
+        [f"CERVEZA {ESTILOS[i % len(ESTILOS)]} {ENVASES[e][0]}, {m}, {ENVASES[e][1]}"
+         for i, (e, m) in enumerate(zip(envase, marca))],
+        [f"{OTROS[i % len(OTROS)]} MARCA{i % 37} {500 + 250 * (i % 4)} gr" for i in range(productos)])
+    return pd.DataFrame({
+        'id_producto': ids,
+        'productos_descripcion': descripcion,
+        'productos_marca': np.where(cerveza, marca, 'GENERICA'),
+        'precio_base': np.round(rng.uniform(500, 9000, productos), 2),
+        'cerveza': cerveza,
+    })
+
+def generar_sucursales(comercios, sucursales, rng):
+    filas = []
+    for id_comercio in range(1, comercios + 1):
+        for id_sucursal in range(1, sucursales + 1):
+            filas.append((id_comercio, 1 + id_sucursal % 2, id_sucursal, PROVINCIAS[rng.integers(len(PROVINCIAS))]))
+    return pd.DataFrame(filas, columns=['id_comercio', 'id_bandera', 'id_sucursal', 'sucursales_provincia'])
+
+def surtido(sucursales, productos, rng):
+    """Filas sucursal x producto: cada sucursal vende una parte de los productos"""
+    vende = rng.random((len(sucursales), len(productos))) < SURTIDO
+    s, p = np.nonzero(vende)
+    filas = sucursales.iloc[s].reset_index(drop=True)
+    filas['id_producto'] = productos['id_producto'].to_numpy()[p]
+    filas['precio_base'] = productos['precio_base'].to_numpy()[p] * rng.uniform(0.9, 1.1, len(p))
+    return filas
+
+def generar_precios(filas, fechas, rng):
+    """Precios por día con cambios escalonados (como los reales) y celdas vacías"""
+    dias = len(fechas)
+    # Cada ~15 días el precio sube un poco en algunas filas
+    saltos = (rng.random((len(filas), dias)) < 1 / 15) * rng.uniform(0, 0.08, (len(filas), dias))
+    precios = np.round(filas['precio_base'].to_numpy()[:, None] * np.cumprod(1 + saltos, axis=1), 2)
+    precios[rng.random(precios.shape) < SIN_PRECIO] = np.nan
+    return pd.DataFrame(precios, columns=[f'precio_{fecha}' for fecha in fechas])
+
+def escribir_gz(df, destino):
+    with gzip.open(destino, 'wt', encoding='utf-8', newline='') as f:
+        df.to_csv(f, index=False)
+
+def generar_anuales(crudo, año, sucursales, productos, fechas, archivos, rng):
+    """CSV anuales anchos repartidos en varios .csv.gz, más uno mayorista que se ignora"""
+    filas = surtido(sucursales, productos, rng)
+    duplicadas = filas.sample(frac=DUPLICADAS, random_state=int(rng.integers(2**31)))
+    filas = pd.concat([filas, duplicadas], ignore_index=True)
+    ancho = pd.concat([filas.drop(columns='precio_base'), generar_precios(filas, fechas, rng)], axis=1)
+
+    carpeta = os.path.join(crudo, año)
+    os.makedirs(carpeta, exist_ok=True)
+    for n, parte in enumerate(np.array_split(np.arange(len(ancho)), archivos), 1):
+        escribir_gz(ancho.iloc[parte], os.path.join(carpeta, f'precios_{n}.csv.gz'))
+    escribir_gz(ancho.head(100), os.path.join(carpeta, 'precios_mayorista.csv.gz'))
+    return len(ancho)
+
+def generar_dumps(crudo, sucursales, productos, fechas, rng):
+    """Un zip por comercio y día con comercio.csv y productos.csv"""
+    filas_comercio = filas_productos = 0
+    for fecha in fechas:
+        dia = f'{str(fecha)[:4]}-{str(fecha)[4:6]}-{str(fecha)[6:]}'
+        carpeta = os.path.join(crudo, 'sepa', dia)
+        os.makedirs(carpeta, exist_ok=True)
+        for id_comercio, del_comercio in sucursales.groupby('id_comercio'):
+            nombre = f'sepa-{id_comercio}_{dia}_09-05-11'
+            banderas = sorted(del_comercio['id_bandera'].unique())
+            comercio = pd.DataFrame({
+                'id_comercio': id_comercio,
+                'id_bandera': banderas,
+                'comercio_cuit': 30000000000 + id_comercio,
+                'comercio_razon_social': f'COMERCIO {id_comercio} S.A.',
+                'comercio_bandera_nombre': [f'Bandera {id_comercio}-{b}' for b in banderas],
+            })
+            filas = surtido(del_comercio, productos, rng)
+            filas = filas.merge(productos[['id_producto', 'productos_descripcion', 'productos_marca']], on='id_producto')
+            filas['productos_precio_lista'] = np.round(filas.pop('precio_base'), 2)
+            filas = filas.drop(columns='sucursales_provincia')
+
+            contenido = io.BytesIO()
+            with zipfile.ZipFile(contenido, 'w', zipfile.ZIP_DEFLATED) as z:
+                # Como los reales: el comercio.csv termina con la fecha de actualización
+                z.writestr(f'{nombre}/comercio.csv', comercio.to_csv(index=False, sep='|')
+                           + f'&#032;Ultima actualizacion: {dia}\n')
+                z.writestr(f'{nombre}/productos.csv', filas.to_csv(index=False, sep='|'))
+            with open(os.path.join(carpeta, nombre + '.zip'), 'wb') as f:
+                f.write(contenido.getvalue())
+            filas_comercio += len(comercio)
+            filas_productos += len(filas)
+    return filas_comercio, filas_productos
+
+def generar_sepa(destino, escala='chico', año='2025', semilla=0):
+    """
+    Genera destino/crudo con la escala indicada (ver ESCALAS) y devuelve un resumen
+    con la cantidad de filas de cada tipo y los id_producto de las cervezas.
+    El resumen también queda en destino/sintetico.json.
+    """
+    parametros = ESCALAS[escala]
+    rng = np.random.default_rng(semilla)
+    crudo = os.path.join(destino, 'crudo')
+    productos = generar_productos(parametros['productos'], rng)
+    sucursales = generar_sucursales(parametros['comercios'], parametros['sucursales'], rng)
+    inicio = fechas_a_dias([int(f'{año}0101')])[0]
+    fechas = dias_a_fechas(inicio + np.arange(parametros['dias']))
+
+    filas_precios = generar_anuales(crudo, año, sucursales, productos, fechas, parametros['archivos_anuales'], rng)
+    filas_comercio, filas_productos = generar_dumps(crudo, sucursales, productos, fechas[:parametros['dumps']], rng)
+    resumen = {
+        'escala': escala,
+        'año': año,
+        'semilla': semilla,
+        'filas_precios': filas_precios,
+        'filas_productos': filas_productos,
+        'filas_comercio': filas_comercio,
+        'ids_cervezas': productos.loc[productos['cerveza'], 'id_producto'].tolist(),
+    }
+    with open(os.path.join(destino, 'sintetico.json'), 'w') as f:
+        json.dump(resumen, f, indent=1)
+    return resumen
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3, 4):
+        print(f"Uso: python sepa_sintetico.py <destino> [{'|'.join(ESCALAS)}] [semilla]")
+        sys.exit(1)
+
+    destino = sys.argv[1]
+    escala = sys.argv[2] if len(sys.argv) > 2 else 'chico'
+    semilla = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    resumen = generar_sepa(destino, escala, semilla=semilla)
+    print(f"Generado {destino}/crudo ({escala}): {resumen['filas_precios']} filas de precios, "
+          f"{resumen['filas_productos']} filas de productos, {resumen['filas_comercio']} de comercios")
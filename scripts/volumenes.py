@@ -0,0 +1,68 @@
+import sys
+import pandas as pd
+
+# Volumen (en ml) y cantidad de unidades del pack a partir del nombre o la descripción
+# de un producto: "473 cc", "1lt", "0,33 lt", "6x355", "PACK X6 ... 2838 cm3".
+# Todo son operaciones sobre columnas (str.extract y map); además cada nombre distinto
+# se procesa una sola vez y el resultado se reparte a las filas repetidas.
+#
+# volume_ml es el volumen como está escrito: en "6x355" es 355 (el de cada unidad) y en
+# "PACK X6 2838 cm3" es 2838 (el del pack entero), igual que en el notebook de ETL.
+
+FACTORES_ML = {
+    'ml': 1, 'cc': 1, 'cm3': 1, 'cmq': 1, 'c': 1,
+    'cl': 10,
+    'l': 1000, 'lt': 1000, 'lts': 1000, 'litro': 1000, 'litros': 1000,
+}
+UNIDADES = '|'.join(sorted(FACTORES_ML, key=len, reverse=True))  # Las más largas primero
+NUMERO = r'\d+(?:[.,]\d+)?'
+
+# Opcionalmente "6x" antes del número: "6x355", "6 x 355 ml". Sin unidad solo vale
+# con el pack adelante (6x355 son mililitros).
+PATRON_VOLUMEN = (rf'(?P<crudo>(?:(?P<pack>\d+)\s*x\s*)?(?P<numero>{NUMERO})[\s-]?(?P<unidad>{UNIDADES})\b'
+                  rf'|(?P<pack_solo>\d+)\s*x\s*(?P<numero_solo>\d{{3,4}})\b)')
+# "pack x6", "x4 uni", "x 12 un": el número no puede ser un volumen (no va seguido de unidad)
+PATRON_PACK = rf'\b(?:pack\s*)?x\s*(?P<pack>\d{{1,2}})\b(?!\s*(?:[.,]\d|{UNIDADES})\b)'
+
+# Un volumen en litros de 100 o más es un error de unidad ("473 lt"): se toma en ml
+LITROS_MAXIMOS = 100
+
+def parsear_unicos(nombres):
+    """Volumen y pack de nombres sin repetir (Serie de strings)"""
+    texto = nombres.fillna('').str.lower()
+    volumen = texto.str.extract(PATRON_VOLUMEN)
+    pack_suelto = texto.str.extract(PATRON_PACK)['pack']
+
+    numero = volumen['numero'].fillna(volumen['numero_solo'])
+    unidad = volumen['unidad'].where(volumen['numero'].notna(), 'ml')
+    valor = pd.to_numeric(numero.str.replace(',', '.', regex=False), errors='coerce')
+    factor = unidad.map(FACTORES_ML)
+    factor = factor.mask((factor == 1000) & (valor >= LITROS_MAXIMOS), 1)
+
+    pack = volumen['pack'].fillna(volumen['pack_solo']).fillna(pack_suelto)
+    return pd.DataFrame({
+        'volume_raw': volumen['crudo'],
+        'volume_ml': (valor * factor).where(numero.notna()),
+        'pack': pd.to_numeric(pack, errors='coerce').fillna(1).astype('int16'),
+    }, index=nombres.index)
+
+def parsear_volumenes(nombres):
+    """
+    DataFrame con volume_raw (el texto encontrado), volume_ml (float, NaN si no hay)
+    y pack (unidades, 1 si no dice) para cada nombre, en el mismo índice.
+    """
+    codigos, unicos = pd.factorize(nombres)
+    resultado = parsear_unicos(pd.Series(unicos, dtype=object))
+    # Los nombres vacíos tienen código -1: se agrega una fila vacía al final para ellos
+    resultado = pd.concat([resultado, parsear_unicos(pd.Series([None], dtype=object))], ignore_index=True)
+    resultado = resultado.iloc[codigos]
+    resultado.index = nombres.index
+    return resultado
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python volumenes.py <nombre> [nombre ...]")
+        sys.exit(1)
+
+    nombres = pd.Series(sys.argv[1:])
+    print(pd.concat([nombres.rename('name'), parsear_volumenes(nombres)], axis=1).to_string(index=False))
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pyreadstat
+from convertir_dta import convertir_archivo
+
+def test_fechas_vacias_en_el_primer_bloque(tmp_path):
+    # d, t y h no tienen valores en el primer bloque: el esquema sale de los metadatos
+    df = pd.DataFrame({
+        'x': [1.0, 2.0, 3.0, 4.0],
+        'd': [np.nan, np.nan, 23000.0, 23001.0],
+        't': [np.nan, np.nan, 2.0e12, 2.1e12],
+        'h': [np.nan, np.nan, 3.6e6, 7.2e6],
+        'n': [np.nan, np.nan, 1.0, 2.0],
+    })
+    origen = str(tmp_path / 'a.dta')
+    pyreadstat.write_dta(df, origen, variable_format={'d': '%td', 't': '%tc', 'h': '%tcHH:MM:SS'})
+    salida = str(tmp_path / 'a.parquet')
+
+    assert convertir_archivo(origen, salida, 'parquet', filas_por_bloque=2) == (4, 5)
+    tabla = pq.read_table(salida)
+    assert str(tabla.schema.field('d').type) == 'timestamp[us]'
+    assert str(tabla.schema.field('t').type) == 'timestamp[us]'
+    assert str(tabla.schema.field('h').type) == 'time64[us]'
+    assert str(tabla.schema.field('n').type) == 'double'
+    leido = tabla.to_pandas()
+    assert leido['d'].isna().tolist() == [True, True, False, False]
+    assert leido['d'].iloc[2] == pd.Timestamp('2022-12-21')
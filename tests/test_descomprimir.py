@@ -0,0 +1,25 @@
+import gzip
+import os
+import struct
+import descomprimir_todo
+from descomprimir_todo import tamano_descomprimido_gz
+
+def escribir_gz(ruta, contenido):
+    with gzip.open(ruta, 'wb') as f:
+        f.write(contenido)
+    return str(ruta)
+
+def test_gz_vacio(tmp_path):
+    assert tamano_descomprimido_gz(escribir_gz(tmp_path / 'vacio.csv.gz', b'')) == 0
+
+def test_gz_chico_menor_que_el_comprimido(tmp_path):
+    ruta = escribir_gz(tmp_path / 'chico.csv.gz', b'a|b\n1|2\n')
+    assert os.path.getsize(ruta) > 8
+    assert tamano_descomprimido_gz(ruta) == 8
+
+def test_gz_de_mas_de_4_gb_suma_vueltas(tmp_path, monkeypatch):
+    # ISIZE 100 con un comprimido de 5 GB: el descomprimido tiene que ser 2^32 * 2 + 100
+    ruta = tmp_path / 'grande.csv.gz'
+    ruta.write_bytes(b'\x1f\x8b' + struct.pack('<I', 100))
+    monkeypatch.setattr(descomprimir_todo.os.path, 'getsize', lambda _: 5 * 2**30)
+    assert tamano_descomprimido_gz(str(ruta)) == 2 * 2**32 + 100
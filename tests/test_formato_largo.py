@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from formato_largo import CLAVES, EscritorLargo, ancho_a_largo, concatenar_largo, reconciliar_a_largo
+from reconciliar_precios import reconciliar_ancho
+
+def ancho(ids_comercio, sucursales, precios, provincia='X'):
+    """Resultado ancho de un archivo, con los ids como los deja tipar_ids (enteros nullables)"""
+    n = len(precios)
+    return pd.DataFrame({
+        'id_comercio': pd.array(ids_comercio, dtype='Int32'),
+        'id_bandera': pd.array([1] * n, dtype='Int16'),
+        'id_sucursal': pd.array(sucursales, dtype='Int32'),
+        'nombre_comercio': ['A'] * n,
+        'provincia': [provincia] * n,
+        'id_producto': ['01'] * n,
+        '20250101': precios,
+    })
+
+def ordenar(df):
+    claves = CLAVES + ['fecha']
+    return (df.astype({'nombre_comercio': str, 'provincia': str}).sort_values(claves)
+            .reset_index(drop=True))
+
+def test_id_vacio_se_descarta_como_en_la_salida_ancha():
+    df = ancho([1, pd.NA, 1], [1, 2, 1], [10.0, 11.0, 12.0])
+    largo = reconciliar_a_largo(ancho_a_largo(df), ['min', 'n_precios'])
+    assert len(largo) == 1
+    assert largo['precio_min'].tolist() == [10.0]
+    assert largo['precio_n_precios'].tolist() == [2]
+    ancho_reconciliado = reconciliar_ancho(df, CLAVES, ['min', 'n_precios'])
+    assert ancho_reconciliado['20250101_min'].tolist() == largo['precio_min'].tolist()
+
+def test_escritor_reconcilia_precios_repetidos_entre_partes(tmp_path):
+    partes = [
+        ancho_a_largo(ancho([1, 1, 2], [1, 1, 1], [10.0, 12.0, 5.0], provincia='X')),
+        ancho_a_largo(ancho([1, pd.NA], [1, 3], [12.0, 7.0], provincia='Y')),
+        ancho_a_largo(ancho([3], [1], [8.0], provincia='Z')),
+    ]
+    # La sucursal 1 del comercio 1 aparece en dos partes con provincias distintas: son claves distintas
+    partes[1]['provincia'] = partes[1]['provincia'].cat.rename_categories({'Y': 'X'})
+    destino = str(tmp_path / 'largo.parquet')
+    escritor = EscritorLargo(destino, ['moda', 'n_precios'])
+    for parte in partes:
+        escritor.agregar(parte)
+    filas = escritor.cerrar()
+
+    esperado = reconciliar_a_largo(concatenar_largo(partes), ['moda', 'n_precios'])
+    obtenido = pd.read_parquet(destino)
+    assert filas == len(esperado) == 3
+    pd.testing.assert_frame_equal(ordenar(obtenido), ordenar(esperado), check_categorical=False)
+    assert np.array_equal(ordenar(obtenido)['precio_n_precios'], [2, 1, 1])
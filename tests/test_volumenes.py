@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from volumenes import parsear_volumenes
+
+# (nombre, volume_ml, pack) con el resultado conocido
+CASOS = [
+    ('Corona Extra Cerveza Botella 355 Ml', 355, 1),
+    ('Ortuzar Cerveza Golden 473 Ml', 473, 1),
+    ('cerveza SOL Rubia 330cc BOT-330-cc.', 330, 1),
+    ('Quilmes Ipa Cerveza X 1 Lt', 1000, 1),
+    ('Brahma Cerveza Dorada 1l', 1000, 1),
+    ('Brahma 1 litro', 1000, 1),
+    ('Cerveza 1.5lts', 1500, 1),
+    ('Stella Artois Cerveza 975 Cc', 975, 1),
+    ('Patagonia Cerveza Ipa Estelar X 473 Cc', 473, 1),
+    ('Budweiser Cerveza Pack X4 Uni 710cc', 710, 4),
+    ('pack x 12 un 355 ml', 355, 12),
+    ('CERVEZA LATA KM.24.7 PACK X6, PATAGONIA, 2838 cm3', 2838, 6),
+    ('Cerveza MILLER Genuine Draft 330CC BOT-0.33-lt.', 330, 1),
+    ('Heineken lata 6x355', 355, 6),
+    ('Isenbeck 6 x 473 ml', 473, 6),
+    ('Imperial barril 5 litros', 5000, 1),
+    ('Warsteiner botella 0,33 lt', 330, 1),
+    ('Coca 2,25 L', 2250, 1),
+    ('Schneider 50 cl', 500, 1),
+    ('Antares Scotch 473 cmq', 473, 1),
+    ('Salta Negra 473c', 473, 1),
+    ('Quilmes Clasica 473 lt', 473, 1),  # Litros imposibles: se toman como ml
+    ('Sol Cerveza Porron Rubia', np.nan, 1),
+    ('Lata x6 sin volumen', np.nan, 6),
+]
+
+@pytest.mark.parametrize('nombre, volume_ml, pack', CASOS)
+def test_casos_conocidos(nombre, volume_ml, pack):
+    obtenido = parsear_volumenes(pd.Series([nombre])).iloc[0]
+    assert np.isclose(obtenido['volume_ml'], volume_ml, equal_nan=True)
+    assert obtenido['pack'] == pack
+
+def test_decimales_con_coma_y_punto():
+    obtenido = parsear_volumenes(pd.Series(['0,33 lt', '0.33 lt', '1,5 l']))
+    assert obtenido['volume_ml'].tolist() == pytest.approx([330, 330, 1500])
+    assert obtenido['volume_raw'].tolist() == ['0,33 lt', '0.33 lt', '1,5 l']
+
+def test_pack_sin_unidad_no_es_volumen():
+    # "x6" es el pack, no 6 ml; "6x355" sí es un volumen (en ml) aunque no diga la unidad
+    obtenido = parsear_volumenes(pd.Series(['cerveza x6', 'cerveza 6x355']))
+    assert np.isnan(obtenido['volume_ml'].iloc[0])
+    assert obtenido['pack'].tolist() == [6, 6]
+    assert obtenido['volume_ml'].iloc[1] == 355
+
+def test_mismo_indice_y_nombres_repetidos_o_vacios():
+    nombres = pd.Series(['473 cc', None, '', '473 cc', '1 l'], index=[10, 20, 30, 40, 50])
+    obtenido = parsear_volumenes(nombres)
+    assert obtenido.index.tolist() == nombres.index.tolist()
+    assert np.allclose(obtenido['volume_ml'], [473, np.nan, np.nan, 473, 1000], equal_nan=True)
+    assert obtenido['pack'].tolist() == [1, 1, 1, 1, 1]
+    assert obtenido['pack'].dtype == 'int16'